@@ -1,72 +1,66 @@
-import tkinter as tk
-from tkinter import ttk
-from tkinter import messagebox
-from tkinter import simpledialog
-from PIL import ImageGrab, ImageTk, Image
+import sys
+if len(sys.argv) > 1 and sys.argv[1] == "--ocr-worker":
+    # Frozen build started as an OCR pool worker (ocr_pool.py): serve OCR, no GUI
+    from ocr_pool import worker_main
+    sys.exit(worker_main(sys.argv[2:]))
+# --profile-startup [REPORT.json]: time every startup phase (see startup_profiler.py)
+from startup_profiler import StartupProfiler
+profiler = StartupProfiler.from_argv(sys.argv)
+profiler.expect('import_gui', 'import_numpy', 'import_cv2', 'import_capture_engine',
+                'import_torch', 'import_easyocr', 'create_reader',
+                'build_notebook_tabs', 'load_config', 'load_all_sift_templates', 'startup_to_idle')
+profiler.begin('startup_to_idle')
+
+with profiler.phase('import_gui'):
+    import tkinter as tk
+    from tkinter import ttk
+    from tkinter import messagebox
+    from tkinter import simpledialog
+    from PIL import ImageTk, Image
 import threading
 import datetime
-import sys
 import os
 import time
-import numpy as np
-import cv2
+with profiler.phase('import_numpy'):
+    import numpy as np
+with profiler.phase('import_cv2'):
+    import cv2
 import json
-import easyocr # For OCR
 import shutil # For deleting folders
-import requests # For sending data
-
-# --- Base Path Logic ---
-def get_base_path():
-    """Gets the base path, whether running as .py or frozen .exe"""
-    if getattr(sys, 'frozen', False):
-        # We are running in a bundle (e.g., PyInstaller)
-        base_path = os.path.dirname(sys.executable)
-    else:
-        # We are running in a normal Python environment
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return base_path
-
-# --- Global Paths & Constants ---
-# (!!! MUST BE DEFINED *BEFORE* EASYOCR INIT !!!)
-BASE_PATH = get_base_path()
-MODEL_STORAGE_DIR = os.path.join(BASE_PATH, 'model') # Path for EasyOCR models
-TABNAME_DIR = os.path.join(BASE_PATH, "pictures", "tabname") 
-STATUS_TEMPLATE_DIR = os.path.join(BASE_PATH, "pictures", "status")
-ROI_DIR = os.path.join(BASE_PATH, "rois")
-CONFIG_FILE_PATH = os.path.join(BASE_PATH, "config.json")
+from frame_sources import open_frame_source
+from capture_pipeline import CapturePipeline, STAGES
+from capture_scheduler import CaptureScheduler
+from ocr_preprocess import OCR_INTERPOLATIONS, OCR_PREPROCESS_ORDERS, OCR_SCALE_MODES
+from ocr_backends import EasyOcrBackend
+with profiler.phase('import_capture_engine'):
+    from capture_engine import (
+        CaptureEngine, TABNAME_DIR, STATUS_TEMPLATE_DIR, ROI_DIR, CONFIG_FILE_PATH,
+        SPLIT_OPTIONS, SPLIT_ORDER, STATUS_ROI_MARKER, OCR_MODES, crop_view, split_array,
+        ensure_data_dirs, default_config, load_config_file, save_config_file
+    )
 
 # Create all necessary folders on startup
-os.makedirs(MODEL_STORAGE_DIR, exist_ok=True) 
-os.makedirs(TABNAME_DIR, exist_ok=True)
-os.makedirs(STATUS_TEMPLATE_DIR, exist_ok=True)
-os.makedirs(ROI_DIR, exist_ok=True)
+ensure_data_dirs()
 
+# --- Capture Engine (SIFT + EasyOCR) ---
+# Status messages from the engine may come from worker threads -> marshal onto the Tk loop.
+def _engine_status(text_key, content=""):
+    root.after(0, update_status, text_key, content)
 
-# --- SIFT Global Initialization ---
 try:
-    sift = cv2.SIFT_create() # (MODIFIED) แก้จาก cv เป็น cv2
-    tabname_sift_cache = {}
-    status_sift_caches = {}
-    # (MODIFIED) นี่คือค่า Default เท่านั้น จะถูกเขียนทับโดย load_config()
-    TABNAME_SIFT_THRESHOLD = 70  
-    STATUS_SIFT_THRESHOLD = 15   
+    engine = CaptureEngine(default_config(), status_callback=_engine_status)
 except Exception as e:
     messagebox.showerror("OpenCV Error", f"ไม่สามารถเริ่ม SIFT ได้ (อาจต้องติดตั้ง opencv-contrib-python)\n{e}")
     sys.exit()
 
-# --- EasyOCR Initialization ---
-# (!!! NOW IT CAN FIND MODEL_STORAGE_DIR !!!)
-try:
-    print("Loading EasyOCR Reader... (This may take a moment on first run)")
-
-    # (!!! MODIFIED !!!) ส่ง path ของ model ที่เรากำหนดเองเข้าไป
-    ocr_reader = easyocr.Reader(['en'], model_storage_directory=MODEL_STORAGE_DIR) 
+# The EasyOCR reader is created by load_ocr_reader() once the window is up.
 
-    print("EasyOCR Reader loaded.")
-except Exception as e:
-    messagebox.showerror("EasyOCR Error", f"Could not initialize EasyOCR.\n{e}")
-    sys.exit()
-OCR_ALLOWLIST = '-.0123456789'
+# --- Frame Source ---
+# Live screen by default; --frame-source <PNG folder | session .zip | PNG file> replays recorded frames.
+frame_source_spec = "screen"
+if "--frame-source" in sys.argv[:-1]:
+    frame_source_spec = sys.argv[sys.argv.index("--frame-source") + 1]
+frame_source = open_frame_source(frame_source_spec)
 
 # --- Predefined ROI Names ---
 PREDEFINED_ROI_NAMES = [
@@ -92,34 +86,6 @@ try:
 except ImportError: pass 
 except Exception as e: print(f"DPI Awareness Error: {e}")
 
-# --- Split Functions ---
-def split_pattern_1(pil_image):
-    w, h = pil_image.size
-    split_x_1 = (w * 34) // 100; split_x_2 = (w * 68) // 100; split_x_3 = (w * 84) // 100
-    return [(0, 0, split_x_1, h), (split_x_1, 0, split_x_2 - split_x_1, h), (split_x_2, 0, split_x_3 - split_x_2, h), (split_x_3, 0, w - split_x_3, h)]
-def split_pattern_2(pil_image):
-    w, h = pil_image.size
-    split_x_1 = w // 4; split_x_2 = w // 2; split_x_3 = (w * 3) // 4
-    return [(0, 0, split_x_1, h), (split_x_1, 0, split_x_2 - split_x_1, h), (split_x_2, 0, split_x_3 - split_x_2, h), (split_x_3, 0, w - split_x_3, h)]
-def split_pattern_3(pil_image):
-    w, h = pil_image.size
-    split_x_1 = w // 2; split_x_2 = split_x_1 // 2
-    return [(0, 0, split_x_2, h), (split_x_2, 0, split_x_1 - split_x_2, h), (split_x_1, 0, w - split_x_1, h)]
-def split_pattern_4(pil_image):
-    w, h = pil_image.size
-    split_x_1 = w // 2
-    return [(0, 0, split_x_1, h), (split_x_1, 0, w - split_x_1, h)]
-# --- End Split Functions ---
-
-SPLIT_OPTIONS = {
-    "NONE": {'en': 'None (Full Image)', 'ja': 'なし (フルイメージ)', 'func': None},
-    "P1_34_34_16_16": {'en': 'Pattern 1 (34/34/16/16)', 'ja': 'パターン1 (34/34/16/16)', 'func': split_pattern_1},
-    "P2_25x4": {'en': 'Pattern 2 (25% x 4)', 'ja': 'パターン2 (25% x 4)', 'func': split_pattern_2},
-    "P3_25_25_50": {'en': 'Pattern 3 (25/25/50)', 'ja': 'パターン3 (25/25/50)', 'func': split_pattern_3},
-    "P4_50_50": {'en': 'Pattern 4 (50 / 50)', 'ja': 'パターン4 (50 / 50)', 'func': split_pattern_4}
-}
-SPLIT_ORDER = ["NONE", "P1_34_34_16_16", "P2_25x4", "P3_25_25_50", "P4_50_50"]
-
 # --- Language Data (คลังคำศัพท์) ---
 translations = {
     'app_title': {'en': 'Capture Tool v0.19 (Minimize)', 'ja': 'キャプチャーツール v0.19 (最小化)'}, # (MODIFIED)
@@ -135,6 +101,8 @@ translations = {
     'start_button': {'en': 'Start Auto', 'ja': '自動開始'},
     'stop_button': {'en': 'Stop Auto', 'ja': '自動停止'},
     'progress_label': {'en': 'Next capture in:', 'ja': '次のキャプチャ:'},
+    'scheduler_stats': {'en': 'Late {content[0]} ms (max {content[1]}) | missed ticks {content[2]}', 'ja': '遅延 {content[0]} ms (最大 {content[1]}) | 取りこぼしティック {content[2]}'},
+    'pipeline_stats': {'en': 'Queues {content[0]} | dropped {content[1]}, coalesced {content[2]}, skipped {content[3]}, grab busy {content[4]}', 'ja': 'キュー {content[0]} | 破棄 {content[1]}、統合 {content[2]}、スキップ {content[3]}、取得中 {content[4]}'},
     'image_placeholder': {'en': 'Captured crops will appear here\n(Press "Start" to begin)', 'ja': 'キャプチャした画像はここに表示されます\n(「開始」を押してください)'},
     'split_method_label': {'en': 'Split Method:', 'ja': '分割方法:'},
     'capture_region_button': {'en': 'Capture Tabname', 'ja': 'タブ名キャプチャ'},
@@ -181,13 +149,28 @@ translations = {
     # (MODIFIED) Settings Tab - OCR Preprocessing
     'ocr_settings_header': {'en': 'OCR Preprocessing Settings (Advanced)', 'ja': 'OCR前処理設定 (詳細)'},
     'ocr_scale_label': {'en': '1. Upscale Factor (e.g., 4):', 'ja': '1. アップスケール係数 (例: 4):'},
-    'ocr_scale_help': {'en': 'Larger = slower, but better for tiny text.', 'ja': '大きいほど低速だが、小さい文字に有効。'},
+    'ocr_scale_help': {'en': 'Larger = slower, but better for tiny text. Upper limit in Adaptive mode.', 'ja': '大きいほど低速だが、小さい文字に有効。自動モードでは上限値。'},
+    'ocr_scale_mode_label': {'en': '1a. Upscale Mode:', 'ja': '1a. アップスケールモード:'},
+    'ocr_scale_mode_help': {'en': 'Adaptive = each ROI is scaled so its text reaches the target height (large ROIs are not upscaled).', 'ja': '自動 = 各ROIの文字が目標の高さになるよう拡大 (大きいROIは拡大しない)。'},
+    'ocr_scale_mode_fixed': {'en': 'Fixed factor', 'ja': '固定係数'},
+    'ocr_scale_mode_adaptive': {'en': 'Adaptive (target text height)', 'ja': '自動 (目標の文字の高さ)'},
+    'ocr_target_height_label': {'en': '1b. Target Text Height in px (Adaptive, e.g., 32):', 'ja': '1b. 目標の文字の高さ px (自動, 例: 32):'},
+    'ocr_interpolation_label': {'en': '1c. Upscale Interpolation:', 'ja': '1c. アップスケール補間:'},
+    'ocr_interpolation_help': {'en': 'lanczos4 = sharpest but slowest; linear / area = faster.', 'ja': 'lanczos4 = 最も鮮明だが最も低速。linear / area = 高速。'},
     'ocr_clahe_label': {'en': '2. CLAHE Clip Limit (e.g., 2.0):', 'ja': '2. CLAHEクリップ上限 (例: 2.0):'},
     'ocr_clahe_help': {'en': 'Increases contrast. Lower = less noise (e.g., 1.5). Higher = sharper (e.g., 3.0).', 'ja': 'コントラストを強化。低い = ノイズ減 (例: 1.5)。高い = よりシャープ (例: 3.0)。'},
     'ocr_median_label': {'en': '3. Median Blur ksize (e.g., 3):', 'ja': '3. メディアンブラー ksize (例: 3):'},
     'ocr_median_help': {'en': 'Smooths noise. MUST be an ODD number > 1 (3, 5, 7).', 'ja': 'ノイズを平滑化。1より大きい奇数 (3, 5, 7) である必要があります。'},
     'ocr_opening_label': {'en': '4. Opening Kernel ksize (e.g., 2):', 'ja': '4. オープニングカーネル ksize (例: 2):'},
     'ocr_opening_help': {'en': 'Removes small white dots. Higher = removes more (e.g., 3).', 'ja': '小さい白い点を除去。大きい = より多く除去 (例: 3)。'},
+    'ocr_mode_label': {'en': '5. OCR Mode:', 'ja': '5. OCRモード:'},
+    'ocr_mode_help': {'en': 'Recognize only = skip text detection, read the whole ROI as one line (faster).', 'ja': '認識のみ = テキスト検出を省略し、ROI全体を1行として読む (高速)。'},
+    'ocr_mode_detect': {'en': 'Detect + Recognize', 'ja': '検出 + 認識'},
+    'ocr_mode_recognize': {'en': 'Recognize only', 'ja': '認識のみ'},
+    'ocr_order_label': {'en': '6. Preprocessing Order:', 'ja': '6. 前処理の順序:'},
+    'ocr_order_help': {'en': 'Upscale last = steps 2-4 run at native resolution, only the result is upscaled (faster). Compare both in the OCR Debug tab.', 'ja': '最後に拡大 = 手順2-4を元の解像度で行い、結果のみ拡大 (高速)。OCRデバッグタブで両方を比較できます。'},
+    'ocr_order_upscale_first': {'en': 'Upscale first (original)', 'ja': '先に拡大 (従来)'},
+    'ocr_order_upscale_last': {'en': 'Native resolution, upscale last', 'ja': '元の解像度で処理し、最後に拡大'},
     
     # (NEW) Conditional Morphology Kernel Settings
     'ocr_kernel_settings_header': {'en': 'Morphology Kernel Settings', 'ja': 'モルフォロジー・カーネル設定'},
@@ -216,6 +199,7 @@ translations = {
     'ocr_contrast_label': {'en': 'Conditional Processing', 'ja': '条件付き前処理'},
     'ocr_final_label': {'en': 'Final (Threshold)', 'ja': '最終 (しきい値処理)'},
     'ocr_result_label': {'en': 'OCR Result:', 'ja': 'OCR結果:'},
+    'ocr_compare_header': {'en': 'Preprocessing Order Comparison (Final image, time, OCR result)', 'ja': '前処理の順序の比較 (最終画像、時間、OCR結果)'},
     'ocr_no_data': {'en': 'No data. Run Auto-Capture first.', 'ja': 'データなし。自動キャプチャを実行してください。'},
     
     'status_config_saved': {'en': 'Configuration saved.', 'ja': '設定を保存しました。'},
@@ -233,14 +217,21 @@ translations = {
     'status_captured': {'en': 'Last captured: {content}', 'ja': '最終キャプチャ: {content}'},
     'status_error': {'en': 'Error: {content}', 'ja': 'エラー: {content}'},
     'status_saved': {'en': 'Image saved to gallery: {content}', 'ja': 'ギャラリーに画像を保存しました: {content}'},
+    'status_ocr_loading': {'en': 'Loading EasyOCR model... (Start is enabled when ready)', 'ja': 'EasyOCRモデルを読込中... (準備完了後に開始可能)'},
+    'status_ocr_ready': {'en': 'EasyOCR model loaded. Ready to start.', 'ja': 'EasyOCRモデルを読込完了。開始できます。'},
+    'status_ocr_not_needed': {'en': 'No ROI is read with EasyOCR; the model is not loaded.', 'ja': 'EasyOCRで読み取るROIがないため、モデルは読み込みません。'},
+    'status_ocr_failed': {'en': 'EasyOCR load failed: {content} (press Start to retry)', 'ja': 'EasyOCRの読込に失敗しました: {content} (開始を押すと再試行します)'},
+    'status_source_exhausted': {'en': 'No more frames in the frame source. Stopped.', 'ja': 'フレームソースの終端に達しました。停止しました。'},
     'status_sift_loading': {'en': 'Loading SIFT templates...', 'ja': 'SIFTテンプレートを読込中...'},
+    'status_captured_gate': {'en': 'Last captured: {content[0]} (unchanged {content[1]}/{content[2]} splits, {content[3]} skipped in total)', 'ja': '最終キャプチャ: {content[0]} (変化なし {content[1]}/{content[2]} 分割, 累計スキップ {content[3]})'},
+    'status_sift_progress': {'en': 'Loading SIFT templates... ({content[0]}/{content[1]})', 'ja': 'SIFTテンプレートを読込中... ({content[0]}/{content[1]})'},
     'status_sift_done': {'en': 'SIFT templates loaded ({content[0]} tabnames, {content[1]} statuses).', 'ja': 'SIFTテンプレートを読込完了 (タブ名{content[0]}件、ステータス{content[1]}件)。'},
     'status_roi_saved': {'en': 'ROI Set "{content}" saved.', 'ja': 'ROIセット「{content}」を保存しました。'},
     'status_roi_error': {'en': 'Failed to load/save ROI data.', 'ja': 'ROIデータの読み込み/保存に失敗しました。'},
     'status_data_sending': {'en': 'Sending data to Google Sheet...', 'ja': 'Google Sheetにデータを送信中...'},
     'status_data_sent': {'en': 'Data sent to sheet: {content}', 'ja': 'シートにデータを送信しました: {content}'},
     'error_title': {'en': 'Invalid Input', 'ja': '無効な入力'},
-    'error_message': {'en': 'Please enter a valid number (seconds > 1).\n{content}', 'ja': '有効な数字（1秒以上）を入力してください。\n{content}'},
+    'error_message': {'en': 'Please enter a valid number of seconds greater than 0 (e.g. 0.5 or 5).\n{content}', 'ja': '0より大きい有効な秒数を入力してください (例: 0.5、5)。\n{content}'},
     'error_threshold': {'en': 'Invalid Threshold', 'ja': '無効なしきい値'},
     'error_threshold_text': {'en': 'Threshold values must be integers.', 'ja': 'しきい値は整数である必要があります。'},
     
@@ -256,7 +247,13 @@ translations = {
 
 # --- Global Variables (MODIFIED for 2x2 grid + OCR Settings) ---
 is_running = False      
+templates_ready = False # Set once the Tabname SIFT templates are loaded
+# engine.ocr_state tracks the EasyOCR reader, needed only if some ROI is read with it (see models_ready)
 timer_job_id = None     
+COUNTDOWN_REFRESH_MS = 100 # Progress bar redraw period
+capture_pipeline = None # CapturePipeline while Auto-Capture runs
+capture_scheduler = None # CaptureScheduler that ticks it
+pipeline_errors_shown = 0 # Pipeline error count already shown in the status bar
 current_lang = 'en' 
 auto_cap_photos = [] 
 gallery_preview_photo = None
@@ -284,7 +281,6 @@ status_delete_image_button = None
 status_create_folder_button = None
 status_rename_folder_button = None
 status_delete_folder_button = None
-g_sheet_url = ""
 g_sheet_url_entry = None
 g_sheet_save_button = None
 settings_tab = None
@@ -306,21 +302,13 @@ ocr_contrast_photo = None
 ocr_final_frame_label = None 
 ocr_final_image_label = None 
 ocr_final_photo = None 
+ocr_compare_photos = {} # Preprocessing order -> PhotoImage of its final image
 minimize_on_start_var = None
 minimize_on_start_check = None
 crop_display_frame = None # (NEW) ทำให้เป็น Global เพื่อให้ clear_image_display รู้จัก
 
-# (NEW) OCR Settings Globals
-OCR_SCALE_FACTOR = 4
-OCR_CLAHE_CLIP = 2.0
-OCR_MEDIAN_KSIZE = 3
-OCR_OPENING_KSIZE = 2
-OCR_DILATE_KSIZE = 2  
-OCR_ERODE_KSIZE = 2   
-OCR_DILATE_TARGETS = ["乾溜空気弁A_開度_%", "乾溜空気弁B_開度_%", "乾溜空気弁C_開度_%"] # (MODIFIED Default)
-OCR_ERODE_TARGETS = ["燃焼炉_温度_℃"] # (MODIFIED Default)
-
 ocr_scale_entry = None
+ocr_target_height_entry = None
 ocr_clahe_entry = None
 ocr_median_entry = None
 ocr_opening_entry = None
@@ -417,103 +405,42 @@ class HorizontalScrolledFrame(ttk.Frame):
 
 # --- Config Persistence ---
 # --- (MODIFIED) - เพิ่มการโหลด/บันทึก OCR Settings & TARGETS ---
+def _set_entry_text(entry, value):
+    if entry:
+        entry.delete(0, tk.END)
+        entry.insert(0, str(value))
+
 def load_config():
-    """(MODIFIED) Loads all settings from config.json."""
-    global g_sheet_url, TABNAME_SIFT_THRESHOLD, STATUS_SIFT_THRESHOLD, \
-           OCR_SCALE_FACTOR, OCR_CLAHE_CLIP, OCR_MEDIAN_KSIZE, OCR_OPENING_KSIZE, \
-           OCR_DILATE_KSIZE, OCR_ERODE_KSIZE, OCR_DILATE_TARGETS, OCR_ERODE_TARGETS # (MODIFIED)
+    """Loads all settings from config.json into the engine and the Settings tab."""
     try:
-        if os.path.exists(CONFIG_FILE_PATH):
-            with open(CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # SIFT/Sheet Settings
-                g_sheet_url = data.get("g_sheet_url", "")
-                if g_sheet_url_entry:
-                    g_sheet_url_entry.delete(0, tk.END)
-                    g_sheet_url_entry.insert(0, g_sheet_url)
-                
-                TABNAME_SIFT_THRESHOLD = int(data.get("tabname_sift_threshold", 70))
-                STATUS_SIFT_THRESHOLD = int(data.get("status_sift_threshold", 15))
-                if tabname_threshold_entry:
-                    tabname_threshold_entry.delete(0, tk.END)
-                    tabname_threshold_entry.insert(0, str(TABNAME_SIFT_THRESHOLD))
-                if status_threshold_entry:
-                    status_threshold_entry.delete(0, tk.END)
-                    status_threshold_entry.insert(0, str(STATUS_SIFT_THRESHOLD))
-                
-                # (NEW) OCR Settings
-                OCR_SCALE_FACTOR = int(data.get("ocr_scale_factor", 4))
-                OCR_CLAHE_CLIP = float(data.get("ocr_clahe_clip", 2.0))
-                OCR_MEDIAN_KSIZE = int(data.get("ocr_median_ksize", 3))
-                OCR_OPENING_KSIZE = int(data.get("ocr_opening_ksize", 2))
-                
-                # (NEW) Conditional Morphology Settings (ksize)
-                OCR_DILATE_KSIZE = int(data.get("ocr_dilate_ksize", 2))
-                OCR_ERODE_KSIZE = int(data.get("ocr_erode_ksize", 2))
-                
-                # (NEW) Conditional Morphology Targets
-                default_targets_dilate = ["乾溜空気弁A_開度_%", "乾溜空気弁B_開度_%", "乾溜空気弁C_開度_%"]
-                default_targets_erode = ["燃焼炉_温度_℃"]
-                OCR_DILATE_TARGETS = data.get("ocr_dilate_targets", default_targets_dilate)
-                OCR_ERODE_TARGETS = data.get("ocr_erode_targets", default_targets_erode)
-
-                # Update UI Elements
-                if ocr_scale_entry:
-                    ocr_scale_entry.delete(0, tk.END)
-                    ocr_scale_entry.insert(0, str(OCR_SCALE_FACTOR))
-                if ocr_clahe_entry:
-                    ocr_clahe_entry.delete(0, tk.END)
-                    ocr_clahe_entry.insert(0, str(OCR_CLAHE_CLIP))
-                if ocr_median_entry:
-                    ocr_median_entry.delete(0, tk.END)
-                    ocr_median_entry.insert(0, str(OCR_MEDIAN_KSIZE))
-                if ocr_opening_entry:
-                    ocr_opening_entry.delete(0, tk.END)
-                    ocr_opening_entry.insert(0, str(OCR_OPENING_KSIZE))
-                if ocr_dilate_entry:
-                    ocr_dilate_entry.delete(0, tk.END)
-                    ocr_dilate_entry.insert(0, str(OCR_DILATE_KSIZE))
-                if ocr_erode_entry:
-                    ocr_erode_entry.delete(0, tk.END)
-                    ocr_erode_entry.insert(0, str(OCR_ERODE_KSIZE))
-                
-                # (NEW) Refresh target listboxes if they exist
-                if available_roi_listbox:
-                    refresh_ocr_target_listboxes()
-
-        else:
-            # (NEW) Load defaults into UI if no config file
-            if tabname_threshold_entry: tabname_threshold_entry.insert(0, "70")
-            if status_threshold_entry: status_threshold_entry.insert(0, "15")
-            if g_sheet_url_entry: g_sheet_url_entry.insert(0, "")
-            if ocr_scale_entry: ocr_scale_entry.insert(0, "4")
-            if ocr_clahe_entry: ocr_clahe_entry.insert(0, "2.0")
-            if ocr_median_entry: ocr_median_entry.insert(0, "3")
-            if ocr_opening_entry: ocr_opening_entry.insert(0, "2")
-            if ocr_dilate_entry: ocr_dilate_entry.insert(0, "2")
-            if ocr_erode_entry: ocr_erode_entry.insert(0, "2")
-            
+        engine.set_config(load_config_file(CONFIG_FILE_PATH))
     except Exception as e:
         print(f"Error loading config: {e}")
         # (Reset all to default on error)
-        g_sheet_url = ""
-        TABNAME_SIFT_THRESHOLD = 70
-        STATUS_SIFT_THRESHOLD = 15
-        OCR_SCALE_FACTOR = 4
-        OCR_CLAHE_CLIP = 2.0
-        OCR_MEDIAN_KSIZE = 3
-        OCR_OPENING_KSIZE = 2
-        OCR_DILATE_KSIZE = 2 
-        OCR_ERODE_KSIZE = 2  
-        OCR_DILATE_TARGETS = ["乾溜空気弁A_開度_%", "乾溜空気弁B_開度_%", "乾溜空気弁C_開度_%"]
-        OCR_ERODE_TARGETS = ["燃焼炉_温度_℃"]
+        engine.set_config(default_config())
+
+    config = engine.config
+    _set_entry_text(g_sheet_url_entry, config["g_sheet_url"])
+    _set_entry_text(tabname_threshold_entry, config["tabname_sift_threshold"])
+    _set_entry_text(status_threshold_entry, config["status_sift_threshold"])
+    _set_entry_text(ocr_scale_entry, config["ocr_scale_factor"])
+    ocr_scale_mode_combo.current(OCR_SCALE_MODES.index(config["ocr_scale_mode"]) if config["ocr_scale_mode"] in OCR_SCALE_MODES else 0)
+    _set_entry_text(ocr_target_height_entry, config["ocr_target_glyph_height"])
+    ocr_interpolation_combo.set(config["ocr_interpolation"] if config["ocr_interpolation"] in OCR_INTERPOLATIONS else "lanczos4")
+    _set_entry_text(ocr_clahe_entry, config["ocr_clahe_clip"])
+    _set_entry_text(ocr_median_entry, config["ocr_median_ksize"])
+    _set_entry_text(ocr_opening_entry, config["ocr_opening_ksize"])
+    ocr_mode_combo.current(OCR_MODES.index(config["ocr_mode"]) if config["ocr_mode"] in OCR_MODES else 0)
+    ocr_order_combo.current(OCR_PREPROCESS_ORDERS.index(config["ocr_preprocess_order"]) if config["ocr_preprocess_order"] in OCR_PREPROCESS_ORDERS else 0)
+    _set_entry_text(ocr_dilate_entry, config["ocr_dilate_ksize"])
+    _set_entry_text(ocr_erode_entry, config["ocr_erode_ksize"])
+
+    # Refresh target listboxes if they exist
+    if available_roi_listbox:
+        refresh_ocr_target_listboxes()
 
 def save_config():
-    """(MODIFIED) Saves all settings to config.json with validation."""
-    global g_sheet_url, TABNAME_SIFT_THRESHOLD, STATUS_SIFT_THRESHOLD, \
-           OCR_SCALE_FACTOR, OCR_CLAHE_CLIP, OCR_MEDIAN_KSIZE, OCR_OPENING_KSIZE, \
-           OCR_DILATE_KSIZE, OCR_ERODE_KSIZE, OCR_DILATE_TARGETS, OCR_ERODE_TARGETS # (MODIFIED)
+    """Validates the Settings tab, updates the engine config and saves config.json."""
     try:
         # 1. Validate SIFT thresholds
         try:
@@ -523,23 +450,24 @@ def save_config():
             messagebox.showerror(translations['error_threshold'][current_lang], translations['error_threshold_text'][current_lang])
             return
             
-        # 2. (NEW) Validate OCR Settings
+        # 2. Validate OCR Settings
         try:
             new_scale = int(ocr_scale_entry.get())
+            new_target_height = int(ocr_target_height_entry.get())
             new_clahe = float(ocr_clahe_entry.get())
             new_median = int(ocr_median_entry.get())
             new_opening = int(ocr_opening_entry.get())
             
-            # (NEW) Conditional Morphology validation (ksize)
+            # Conditional Morphology validation (ksize)
             new_dilate = int(ocr_dilate_entry.get())
             new_erode = int(ocr_erode_entry.get())
             
             # Validation rules
             if new_median % 2 == 0 or new_median < 3:
                 raise ValueError("Median ksize must be an odd integer > 1")
-            if new_scale <= 0 or new_clahe <= 0 or new_opening <= 0:
+            if new_scale <= 0 or new_target_height <= 0 or new_clahe <= 0 or new_opening <= 0:
                  raise ValueError("Values must be > 0")
-            # (NEW) Dilate/Erode must be > 0
+            # Dilate/Erode must be > 0
             if new_dilate <= 0 or new_erode <= 0:
                  raise ValueError("Dilate/Erode ksizes must be > 0")
                  
@@ -548,44 +476,32 @@ def save_config():
             messagebox.showerror(translations['error_ocr_settings'][current_lang], translations['error_ocr_text'][current_lang])
             return
 
-        # 3. All valid, update Globals
-        TABNAME_SIFT_THRESHOLD = new_tab_thresh
-        STATUS_SIFT_THRESHOLD = new_stat_thresh
-        OCR_SCALE_FACTOR = new_scale
-        OCR_CLAHE_CLIP = new_clahe
-        OCR_MEDIAN_KSIZE = new_median
-        OCR_OPENING_KSIZE = new_opening
-        
-        # (NEW) Conditional Morphology updates (ksize and targets)
-        OCR_DILATE_KSIZE = new_dilate
-        OCR_ERODE_KSIZE = new_erode
+        # 3. All valid, build the new config
+        config = dict(engine.config)
+        config["g_sheet_url"] = g_sheet_url_entry.get()
+        config["tabname_sift_threshold"] = new_tab_thresh
+        config["status_sift_threshold"] = new_stat_thresh
+        config["ocr_scale_factor"] = new_scale
+        config["ocr_scale_mode"] = OCR_SCALE_MODES[max(ocr_scale_mode_combo.current(), 0)]
+        config["ocr_target_glyph_height"] = new_target_height
+        config["ocr_interpolation"] = ocr_interpolation_combo.get()
+        config["ocr_clahe_clip"] = new_clahe
+        config["ocr_median_ksize"] = new_median
+        config["ocr_opening_ksize"] = new_opening
+        config["ocr_mode"] = OCR_MODES[max(ocr_mode_combo.current(), 0)]
+        config["ocr_preprocess_order"] = OCR_PREPROCESS_ORDERS[max(ocr_order_combo.current(), 0)]
+        config["ocr_dilate_ksize"] = new_dilate
+        config["ocr_erode_ksize"] = new_erode
         
         # Update targets from UI listboxes
         if dilate_target_listbox:
-            OCR_DILATE_TARGETS = list(dilate_target_listbox.get(0, tk.END))
+            config["ocr_dilate_targets"] = list(dilate_target_listbox.get(0, tk.END))
         if erode_target_listbox:
-            OCR_ERODE_TARGETS = list(erode_target_listbox.get(0, tk.END))
+            config["ocr_erode_targets"] = list(erode_target_listbox.get(0, tk.END))
 
-        g_sheet_url = g_sheet_url_entry.get()
-        
-        # 4. Create data dict
-        data = {
-            "g_sheet_url": g_sheet_url,
-            "tabname_sift_threshold": TABNAME_SIFT_THRESHOLD,
-            "status_sift_threshold": STATUS_SIFT_THRESHOLD,
-            "ocr_scale_factor": OCR_SCALE_FACTOR,
-            "ocr_clahe_clip": OCR_CLAHE_CLIP,
-            "ocr_median_ksize": OCR_MEDIAN_KSIZE,
-            "ocr_opening_ksize": OCR_OPENING_KSIZE,
-            "ocr_dilate_ksize": OCR_DILATE_KSIZE, 
-            "ocr_erode_ksize": OCR_ERODE_KSIZE,
-            "ocr_dilate_targets": OCR_DILATE_TARGETS, # (NEW)
-            "ocr_erode_targets": OCR_ERODE_TARGETS    # (NEW)
-        }
-        
-        # 5. Save to file
-        with open(CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # 4. Apply and save to file
+        engine.set_config(config)
+        save_config_file(config, CONFIG_FILE_PATH)
         update_status('status_config_saved')
         
     except Exception as e:
@@ -656,12 +572,30 @@ def set_language(lang_code):
     ocr_settings_header.config(text=translations['ocr_settings_header'][current_lang])
     ocr_scale_label.config(text=translations['ocr_scale_label'][current_lang])
     ocr_scale_help.config(text=translations['ocr_scale_help'][current_lang])
+    ocr_scale_mode_label.config(text=translations['ocr_scale_mode_label'][current_lang])
+    ocr_scale_mode_help.config(text=translations['ocr_scale_mode_help'][current_lang])
+    ocr_scale_mode_index = max(ocr_scale_mode_combo.current(), 0)
+    ocr_scale_mode_combo.config(values=[translations['ocr_scale_mode_' + mode][current_lang] for mode in OCR_SCALE_MODES])
+    ocr_scale_mode_combo.current(ocr_scale_mode_index)
+    ocr_target_height_label.config(text=translations['ocr_target_height_label'][current_lang])
+    ocr_interpolation_label.config(text=translations['ocr_interpolation_label'][current_lang])
+    ocr_interpolation_help.config(text=translations['ocr_interpolation_help'][current_lang])
     ocr_clahe_label.config(text=translations['ocr_clahe_label'][current_lang])
     ocr_clahe_help.config(text=translations['ocr_clahe_help'][current_lang])
     ocr_median_label.config(text=translations['ocr_median_label'][current_lang])
     ocr_median_help.config(text=translations['ocr_median_help'][current_lang])
     ocr_opening_label.config(text=translations['ocr_opening_label'][current_lang])
     ocr_opening_help.config(text=translations['ocr_opening_help'][current_lang])
+    ocr_mode_label.config(text=translations['ocr_mode_label'][current_lang])
+    ocr_mode_help.config(text=translations['ocr_mode_help'][current_lang])
+    ocr_mode_index = max(ocr_mode_combo.current(), 0)
+    ocr_mode_combo.config(values=[translations['ocr_mode_' + mode][current_lang] for mode in OCR_MODES])
+    ocr_mode_combo.current(ocr_mode_index)
+    ocr_order_label.config(text=translations['ocr_order_label'][current_lang])
+    ocr_order_help.config(text=translations['ocr_order_help'][current_lang])
+    ocr_order_index = max(ocr_order_combo.current(), 0)
+    ocr_order_combo.config(values=[translations['ocr_order_' + order][current_lang] for order in OCR_PREPROCESS_ORDERS])
+    ocr_order_combo.current(ocr_order_index)
     
     ocr_kernel_settings_header.config(text=translations['ocr_kernel_settings_header'][current_lang]) # (NEW)
     ocr_dilate_label.config(text=translations['ocr_dilate_label'][current_lang])
@@ -688,6 +622,9 @@ def set_language(lang_code):
     ocr_contrast_frame_label.config(text=translations['ocr_contrast_label'][current_lang]) 
     ocr_final_frame_label.config(text=translations['ocr_final_label'][current_lang]) 
     ocr_result_text_label.config(text=translations['ocr_result_label'][current_lang])
+    ocr_compare_header.config(text=translations['ocr_compare_header'][current_lang])
+    for order, (title_label, _) in ocr_compare_labels.items():
+        title_label.config(text=translations['ocr_order_' + order][current_lang])
     
     if not is_running:
         status_label.config(text=translations['status_idle'][current_lang])
@@ -706,59 +643,63 @@ def toggle_language():
 # --- Helper functions for Target List Management ---
 def refresh_ocr_target_listboxes():
     """Populates the available ROI listbox and selected lists."""
-    global OCR_DILATE_TARGETS, OCR_ERODE_TARGETS
-
     if not available_roi_listbox or not dilate_target_listbox or not erode_target_listbox:
         return
 
+    config = engine.config
+
     # 1. Clear all lists
     available_roi_listbox.delete(0, tk.END)
     dilate_target_listbox.delete(0, tk.END)
     erode_target_listbox.delete(0, tk.END)
 
     # 2. Ensure targets are unique (cannot be in both Dilate and Erode)
-    all_targets = set(OCR_DILATE_TARGETS) | set(OCR_ERODE_TARGETS)
+    all_targets = set(config["ocr_dilate_targets"]) | set(config["ocr_erode_targets"])
     
     # 3. Separate targets from non-targets
     available_rois = [name for name in PREDEFINED_ROI_NAMES if name not in all_targets]
     
-    # Re-filter the global targets based on PREDEFINED list to keep the UI clean
-    OCR_DILATE_TARGETS = sorted([name for name in OCR_DILATE_TARGETS if name in PREDEFINED_ROI_NAMES])
-    OCR_ERODE_TARGETS = sorted([name for name in OCR_ERODE_TARGETS if name in PREDEFINED_ROI_NAMES])
+    # Re-filter the targets based on PREDEFINED list to keep the UI clean (display only; the config is not touched)
+    dilate_targets = sorted([name for name in config["ocr_dilate_targets"] if name in PREDEFINED_ROI_NAMES])
+    erode_targets = sorted([name for name in config["ocr_erode_targets"] if name in PREDEFINED_ROI_NAMES])
 
     # 4. Populate lists
     for name in sorted(available_rois):
         available_roi_listbox.insert(tk.END, name)
-    for name in OCR_DILATE_TARGETS:
+    for name in dilate_targets:
         dilate_target_listbox.insert(tk.END, name)
-    for name in OCR_ERODE_TARGETS:
+    for name in erode_targets:
         erode_target_listbox.insert(tk.END, name)
 
 def _move_roi_item(source_listbox, target_type):
     """Handles moving selected items between listboxes."""
-    global OCR_DILATE_TARGETS, OCR_ERODE_TARGETS
-    
     selected_indices = source_listbox.curselection()
     if not selected_indices: return
 
     selected_items = [source_listbox.get(i) for i in selected_indices]
+    dilate_targets = list(dilate_target_listbox.get(0, tk.END))
+    erode_targets = list(erode_target_listbox.get(0, tk.END))
 
     if source_listbox == available_roi_listbox:
         # Moving FROM available TO target list
         if target_type == 'dilate':
             # Remove from all other lists
-            OCR_ERODE_TARGETS = [name for name in OCR_ERODE_TARGETS if name not in selected_items]
-            OCR_DILATE_TARGETS.extend(selected_items)
+            erode_targets = [name for name in erode_targets if name not in selected_items]
+            dilate_targets = dilate_targets + selected_items
         elif target_type == 'erode':
             # Remove from all other lists
-            OCR_DILATE_TARGETS = [name for name in OCR_DILATE_TARGETS if name not in selected_items]
-            OCR_ERODE_TARGETS.extend(selected_items)
+            dilate_targets = [name for name in dilate_targets if name not in selected_items]
+            erode_targets = erode_targets + selected_items
     else:
         # Moving FROM target list TO available
         if target_type == 'dilate':
-            OCR_DILATE_TARGETS = [name for name in OCR_DILATE_TARGETS if name not in selected_items]
+            dilate_targets = [name for name in dilate_targets if name not in selected_items]
         elif target_type == 'erode':
-            OCR_ERODE_TARGETS = [name for name in OCR_ERODE_TARGETS if name not in selected_items]
+            erode_targets = [name for name in erode_targets if name not in selected_items]
+
+    # Apply through a new config dict: rebuilds the preprocessing plan, and
+    # capture threads never see the live config change under them
+    engine.set_config(dict(engine.config, ocr_dilate_targets=dilate_targets, ocr_erode_targets=erode_targets))
 
     # Re-sort and refresh lists (simple solution)
     refresh_ocr_target_listboxes()
@@ -772,237 +713,131 @@ def add_erode_target():
 def remove_erode_target():
     _move_roi_item(erode_target_listbox, 'erode')
 
-# --- SIFT & OCR Processing Logic ---
-def pil_to_cv2_gray(pil_image):
-    return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2GRAY)
-
-def _load_sift_from_file(filepath):
-    try:
-        img_bytes = np.fromfile(filepath, dtype=np.uint8)
-        img = cv2.imdecode(img_bytes, cv2.IMREAD_GRAYSCALE)
-        if img is None: return (None, None)
-        kp, des = sift.detectAndCompute(img, None)
-        if des is not None and len(kp) > 0:
-            return (kp, des)
-    except Exception as e:
-        print(f"Error loading SIFT from {filepath}: {e}")
-    return (None, None)
-
+# --- SIFT Template Loading ---
 def load_all_sift_templates():
-    """Loads BOTH Tabname and Status templates."""
-    global tabname_sift_cache, status_sift_caches
-    tabname_sift_cache.clear()
-    status_sift_caches.clear()
+    """Loads BOTH Tabname and Status templates into the engine on a worker thread."""
     update_status('status_sift_loading')
-    root.update_idletasks()
-    tabname_count = 0
-    status_count = 0
-    try:
-        for filename in os.listdir(TABNAME_DIR):
-            if filename.endswith('.png'):
-                filepath = os.path.join(TABNAME_DIR, filename)
-                kp, des = _load_sift_from_file(filepath)
-                if kp:
-                    tabname_sift_cache[filename] = (kp, des)
-                    tabname_count += 1
-    except Exception as e:
-        update_status('status_error', f"Tabname SIFT load failed: {e}")
-    try:
-        for tabname_folder in os.listdir(STATUS_TEMPLATE_DIR):
-            tabname_key = tabname_folder + ".png"
-            sub_folder_path = os.path.join(STATUS_TEMPLATE_DIR, tabname_folder)
-            if os.path.isdir(sub_folder_path):
-                status_sift_caches[tabname_key] = {}
-                for status_filename in os.listdir(sub_folder_path):
-                    if status_filename.endswith('.png'):
-                        filepath = os.path.join(sub_folder_path, status_filename)
-                        kp, des = _load_sift_from_file(filepath)
-                        if kp:
-                            status_sift_caches[tabname_key][status_filename] = (kp, des)
-                            status_count += 1
-        update_status('status_sift_done', (tabname_count, status_count))
-    except Exception as e:
-        update_status('status_error', f"Status SIFT load failed: {e}")
+    threading.Thread(target=_load_sift_templates_worker, daemon=True).start()
 
-def _find_best_sift_match(image_to_check_pil, template_cache, match_threshold):
-    if not template_cache: return "None"
+def _load_sift_templates_worker():
     try:
-        img_crop_gray = pil_to_cv2_gray(image_to_check_pil)
-        kp_crop, des_crop = sift.detectAndCompute(img_crop_gray, None)
-        if des_crop is None or len(kp_crop) < match_threshold:
-            return "None"
-        FLANN_INDEX_KDTREE = 1
-        index_params = dict(algorithm=FLANN_INDEX_KDTREE, trees=5)
-        search_params = dict(checks=50)
-        flann = cv2.FlannBasedMatcher(index_params, search_params)
-        best_match_name = "None"
-        max_good_matches = 0
-        for filename, (kp_template, des_template) in template_cache.items():
-            if des_template is None: continue
-            if len(kp_crop) < 2 or len(kp_template) < 2: continue
-            matches = flann.knnMatch(des_crop, des_template, k=2)
-            good_matches = [m for m, n in matches if m.distance < 0.7 * n.distance]
-            if len(good_matches) > match_threshold and len(good_matches) > max_good_matches:
-                max_good_matches = len(good_matches)
-                best_match_name = filename
-        return best_match_name
+        profiler.begin('load_all_sift_templates')
+        counts = engine.load_all_sift_templates(
+            progress_callback=lambda done, total: root.after(0, update_status, 'status_sift_progress', (done, total)),
+            on_tabnames_ready=lambda: root.after(0, on_tabname_templates_ready)
+        )
+        profiler.end('load_all_sift_templates', tabnames=counts[0], statuses=counts[1])
+        root.after(0, update_status, 'status_sift_done', counts)
     except Exception as e:
-        print(f"SIFT match error: {e}")
-        return "None"
-
-def find_best_tabname_match(cropped_pil_image):
-    w, h = cropped_pil_image.size
-    top_half_box = (0, 0, w, h // 2)
-    image_to_check = cropped_pil_image.crop(top_half_box)
-    return _find_best_sift_match(image_to_check, tabname_sift_cache, TABNAME_SIFT_THRESHOLD)
-
-def find_best_status_match(roi_crop_pil, tabname_match_key):
-    if tabname_match_key not in status_sift_caches:
-        return "None"
-    status_cache_for_this_tab = status_sift_caches[tabname_match_key]
-    return _find_best_sift_match(roi_crop_pil, status_cache_for_this_tab, STATUS_SIFT_THRESHOLD)
-
-# --- (MODIFIED) - ใช้ Global Variables จาก Config ---
-def preprocess_for_ocr(pil_image, roi_key, scale_factor=None): # (MODIFIED) added roi_key
-    """
-    (MODIFIED) Uses GLOBAL variables from config for processing.
-    (FIXED) Uses target lists for conditional morphology.
-    """
-    global OCR_DILATE_TARGETS, OCR_ERODE_TARGETS, OCR_DILATE_KSIZE, OCR_ERODE_KSIZE # Use global targets
+        root.after(0, update_status, 'status_error', f"SIFT load failed: {e}")
+    root.after(0, finish_startup_profile)
+
+def on_tabname_templates_ready():
+    """Capture only needs the Tabname templates; Status templates may still be loading."""
+    global templates_ready
+    templates_ready = True
+    update_start_button()
+
+# --- EasyOCR Model Loading ---
+def easyocr_needed():
+    """True if some OCR ROI in rois/ is read with EasyOCR (otherwise torch is never imported)."""
+    return EasyOcrBackend.name in engine.ocr_backends_in_use()
+
+def load_ocr_reader():
+    """Creates the EasyOCR reader (torch import + model load) on a worker thread."""
+    engine.ocr_state = "loading" # Before the thread runs, so Start stays disabled meanwhile
+    update_status('status_ocr_loading')
+    update_start_button()
+    threading.Thread(target=_load_ocr_reader_worker, daemon=True).start()
+
+def load_ocr_reader_if_needed():
+    """Startup: loads EasyOCR only when a ROI uses it; start_capture() loads it later if that changes."""
+    if easyocr_needed():
+        load_ocr_reader()
+    else:
+        profiler.skip('import_torch', 'import_easyocr', 'create_reader')
+        update_status('status_ocr_not_needed')
 
+def _load_ocr_reader_worker():
     try:
-        cv_img = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        
-        # 1. Upscale (Uses global OCR_SCALE_FACTOR)
-        width = int(cv_img.shape[1] * OCR_SCALE_FACTOR)
-        height = int(cv_img.shape[0] * OCR_SCALE_FACTOR)
-        if width == 0 or height == 0: return None
-        upscaled = cv2.resize(cv_img, (width, height), interpolation=cv2.INTER_LANCZOS4)
-        
-        # 2. Grayscale
-        gray = cv2.cvtColor(upscaled, cv2.COLOR_BGR2GRAY)
-        
-        # 3. Contrast Enhancement (CLAHE) (Uses global OCR_CLAHE_CLIP)
-        clahe = cv2.createCLAHE(clipLimit=OCR_CLAHE_CLIP, tileGridSize=(8,8))
-        contrast = clahe.apply(gray) 
-        
-        # 4. Denoise (Uses global OCR_MEDIAN_KSIZE)
-        denoised = cv2.medianBlur(contrast, OCR_MEDIAN_KSIZE) 
-        
-        # --- (FIXED) CONDITIONAL MORPHOLOGY (Use target lists and swapped logic for dark foreground) ---
-        conditional_img = denoised.copy()
-
-        # 4.1. Thickening (Intended Dilate for "開度"): Use ERODE on grayscale if ROI is a DILATE target
-        if roi_key in OCR_DILATE_TARGETS:
-            # Use kernel size from OCR_DILATE_KSIZE (intended for 'thickening')
-            kernel_erode = np.ones((OCR_DILATE_KSIZE, OCR_DILATE_KSIZE), np.uint8) 
-            # Use ERODE operation (thickens dark text)
-            conditional_img = cv2.erode(conditional_img, kernel_erode, iterations=1) 
-
-        # 4.2. Thinning (Intended Erode for "燃焼炉_温度_℃"): Use DILATE on grayscale if ROI is an ERODE target
-        elif roi_key in OCR_ERODE_TARGETS:
-            # Use kernel size from OCR_ERODE_KSIZE (intended for 'thinning')
-            kernel_dilate = np.ones((OCR_ERODE_KSIZE, OCR_ERODE_KSIZE), np.uint8) 
-            # Use DILATE operation (thins dark text)
-            conditional_img = cv2.dilate(conditional_img, kernel_dilate, iterations=1)
-        
-        # --- END CONDITIONAL MORPHOLOGY ---
-        
-        # 5. Global Thresholding (Otsu's Binarization) - Applied to the conditional_img
-        _ , bw_img = cv2.threshold(conditional_img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # 6. Invert
-        bw_img_inverted = cv2.bitwise_not(bw_img)
-        
-        # 7. Post-Process Cleaning (Uses global OCR_OPENING_KSIZE)
-        kernel_opening = np.ones((OCR_OPENING_KSIZE, OCR_OPENING_KSIZE), np.uint8) 
-        final_cleaned = cv2.morphologyEx(bw_img_inverted, cv2.MORPH_OPEN, kernel_opening, iterations=1)
-
-        # Return dict for debug tab
-        return {
-            'raw_pil': pil_image,
-            'gray': gray,
-            'contrast': conditional_img, # Now holds the image after conditional morphology
-            'final': final_cleaned 
-        }
+        print("Loading EasyOCR Reader... (This may take a moment on first run)")
+        if profiler.enabled:
+            # Split the import cost out of Reader creation (create_ocr_reader imports lazily)
+            with profiler.phase('import_torch'):
+                import torch
+            with profiler.phase('import_easyocr'):
+                import easyocr
+        with profiler.phase('create_reader'):
+            engine.create_ocr_reader()
+        print("EasyOCR Reader loaded.")
+        root.after(0, on_ocr_reader_ready)
     except Exception as e:
-        print(f"OCR Preprocessing error: {e}")
-        return None
+        root.after(0, on_ocr_reader_failed, e)
+    root.after(0, finish_startup_profile)
+
+def on_ocr_reader_ready():
+    update_status('status_ocr_ready')
+    update_start_button()
+
+def on_ocr_reader_failed(error):
+    update_status('status_ocr_failed', error)
+    update_start_button() # Start retries the load
+    messagebox.showerror("EasyOCR Error", f"Could not initialize EasyOCR.\n{error}")
+
+def on_startup_idle():
+    """First idle of the Tk loop: the window is up and responsive."""
+    profiler.end('startup_to_idle')
+    finish_startup_profile()
+
+def finish_startup_profile(force=False):
+    """Writes the --profile-startup report once every phase finished (or when forced, e.g. on close)."""
+    if not profiler.enabled or profiler.written:
+        return
+    if not force and not profiler.done() and engine.ocr_state != "failed":
+        return
+    profiler.write_report()
+    if profiler.exit_when_done and not force:
+        root.destroy()
+
+def on_frame_source_exhausted():
+    """A recorded frame source ran out of frames."""
+    if is_running:
+        stop_capture()
+    update_status('status_source_exhausted')
 
-# --- Data Validation Logic ---
-def validate_data(data_results):
+def models_ready():
+    return templates_ready and (engine.ocr_state == "ready" or not easyocr_needed())
+
+def update_start_button():
     """
-    Checks if data is complete (no 'N/A') and valid (follows rules).
-    Returns a status string and color.
+    Start is enabled while idle once the SIFT templates are loaded and the OCR
+    model is not loading. If a ROI needs EasyOCR and it is not loaded (it
+    failed, or the ROIs changed), Start (re)tries the load instead.
     """
-    if not data_results:
-        return "", "black"
-    is_complete = True
-    is_valid = True
-    
-    # --- (START) นี่คือจุดที่แก้ไข ---
-    # เพิ่ม "Corrupt ROI" เข้าไปใน list ของค่าที่ถือว่าไม่สมบูรณ์
-    for key, value in data_results.items():
-        if value in ["N/A", "Error", "Corrupt ROI"]: 
-            is_complete = False
-            break
-    # --- (END) นี่คือจุดที่แก้ไข ---
-            
-    if not is_complete:
-        return translations['validation_incomplete'][current_lang], "red"
-        
-    for key, value in data_results.items():
-        try:
-            num_val = float(value)
-            if ("℃" in key or "ppm" in key) and num_val < 0:
-                is_valid = False
-                break
-            elif ("%" in key) and not (0 <= num_val <= 100):
-                is_valid = False
-                break
-        except (ValueError, TypeError):
-            pass 
-            
-    if not is_valid:
-        return translations['validation_invalid'][current_lang], "orange"
-        
-    return translations['validation_pass'][current_lang], "green"
+    if not is_running:
+        start_button.config(state=tk.NORMAL if templates_ready and engine.ocr_state != "loading" else tk.DISABLED)
 
-# --- Google Sheet Upload Logic ---
-def _send_data_worker(url, payload):
-    """Worker thread to send data without freezing GUI."""
-    try:
-        root.after(0, update_status, 'status_data_sending')
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        root.after(0, update_status, 'status_data_sent', payload.get("sheetName"))
-    except requests.RequestException as e:
-        root.after(0, update_status, 'status_error', f"GSheet: {e}")
-
-def send_data_to_google_sheet(tabname, data_results):
-    """Formats data and starts the sender thread."""
-    if not g_sheet_url:
-        return
-    try:
-        sheetName = tabname.replace(".png", "")
-        headers = ["Timestamp"] + list(data_results.keys())
-        values = [datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")] + list(data_results.values())
-        payload = {
-            "sheetName": sheetName,
-            "headers": headers,
-            "values": values
-        }
-        threading.Thread(target=_send_data_worker, args=(g_sheet_url, payload), daemon=True).start()
-    except Exception as e:
-        root.after(0, update_status, 'status_error', f"GSheet formatting: {e}")
+def update_template_status():
+    """Shows the current template counts after an incremental cache update."""
+    update_status('status_sift_done', engine.template_counts())
+
+def validation_text(validation):
+    """Translates an engine (code, color) validation pair into (text, color)."""
+    code, color = validation
+    if not code:
+        return "", color
+    return translations['validation_' + code][current_lang], color
 
 # --- Auto-Capture Logic ---
 def start_capture():
-    global is_running, timer_job_id
-    if is_running: return
+    global is_running, timer_job_id, capture_pipeline, capture_scheduler, pipeline_errors_shown
+    if is_running or not templates_ready or engine.ocr_state == "loading": return
+    if not models_ready():
+        load_ocr_reader()
+        return
     try:
-        interval = int(interval_entry.get())
-        if interval <= 1: raise ValueError("Time must be > 1")
+        interval = float(interval_entry.get())
+        if interval <= 0: raise ValueError("Time must be > 0")
     except ValueError as e:
         messagebox.showerror(translations['error_title'][current_lang], translations['error_message'][current_lang].format(content=e))
         return
@@ -1010,24 +845,44 @@ def start_capture():
         root.iconify()
         root.update()
         time.sleep(0.5)
+    try:
+        # One capture cycle per tick, run stage by stage on the pipeline threads
+        capture_pipeline = CapturePipeline(
+            engine, frame_source, SPLIT_ORDER[split_method_combo.current()],
+            sink=on_pipeline_frame,
+            on_exhausted=lambda: root.after(0, on_frame_source_exhausted),
+            grab_delay=0.5 if minimize_on_start_var.get() else 0, # Give 0.5s for window to minimize before capture
+        ).start()
+        pipeline_errors_shown = 0
+    except ValueError as e: # Bad pipeline settings in config.json
+        messagebox.showerror(translations['error_title'][current_lang], str(e))
+        return
     is_running = True
-    update_status('status_running', interval)
+    update_status('status_running', f"{interval:g}")
     start_button.config(state=tk.DISABLED)
     stop_button.config(state=tk.NORMAL)
     interval_entry.config(state=tk.DISABLED)
     lang_button.config(state=tk.DISABLED)
     split_method_combo.config(state=tk.DISABLED)
     capture_region_button.config(state=tk.DISABLED)
-    perform_capture_task() 
-    update_countdown(0, interval)
+    # Ticks on absolute monotonic deadlines (the first one right away); tick() never blocks,
+    # the pipeline's overrun policy handles a cycle that is still running
+    capture_scheduler = CaptureScheduler(interval).start_thread(capture_pipeline.tick)
+    update_countdown()
 
 def stop_capture():
-    global is_running, timer_job_id
+    global is_running, timer_job_id, capture_pipeline, capture_scheduler
     if timer_job_id:
         root.after_cancel(timer_job_id) 
         timer_job_id = None
+    if capture_scheduler is not None:
+        capture_scheduler.stop()
+        capture_scheduler = None
+    if capture_pipeline is not None:
+        capture_pipeline.stop() # Waits for a running OCR call; the rest of that cycle is discarded
+        capture_pipeline = None
     is_running = False
-    start_button.config(state=tk.NORMAL)
+    update_start_button()
     stop_button.config(state=tk.DISABLED)
     interval_entry.config(state=tk.NORMAL)
     lang_button.config(state=tk.NORMAL)
@@ -1035,138 +890,42 @@ def stop_capture():
     capture_region_button.config(state=tk.NORMAL)
     progress_bar['value'] = 0
     update_status('status_stopped')
+    update_pipeline_label()
     clear_image_display() 
 
-def update_countdown(current_step, interval):
+def update_countdown():
+    """Redraws the progress bar from the scheduler's clock (display only; the scheduler thread fires the ticks)."""
     global timer_job_id
     if not is_running: return
-    progress = (current_step / interval) * 100
-    progress_bar['value'] = progress
-    if current_step < interval:
-        timer_job_id = root.after(1000, update_countdown, current_step + 1, interval)
-    else:
-        progress_bar['value'] = 0 
-        threading.Thread(target=perform_capture_task, daemon=True).start()
-        timer_job_id = root.after(100, update_countdown, 0, interval) 
-
-def perform_capture_task():
-    """(MODIFIED v0.16) Calls validation and GSheet sender."""
-    global g_latest_sift_results # (NEW)
-    try:
-        # (NEW) If minimizing, wait an extra moment
-        if minimize_on_start_var.get():
-            time.sleep(0.5) # Give 0.5s for window to minimize before capture
-            
-        image = ImageGrab.grab(all_screens=True)
-        selected_index = split_method_combo.current()
-        method_key = SPLIT_ORDER[selected_index]
-        split_function = SPLIT_OPTIONS[method_key]['func']
-        
-        final_results = []
-        
-        if split_function:
-            boxes = split_function(image)
-            for (x, y, w, h) in boxes:
-                box_pil_coords = (x, y, x + w, y + h)
-                crop_pil = image.crop(box_pil_coords)
-                match_name = find_best_tabname_match(crop_pil)
-                data_results = {}
-                if match_name != "None":
-                    data_results = extract_data_from_rois(crop_pil, match_name, (x, y))
-                
-                # (NEW) Validate data
-                status_text, status_color = validate_data(data_results)
-                
-                # (NEW) Send data if valid
-                if match_name != "None" and status_color == "green":
-                    send_data_to_google_sheet(match_name, data_results)
-                    
-                final_results.append((crop_pil, match_name, (x, y), data_results, (status_text, status_color)))
-        else:
-            # --- (THIS IS THE FIX FOR FULL SCREEN) ---
-            crop_pil = image
-            match_name = find_best_tabname_match(crop_pil)
-            data_results = {}
-            if match_name != "None":
-                data_results = extract_data_from_rois(crop_pil, match_name, (0, 0))
-            
-            # (NEW) Validate data
-            status_text, status_color = validate_data(data_results)
-            
-            # (NEW) Send data if valid
-            if match_name != "None" and status_color == "green":
-                send_data_to_google_sheet(match_name, data_results)
-                
-            # (THE FIX) Ensure the 5-tuple is created here too
-            final_results.append((crop_pil, match_name, (0, 0), data_results, (status_text, status_color)))
-
-        g_latest_sift_results = final_results # (NEW) Save for debug tab
-        root.after(0, update_gui_with_sift_results, final_results)
-    except Exception as e:
-        root.after(0, update_status, 'status_error', str(e))
-
-def extract_data_from_rois(pil_image, tabname_match, crop_offset):
-    """SIFT for '運転状況', Upscaled OCR for ALL OTHERS."""
-    data_results = {}
-    crop_offset_x, crop_offset_y = crop_offset
-    roi_filename = tabname_match.replace(".png", "") + ".json"
-    roi_filepath = os.path.join(ROI_DIR, roi_filename)
-    
-    if not os.path.exists(roi_filepath):
-        return {}
-    try:
-        with open(roi_filepath, 'r', encoding='utf-8') as f:
-            rois_to_draw = json.load(f)
-    except Exception as e:
-        print(f"Error loading ROI file {roi_filename}: {e}")
-        return {}
-        
-    # --- (START) นี่คือจุดที่แก้ไข ---
-    for roi_key, roi_value in rois_to_draw.items():
-        try:
-            # 1. ตรวจสอบว่าข้อมูลใน .json ถูกต้องหรือไม่ (ต้องเป็น list หรือ tuple ที่มี 4 ค่า)
-            if not isinstance(roi_value, (list, tuple)) or len(roi_value) != 4:
-                print(f"Skipping corrupted ROI '{roi_key}' in {roi_filename}: Expected 4 coordinates, got {roi_value}")
-                data_results[roi_key] = "Corrupt ROI"
-                continue # ข้าม ROI ที่เสียนี้ไป
-
-            # 2. ถ้าถูกต้อง ก็ unpack ตามปกติ
-            global_x, global_y, global_w, global_h = roi_value
-            # --- (END) นี่คือจุดที่แก้ไข ---
-
-            local_x = global_x - crop_offset_x
-            local_y = global_y - crop_offset_y
-            roi_box_pil = (local_x, local_y, local_x + global_w, local_y + global_h)
-            
-            img_w, img_h = pil_image.size
-            if local_x > img_w or local_y > img_h: continue
-
-            roi_crop_pil = pil_image.crop(roi_box_pil)
-
-            if "運転状況" in roi_key:
-                status_match = find_best_status_match(roi_crop_pil, tabname_match)
-                data_results[roi_key] = status_match.replace(".png", "")
-            else:
-                # (MODIFIED) Pass roi_key to preprocess_for_ocr
-                processing_steps = preprocess_for_ocr(roi_crop_pil, roi_key) 
-                if processing_steps is None:
-                    data_results[roi_key] = "N/A"
-                    continue
-                
-                # ใช้ภาพ 'final' ในการส่งให้ OCR
-                final_processed_img = processing_steps['final'] 
-                
-                ocr_results = ocr_reader.readtext(final_processed_img, allowlist=OCR_ALLOWLIST, detail=0)
-                extracted_text = "".join(ocr_results).strip()
-                if not extracted_text:
-                    data_results[roi_key] = "N/A"
-                else:
-                    data_results[roi_key] = extracted_text
-            
-        except Exception as e:
-            print(f"Error processing ROI {roi_key}: {e}")
-            data_results[roi_key] = "Error"
-    return data_results
+    progress_bar['value'] = capture_scheduler.progress() * 100
+    update_pipeline_label()
+    timer_job_id = root.after(COUNTDOWN_REFRESH_MS, update_countdown)
+
+def update_pipeline_label():
+    """Per-stage queue depths and overrun counters of the running pipeline, plus tick lateness."""
+    if capture_pipeline is None or capture_scheduler is None:
+        pipeline_label.config(text="")
+        return
+    global pipeline_errors_shown
+    stats = capture_pipeline.stats()
+    if stats['errors'] != pipeline_errors_shown: # Stage errors are polled here: stop() joins the OCR stage, which must not wait on Tk
+        pipeline_errors_shown = stats['errors']
+        update_status('status_error', stats['last_error'])
+    depths = " ".join(f"{stage} {stats['queues'][stage]}" for stage in STAGES)
+    pipeline_text = translations['pipeline_stats'][current_lang].format(
+        content=(depths, stats['dropped'], stats['coalesced'], stats['skipped'], stats['missed']))
+    timing = capture_scheduler.stats()
+    scheduler_text = translations['scheduler_stats'][current_lang].format(
+        content=(timing['late_ms']['last'], timing['late_ms']['max'], timing['missed']))
+    pipeline_label.config(text=f"{scheduler_text} | {pipeline_text}")
+
+def on_pipeline_frame(frame, final_results, tick_time):
+    """Pipeline sink (pipeline thread): uploads valid data, stamped with the scheduled tick time, and updates the GUI."""
+    global g_latest_sift_results
+    engine.send_results(final_results, timestamp=datetime.datetime.fromtimestamp(tick_time))
+    g_latest_sift_results = final_results # Save for debug tab
+    root.after(0, update_gui_with_sift_results, final_results)
+    root.after(0, update_pipeline_label)
 
 def clear_image_display():
     global image_placeholder_label, auto_cap_photos, crop_display_frame
@@ -1198,8 +957,12 @@ def update_gui_with_sift_results(sift_results):
 
     num_images = len(sift_results)
     
-    # (THE FIX) This loop now correctly expects 5 items
-    for (pil_image, match_name, (crop_offset_x, crop_offset_y), data_results, (status_text, status_color)) in sift_results:
+    for result in sift_results:
+        split_image = result['image'] # RGB array view into the captured frame (or a RegionFrame)
+        match_name = result['match_name']
+        crop_offset_x, crop_offset_y = result['offset']
+        data_results = result['data']
+        status_text, status_color = validation_text(result['validation'])
         
         # (MODIFIED) - pack ลงใน crop_display_frame
         result_frame = tk.Frame(crop_display_frame, background="#f0f0f0", relief=tk.SUNKEN, borderwidth=1)
@@ -1215,17 +978,13 @@ def update_gui_with_sift_results(sift_results):
         # เพื่อให้ Frame ขยายความสูงตามข้อความได้อิสระ
 
         # --- Populate Image Frame ---
-        display_image = pil_image.copy()
+        # Draw on one copy (never on the view, it shares the frame's pixels)
+        cv_image = split_array(split_image)
         if match_name != "None":
             try:
-                cv_image = cv2.cvtColor(np.array(display_image), cv2.COLOR_RGB2BGR)
-                roi_filename = match_name.replace(".png", "") + ".json"
-                roi_filepath = os.path.join(ROI_DIR, roi_filename)
+                rois_to_draw = engine.load_roi_set(match_name)
                 
-                if os.path.exists(roi_filepath):
-                    with open(roi_filepath, 'r', encoding='utf-8') as f:
-                        rois_to_draw = json.load(f)
-                    
+                if rois_to_draw:
                     for roi_key, [global_x, global_y, global_w, global_h] in rois_to_draw.items():
                         local_x = global_x - crop_offset_x
                         local_y = global_y - crop_offset_y
@@ -1233,14 +992,13 @@ def update_gui_with_sift_results(sift_results):
                         if local_x > img_w or local_y > img_h or (local_x + global_w) < 0 or (local_y + global_h) < 0:
                             continue
                         
-                        color = (0, 0, 255) # Red (OCR)
-                        if "運転状況" in roi_key:
-                            color = (255, 0, 0) # Blue (SIFT)
+                        color = (255, 0, 0) # Red (OCR), RGB order
+                        if STATUS_ROI_MARKER in roi_key:
+                            color = (0, 0, 255) # Blue (SIFT)
                         cv2.rectangle(cv_image, (local_x, local_y), (local_x + global_w, local_y + global_h), color, 2)
-                
-                display_image = Image.fromarray(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB))
             except Exception as e:
                 print(f"Error drawing ROI: {e}")
+        display_image = Image.fromarray(cv_image)
 
         # (MODIFIED) - คำนวณความกว้างแบบคงที่ขึ้นต่ำ เพื่อให้ scroller ทำงาน
         min_img_width = 400
@@ -1275,7 +1033,9 @@ def update_gui_with_sift_results(sift_results):
         result_frame.pack(side=tk.LEFT, fill=tk.NONE, expand=False, padx=2, pady=2) # (MODIFIED) ไม่ expand
 
     now_time = datetime.datetime.now().strftime('%H:%M:%S')
-    update_status('status_captured', now_time)
+    skipped_now = sum(1 for r in sift_results if r.get('skipped'))
+    gate_stats = engine.cache_stats()['change_gate']
+    update_status('status_captured_gate', (now_time, skipped_now, len(sift_results), gate_stats['skipped']))
 
 
 # --- Region Capture & ROI Logic ---
@@ -1283,7 +1043,9 @@ def update_gui_with_sift_results(sift_results):
 class RegionSelector:
     def __init__(self, parent):
         self.parent = parent
-        self.background_image = ImageGrab.grab(all_screens=True)
+        self.background_image = frame_source.preview()
+        if self.background_image is None: # Empty recorded source -> live screen
+            self.background_image = open_frame_source("screen").preview()
         self.selector_window = tk.Toplevel(parent)
         
         # --- (START) นี่คือจุดที่แก้ไข ---
@@ -1379,8 +1141,9 @@ def start_region_capture():
                 if not messagebox.askyesno("Confirm Overwrite", f"File '{filename}' already exists. Overwrite?"):
                     return
             cropped_image.save(save_path)
-            update_status('status_saved', filename)
+            engine.add_tabname_template(filename)
             refresh_gallery_list()
+            update_status('status_saved', filename)
         except Exception as e:
             update_status('status_error', str(e))
 
@@ -1467,7 +1230,7 @@ def start_add_to_roi_set():
 
 # --- Gallery (Tabname) Logic ---
 def refresh_gallery_list():
-    """Refreshes Tabname gallery AND reloads SIFT templates."""
+    """Refreshes the Tabname gallery list (SIFT caches are updated by the caller)."""
     try:
         for item in gallery_image_list.get_children():
             gallery_image_list.delete(item)
@@ -1475,10 +1238,14 @@ def refresh_gallery_list():
         png_files = sorted([f for f in files if f.endswith('.png')], reverse=True)
         for filename in png_files:
             gallery_image_list.insert("", tk.END, text=filename, iid=filename)
-        load_all_sift_templates()
     except Exception as e:
         update_status('status_error', str(e))
 
+def on_gallery_refresh():
+    """'Refresh' button: re-lists the gallery AND resyncs all SIFT templates with disk."""
+    refresh_gallery_list()
+    load_all_sift_templates()
+
 def on_gallery_item_select(event):
     global gallery_preview_photo
     try:
@@ -1528,8 +1295,10 @@ def rename_gallery_item():
                 messagebox.showerror("Error", f"File '{new_filename}' already exists.")
                 return
             os.rename(old_path, new_path)
+            engine.rename_tabname_template(old_filename, new_filename)
             refresh_gallery_list()
             gallery_image_list.selection_set(new_filename)
+            update_template_status()
     except Exception as e:
         update_status('status_error', str(e))
 
@@ -1545,8 +1314,10 @@ def delete_gallery_item():
             return
         filepath = os.path.join(TABNAME_DIR, filename)
         os.remove(filepath)
+        engine.remove_tabname_template(filename)
         refresh_gallery_list()
         on_gallery_item_select(None)
+        update_template_status()
     except Exception as e:
         update_status('status_error', str(e))
 
@@ -1737,9 +1508,10 @@ def rename_status_folder():
                 messagebox.showerror("Error", f"Folder '{new_foldername}' already exists.")
                 return
             os.rename(old_path, new_path)
+            engine.rename_status_folder(old_foldername, new_foldername)
             refresh_status_folders()
             status_folder_list.selection_set(new_foldername)
-            load_all_sift_templates()
+            update_template_status()
     except Exception as e:
         update_status('status_error', str(e))
 
@@ -1756,8 +1528,9 @@ def delete_status_folder():
             return
         folder_path = os.path.join(STATUS_TEMPLATE_DIR, foldername)
         shutil.rmtree(folder_path)
+        engine.remove_status_folder(foldername)
         refresh_status_folders()
-        load_all_sift_templates()
+        update_template_status()
     except Exception as e:
         update_status('status_error', str(e))
 
@@ -1792,9 +1565,10 @@ def start_add_status_image():
                 imagename += '.png'
             save_path = os.path.join(STATUS_TEMPLATE_DIR, foldername, imagename)
             cropped_image.save(save_path)
+            engine.add_status_template(foldername, imagename)
             on_status_folder_select(None)
             status_image_list.selection_set(imagename)
-            load_all_sift_templates() 
+            update_template_status()
         except Exception as e:
             update_status('status_error', str(e))
 
@@ -1823,9 +1597,10 @@ def rename_status_image():
                 messagebox.showerror("Error", f"File '{new_filename}' already exists.")
                 return
             os.rename(old_path, new_path)
+            engine.rename_status_template(foldername, old_filename, new_filename)
             on_status_folder_select(None)
             status_image_list.selection_set(new_filename)
-            load_all_sift_templates()
+            update_template_status()
     except Exception as e:
         update_status('status_error', str(e))
 
@@ -1844,8 +1619,9 @@ def delete_status_image():
             return
         filepath = os.path.join(STATUS_TEMPLATE_DIR, foldername, filename)
         os.remove(filepath)
+        engine.remove_status_template(foldername, filename)
         on_status_folder_select(None)
-        load_all_sift_templates()
+        update_template_status()
     except Exception as e:
         update_status('status_error', str(e))
 
@@ -1868,6 +1644,10 @@ def clear_ocr_debug_tab():
     ocr_contrast_image_label.config(image=None, text="...")
     ocr_final_image_label.config(image=None, text="...")
     ocr_result_label.config(text="")
+    ocr_compare_photos.clear()
+    for order, (title_label, image_label) in ocr_compare_labels.items():
+        title_label.config(text=translations['ocr_order_' + order][current_lang])
+        image_label.config(image=None, text="...")
 
 def refresh_ocr_debug_splits():
     """Loads the latest capture data into the Split dropdown."""
@@ -1876,8 +1656,8 @@ def refresh_ocr_debug_splits():
         return
         
     split_names = []
-    for i, (_, match_name, _, _, _) in enumerate(g_latest_sift_results):
-        split_names.append(f"Split {i+1}: {match_name}")
+    for i, result in enumerate(g_latest_sift_results):
+        split_names.append(f"Split {i+1}: {result['match_name']}")
         
     ocr_split_combo['values'] = split_names
     clear_ocr_debug_tab()
@@ -1892,16 +1672,10 @@ def on_ocr_split_select(event):
             clear_ocr_debug_tab()
             return
             
-        _pil_image, match_name, _offset, data_results, _validation = g_latest_sift_results[selected_index]
-        
-        roi_filename = match_name.replace(".png", "") + ".json"
-        roi_filepath = os.path.join(ROI_DIR, roi_filename)
+        match_name = g_latest_sift_results[selected_index]['match_name']
         
-        roi_keys = []
-        if os.path.exists(roi_filepath):
-            with open(roi_filepath, 'r', encoding='utf-8') as f:
-                roi_file_data = json.load(f)
-                roi_keys = list(roi_file_data.keys())
+        roi_file_data = engine.load_roi_set(match_name)
+        roi_keys = list(roi_file_data.keys()) if roi_file_data else []
         
         ocr_roi_combo['values'] = roi_keys
         if roi_keys:
@@ -1925,17 +1699,16 @@ def on_ocr_roi_select(event):
         if split_index == -1 or not roi_key:
             return
 
-        split_pil_image, match_name, (crop_offset_x, crop_offset_y), _, _ = g_latest_sift_results[split_index]
+        split_result = g_latest_sift_results[split_index]
+        split_image = split_result['image']
+        match_name = split_result['match_name']
+        crop_offset_x, crop_offset_y = split_result['offset']
 
         roi_filename = match_name.replace(".png", "") + ".json"
-        roi_filepath = os.path.join(ROI_DIR, roi_filename)
-        
-        if not os.path.exists(roi_filepath):
+        roi_file_data = engine.load_roi_set(match_name)
+        if roi_file_data is None:
             raise FileNotFoundError(f"{roi_filename} not found")
             
-        with open(roi_filepath, 'r', encoding='utf-8') as f:
-            roi_file_data = json.load(f)
-            
         if roi_key not in roi_file_data:
             raise KeyError(f"{roi_key} not in {roi_filename}")
             
@@ -1947,20 +1720,22 @@ def on_ocr_roi_select(event):
         
         # --- (NEW) Call the preprocessing function ---
         # (MODIFIED) Pass roi_key to preprocess_for_ocr
-        processing_steps = preprocess_for_ocr(split_pil_image.crop(roi_box_pil), roi_key) 
+        roi_image = crop_view(split_image, roi_box_pil)
+        if roi_image is None:
+            raise ValueError(f"{roi_key} lies outside the split")
+        processing_steps = engine.preprocess_for_ocr(roi_image, roi_key) 
         if processing_steps is None:
             raise ValueError("Preprocessing failed")
             
         # Get all intermediate images
-        raw_pil = processing_steps['raw_pil']
+        raw_pil = Image.fromarray(processing_steps['raw'])
         gray_pil = Image.fromarray(processing_steps['gray'])
         contrast_pil = Image.fromarray(processing_steps['contrast'])
         final_pil = Image.fromarray(processing_steps['final'])
         final_for_ocr_cv = processing_steps['final'] # This is sent to OCR
             
         # Get OCR result from the final image
-        ocr_results = ocr_reader.readtext(final_for_ocr_cv, allowlist=OCR_ALLOWLIST, detail=0)
-        extracted_text = "".join(ocr_results).strip()
+        extracted_text = engine.recognize_text(final_for_ocr_cv, processing_steps['params'], roi_key)
         if not extracted_text:
             extracted_text = "N/A"
 
@@ -1987,6 +1762,7 @@ def on_ocr_roi_select(event):
         ocr_final_image_label.image = ocr_final_photo
         
         ocr_result_label.config(text=extracted_text)
+        show_ocr_order_comparison(roi_image, roi_key, img_size)
         
     except Exception as e:
         print(f"Error on ROI select: {e}")
@@ -1996,6 +1772,25 @@ def on_ocr_roi_select(event):
         ocr_contrast_image_label.config(image=None, text="Error")
         ocr_final_image_label.config(image=None, text="Error")
 
+def show_ocr_order_comparison(roi_image, roi_key, img_size):
+    """Runs both preprocessing orders on the ROI and shows their final image, time and OCR text side by side."""
+    ocr_compare_photos.clear()
+    for order, (title_label, image_label) in ocr_compare_labels.items():
+        start = time.perf_counter()
+        processing_steps = engine.preprocess_for_ocr(roi_image, roi_key, order)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        title = translations['ocr_order_' + order][current_lang]
+        if processing_steps is None:
+            title_label.config(text=f"{title}: Error")
+            image_label.config(image=None, text="Error")
+            continue
+        text = engine.recognize_text(processing_steps['final'], processing_steps['params'], roi_key) or "N/A"
+        title_label.config(text=f"{title}: {elapsed_ms:.2f} ms -> {text}")
+        photo = ImageTk.PhotoImage(Image.fromarray(processing_steps['final']).resize(img_size, Image.Resampling.NEAREST))
+        ocr_compare_photos[order] = photo
+        image_label.config(image=photo, text="")
+        image_label.image = photo
+
 # --- General Functions ---
 def update_status(text_key, dynamic_content=""):
     try:
@@ -2005,14 +1800,17 @@ def update_status(text_key, dynamic_content=""):
     except tk.TclError: pass
 
 def on_closing():
+    finish_startup_profile(force=True)
     if is_running:
         if messagebox.askyesno(
             translations['confirm_close_title'][current_lang], 
             translations['confirm_close_message'][current_lang]
         ):
             stop_capture()
+            engine.close()
             root.destroy()
     else:
+        engine.close()
         root.destroy()
 
 # ---- 1. สร้างหน้าต่างหลัก และ Style ----
@@ -2038,6 +1836,7 @@ style.configure('Help.TLabel', font=(font_family, 9), foreground='#555555') # (N
 style.configure('TListbox', font=(font_family, 10))
 
 # ---- 2. สร้าง Notebook (Tabbed Interface) ----
+profiler.begin('build_notebook_tabs')
 notebook = ttk.Notebook(root, padding=10)
 notebook.pack(fill=tk.BOTH, expand=True)
 
@@ -2051,7 +1850,7 @@ interval_label.pack(side=tk.LEFT, padx=(0, 5))
 interval_entry = EntryWithRightClickMenu(settings_frame, width=5, font=(font_family, 10))
 interval_entry.pack(side=tk.LEFT, padx=5)
 interval_entry.insert(0, "5") 
-start_button = ttk.Button(settings_frame, command=start_capture)
+start_button = ttk.Button(settings_frame, command=start_capture, state=tk.DISABLED) # Enabled by update_start_button
 start_button.pack(side=tk.LEFT, padx=5)
 stop_button = ttk.Button(settings_frame, command=stop_capture, state=tk.DISABLED)
 stop_button.pack(side=tk.LEFT, padx=5)
@@ -2075,6 +1874,8 @@ progress_frame.pack(fill=tk.X)
 progress_label = ttk.Label(progress_frame)
 progress_label.pack(side=tk.LEFT, padx=(0, 5))
 progress_bar = ttk.Progressbar(progress_frame, orient=tk.HORIZONTAL, mode='determinate')
+pipeline_label = ttk.Label(progress_frame, style='Help.TLabel')
+pipeline_label.pack(side=tk.RIGHT, padx=(5, 0))
 progress_bar.pack(fill=tk.X, expand=True)
 
 # (MODIFIED) - ใช้ ScrollableFrame เพื่อให้เลื่อนดูข้อมูลแนวตั้งได้ด้วย
@@ -2089,7 +1890,7 @@ gallery_paned_window = ttk.PanedWindow(gallery_tab, orient=tk.HORIZONTAL)
 gallery_paned_window.pack(fill=tk.BOTH, expand=True)
 gallery_list_frame = ttk.Frame(gallery_paned_window, padding=5)
 gallery_paned_window.add(gallery_list_frame, weight=1)
-gallery_refresh_button = ttk.Button(gallery_list_frame, command=refresh_gallery_list)
+gallery_refresh_button = ttk.Button(gallery_list_frame, command=on_gallery_refresh)
 gallery_refresh_button.pack(fill=tk.X, pady=5)
 gallery_image_list = ttk.Treeview(gallery_list_frame, selectmode="browse")
 gallery_image_list.heading("#0", text="")
@@ -2226,6 +2027,26 @@ ocr_scale_entry.pack(anchor=tk.W, pady=2)
 ocr_scale_help = ttk.Label(ocr_settings_frame, style='Help.TLabel', anchor=tk.W)
 ocr_scale_help.pack(fill=tk.X, pady=(0, 10))
 
+# 1a. Scale mode (fixed / adaptive), 1b. target text height, 1c. interpolation
+ocr_scale_mode_label = ttk.Label(ocr_settings_frame, anchor=tk.W)
+ocr_scale_mode_label.pack(fill=tk.X)
+ocr_scale_mode_combo = ttk.Combobox(ocr_settings_frame, state="readonly", width=25)
+ocr_scale_mode_combo.pack(anchor=tk.W, pady=2)
+ocr_scale_mode_help = ttk.Label(ocr_settings_frame, style='Help.TLabel', anchor=tk.W)
+ocr_scale_mode_help.pack(fill=tk.X, pady=(0, 10))
+
+ocr_target_height_label = ttk.Label(ocr_settings_frame, anchor=tk.W)
+ocr_target_height_label.pack(fill=tk.X)
+ocr_target_height_entry = EntryWithRightClickMenu(ocr_settings_frame, width=10)
+ocr_target_height_entry.pack(anchor=tk.W, pady=(2, 10))
+
+ocr_interpolation_label = ttk.Label(ocr_settings_frame, anchor=tk.W)
+ocr_interpolation_label.pack(fill=tk.X)
+ocr_interpolation_combo = ttk.Combobox(ocr_settings_frame, state="readonly", width=25, values=list(OCR_INTERPOLATIONS))
+ocr_interpolation_combo.pack(anchor=tk.W, pady=2)
+ocr_interpolation_help = ttk.Label(ocr_settings_frame, style='Help.TLabel', anchor=tk.W)
+ocr_interpolation_help.pack(fill=tk.X, pady=(0, 10))
+
 # 2. CLAHE
 ocr_clahe_label = ttk.Label(ocr_settings_frame, anchor=tk.W)
 ocr_clahe_label.pack(fill=tk.X)
@@ -2250,6 +2071,22 @@ ocr_opening_entry.pack(anchor=tk.W, pady=2)
 ocr_opening_help = ttk.Label(ocr_settings_frame, style='Help.TLabel', anchor=tk.W)
 ocr_opening_help.pack(fill=tk.X, pady=(0, 10))
 
+# 5. OCR Mode (detect + recognize / recognize only)
+ocr_mode_label = ttk.Label(ocr_settings_frame, anchor=tk.W)
+ocr_mode_label.pack(fill=tk.X)
+ocr_mode_combo = ttk.Combobox(ocr_settings_frame, state="readonly", width=25)
+ocr_mode_combo.pack(anchor=tk.W, pady=2)
+ocr_mode_help = ttk.Label(ocr_settings_frame, style='Help.TLabel', anchor=tk.W)
+ocr_mode_help.pack(fill=tk.X, pady=(0, 10))
+
+# 6. Preprocessing order (upscale first / native resolution, upscale last)
+ocr_order_label = ttk.Label(ocr_settings_frame, anchor=tk.W)
+ocr_order_label.pack(fill=tk.X)
+ocr_order_combo = ttk.Combobox(ocr_settings_frame, state="readonly", width=35)
+ocr_order_combo.pack(anchor=tk.W, pady=2)
+ocr_order_help = ttk.Label(ocr_settings_frame, style='Help.TLabel', anchor=tk.W)
+ocr_order_help.pack(fill=tk.X, pady=(0, 10))
+
 # --- (NEW) OCR Settings Frame (Part 2: Kernel Sizes) ---
 ocr_kernel_settings_header = ttk.Label(ocr_settings_frame, style='Bold.TLabel')
 ocr_kernel_settings_header.pack(anchor=tk.W, pady=(10, 5))
@@ -2406,6 +2243,23 @@ ocr_result_text_label.pack(side=tk.LEFT)
 ocr_result_label = ttk.Label(ocr_result_frame, text="", font=(font_family, 14, 'bold'), foreground="blue")
 ocr_result_label.pack(side=tk.LEFT, padx=10)
 
+# Both preprocessing orders side by side (final image, time, OCR result)
+ocr_compare_header = ttk.Label(ocr_debug_tab, style='Bold.TLabel')
+ocr_compare_header.pack(anchor=tk.W, pady=(10, 0))
+ocr_compare_row_frame = ttk.Frame(ocr_debug_tab)
+ocr_compare_row_frame.pack(fill=tk.BOTH, expand=True, pady=2)
+ocr_compare_labels = {}
+for order in OCR_PREPROCESS_ORDERS:
+    order_frame = ttk.Frame(ocr_compare_row_frame, padding=5)
+    order_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=2)
+    order_title_label = ttk.Label(order_frame, font=(font_family, 11, 'bold'))
+    order_title_label.pack(pady=5)
+    order_image_label = tk.Label(order_frame, background="#000000", relief=tk.SUNKEN, borderwidth=1)
+    order_image_label.pack(fill=tk.BOTH, expand=True)
+    ocr_compare_labels[order] = (order_title_label, order_image_label)
+
+profiler.end('build_notebook_tabs')
+
 # ---- 9. สร้างแถบสถานะ (ล่างสุด) ----
 status_label = ttk.Label(root, relief=tk.SUNKEN, anchor=tk.W, padding=5, font=(font_family, 9))
 status_label.pack(side=tk.BOTTOM, fill=tk.X)
@@ -2414,10 +2268,14 @@ status_label.pack(side=tk.BOTTOM, fill=tk.X)
 root.protocol("WM_DELETE_WINDOW", on_closing) 
 set_language(current_lang)
 clear_image_display() 
-refresh_gallery_list() # This loads ALL SIFT caches
+refresh_gallery_list()
+with profiler.phase('load_config'):
+    load_config() # Load all saved settings (before the loaders read sift_load_workers / the OCR pool settings)
+load_all_sift_templates() # This loads ALL SIFT caches (worker thread)
+load_ocr_reader_if_needed() # EasyOCR model (worker thread), only if some ROI is read with it
 refresh_roi_file_list()
 refresh_status_folders()
 on_gallery_item_select(None)
 on_roi_set_select(None)
-load_config() # Load all saved settings
+root.after_idle(on_startup_idle)
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Frame transfer benchmark: shared-memory ring (frame_ring.py) vs. pickling.
+
+Sends frames from this process to one worker process, which touches every
+pixel row it receives (a column sum) and acknowledges it, e.g.:
+
+    python bench_frame_ring.py --frames 200 --size 3840x1080
+    python bench_frame_ring.py --frames 200 shots/*.png
+
+Transports:
+    pickle  - each frame array is pickled through a multiprocessing Pipe
+    ring    - each frame is copied into a FrameRing slot once; only the
+              (slot, sequence) handle goes through the Pipe, the worker reads
+              a zero-copy view and releases the slot
+
+Reports frames/s, MB/s, the bytes sent through the pipe per frame and, where
+the resource module exists (not on Windows), the worker's peak RSS. Prints
+one JSON summary.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from frame_ring import FrameRing
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Compare shared-memory and pickled frame transfer.")
+    parser.add_argument('images', nargs='*', help="Screenshot files to send (default: a synthetic frame).")
+    parser.add_argument('--frames', type=int, default=200, help="Frames sent per transport (default: 200).")
+    parser.add_argument('--size', default="3840x1080", help="Synthetic frame size WxH (default: 3840x1080, two monitors).")
+    parser.add_argument('--slots', type=int, default=4, help="Ring slots, i.e. frames in flight (default: 4).")
+    return parser
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB on Linux, bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+def worker(conn, ring_args):
+    ring = FrameRing(*ring_args) if ring_args is not None else None
+    checksum = 0
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        if ring is None:
+            checksum += int(message.sum(axis=0, dtype=np.uint64)[0, 0])
+        else:
+            frame = ring.view(message)
+            checksum += int(frame.sum(axis=0, dtype=np.uint64)[0, 0])
+            del frame
+            ring.release(message)
+        conn.send(True)
+    conn.send({'peak_rss_mb': peak_rss_mb(), 'checksum': checksum})
+    if ring is not None:
+        ring.close()
+
+def run_transport(name, frames, count, slots):
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    max_shape = tuple(int(v) for v in np.max([f.shape for f in frames], axis=0)) # Per dimension
+    ring = FrameRing(slots, max_shape) if name == "ring" else None
+    process = ctx.Process(target=worker, args=(child_conn, ring.attach_args() if ring else None))
+    process.start()
+    in_flight = 0
+    pipe_bytes = 0
+    start = time.perf_counter()
+    for i in range(count):
+        frame = frames[i % len(frames)]
+        if ring is None:
+            message = frame
+        else:
+            while (message := ring.write(frame)) is None: # Every slot in use: wait for an ack
+                parent_conn.recv()
+                in_flight -= 1
+        if i == 0:
+            pipe_bytes = len(multiprocessing.reduction.ForkingPickler.dumps(message))
+        parent_conn.send(message)
+        in_flight += 1
+        while in_flight >= slots: # Same number of frames in flight for both transports
+            parent_conn.recv()
+            in_flight -= 1
+    for _ in range(in_flight):
+        parent_conn.recv()
+    elapsed = time.perf_counter() - start
+    parent_conn.send(None)
+    stats = parent_conn.recv()
+    process.join()
+    frame_mb = sum(frames[i % len(frames)].nbytes for i in range(count)) / count / (1 << 20) # Mean of the frames sent
+    summary = {
+        'frames_per_s': round(count / elapsed, 1),
+        'mb_per_s': round(count * frame_mb / elapsed, 1),
+        'pipe_bytes_per_frame': pipe_bytes,
+        'worker_peak_rss_mb': stats['peak_rss_mb'],
+    }
+    if ring is not None:
+        summary['shared_mb'] = round(ring.nbytes / (1 << 20), 1)
+        ring.close()
+    return summary
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.images:
+        frames = [np.asarray(Image.open(path).convert('RGB')) for path in args.images]
+    else:
+        width, height = (int(v) for v in args.size.lower().split("x"))
+        frames = [np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)]
+    report = {
+        'frame_shapes': sorted({tuple(f.shape) for f in frames}),
+        'frame_mb': round(sum(f.nbytes for f in frames) / len(frames) / (1 << 20), 2), # Mean
+        'frames': args.frames,
+        'transports': {name: run_transport(name, frames, args.frames, args.slots) for name in ("pickle", "ring")},
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+OCR latency benchmark on stored screenshots.
+
+Collects the OCR ROIs of each frame exactly like the live pipeline does and
+times only the recognition step, once per mode, e.g.:
+
+    python bench_ocr.py --split P2_25x4 --repeat 5 shots/*.png
+    python bench_ocr.py --split P2_25x4 --labels labels.json shots/*.png
+
+Modes:
+    per_roi            - one readtext() call per ROI (detection + recognition)
+    batched            - one readtext_batched() call per frame
+    recognize_per_roi  - recognition only, one recognize() call per ROI
+    recognize_batched  - recognition only, all ROIs of a frame in one recognize() call
+    glyphs             - glyph template backend (model from train_glyphs.py, no torch)
+
+Reuse caches (change gate, ROI memo, OCR result cache) are switched off so
+every repeat really runs the model. Every mode reports its agreement with the
+first one; with --labels ({"<frame file name>": {"<roi_key>": "<text>"}}) the
+accuracy against those labels is reported too. Prints one JSON summary.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from PIL import Image
+
+from capture_engine import CaptureEngine, BASE_PATH, CONFIG_FILE_PATH, SPLIT_ORDER, frame_arrays, load_config_file, split_views
+
+MODES = {
+    'per_roi': {"ocr_backend": "easyocr", "ocr_mode": "detect", "ocr_batch_enabled": False},
+    'batched': {"ocr_backend": "easyocr", "ocr_mode": "detect", "ocr_batch_enabled": True},
+    'recognize_per_roi': {"ocr_backend": "easyocr", "ocr_mode": "recognize", "ocr_batch_enabled": False},
+    'recognize_batched': {"ocr_backend": "easyocr", "ocr_mode": "recognize", "ocr_batch_enabled": True},
+    'glyphs': {"ocr_backend": "glyphs"},
+}
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Compare OCR modes on stored screenshots.")
+    parser.add_argument('frames', nargs='+', help="Screenshot image files (PNG).")
+    parser.add_argument('--split', default="NONE", choices=SPLIT_ORDER, help="Split method (default: NONE).")
+    parser.add_argument('--config', default=CONFIG_FILE_PATH, help="Path to config.json.")
+    parser.add_argument('--base-path', default=BASE_PATH, help="Folder containing pictures/, rois/ and model/.")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per frame and mode (default: 3).")
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES), help="Modes to compare.")
+    parser.add_argument('--labels', help="JSON file with the expected text per frame file name and ROI key.")
+    return parser
+
+def collect_frame_jobs(engine, frame, method_key):
+    """OCR jobs (preprocessed ROI images) of every split of one frame."""
+    ocr_jobs = []
+    rgb, gray = frame_arrays(frame)
+    for split_key, offset, split_rgb, split_gray in split_views(rgb, gray, method_key):
+        engine._begin_split(split_rgb, split_gray, offset, split_key, ocr_jobs)
+    return ocr_jobs
+
+def time_mode(engine, frame_jobs, overrides, repeat):
+    """Returns (summary, texts) where texts[frame][job] is the text read in this mode."""
+    engine.set_config(dict(engine.config, **overrides))
+    timings = []
+    texts = []
+    for jobs in frame_jobs:
+        items = [(job['final'], job['params']) for job in jobs]
+        if not items:
+            texts.append([])
+            continue
+        engine.recognize_texts(items) # Warm-up (first call pays lazy model setup)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            frame_texts = engine.recognize_texts(items)
+            timings.append(time.perf_counter() - start)
+        texts.append(frame_texts)
+    rois = sum(len(jobs) for jobs in frame_jobs)
+    return {
+        'frames': len(timings) // max(repeat, 1),
+        'rois': rois,
+        'mean_ms_per_frame': round(statistics.mean(timings) * 1000, 2) if timings else None,
+        'median_ms_per_frame': round(statistics.median(timings) * 1000, 2) if timings else None,
+        'mean_ms_per_roi': round(sum(timings) / repeat / rois * 1000, 3) if rois else None,
+    }, texts
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    config = load_config_file(args.config)
+    config.update({"change_gate_enabled": False, "roi_memo_enabled": False, "ocr_cache_size": 0,
+                   "ocr_backend_by_roi": {}})
+    engine = CaptureEngine(config, base_path=args.base_path)
+    engine.load_all_sift_templates()
+    if any(MODES[mode]["ocr_backend"] == "easyocr" for mode in args.modes):
+        engine.create_ocr_reader()
+
+    frame_jobs = [collect_frame_jobs(engine, Image.open(path).convert('RGB'), args.split) for path in args.frames]
+    labels = {}
+    if args.labels:
+        with open(args.labels, 'r', encoding='utf-8') as f:
+            labels = json.load(f)
+
+    report = {'split': args.split, 'repeat': args.repeat, 'modes': {}}
+    reference = None
+    for mode in args.modes:
+        summary, texts = time_mode(engine, frame_jobs, MODES[mode], args.repeat)
+        if reference is None:
+            reference = texts
+        else:
+            # Agreement with the first mode, reading by reading
+            pairs = [(a, b) for ref, got in zip(reference, texts) for a, b in zip(ref, got)]
+            summary['agreement'] = round(sum(a == b for a, b in pairs) / len(pairs), 4) if pairs else None
+        if labels:
+            checked = [(text, labels[os.path.basename(path)][job['roi_key']])
+                       for path, jobs, frame_texts in zip(args.frames, frame_jobs, texts)
+                       for job, text in zip(jobs, frame_texts)
+                       if job['roi_key'] in labels.get(os.path.basename(path), {})]
+            summary['labelled'] = len(checked)
+            summary['accuracy'] = round(sum(text == expected for text, expected in checked) / len(checked), 4) if checked else None
+        report['modes'][mode] = summary
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
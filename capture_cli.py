@@ -0,0 +1,105 @@
+"""
+Headless runner for the capture pipeline.
+
+Feeds screenshots through CaptureEngine without a display, e.g.:
+
+    python capture_cli.py --split P2_25x4 shots/*.png
+    python capture_cli.py --split P2_25x4 shots/            (folder of PNGs)
+    python capture_cli.py --split P2_25x4 session.zip       (recorded session)
+    python capture_cli.py --split P4_50_50 --upload shot.png
+    python capture_cli.py --split P2_25x4 --max-frames 20 --interval 5 --record session.zip screen
+
+Every frame goes through the same capture cycle as the GUI (region grabs
+while the tabs are known). Prints one JSON line per frame (split results +
+timing); --record writes the grabbed frames to a session file. With
+--interval, frames are grabbed on a fixed cadence (absolute deadlines, see
+capture_scheduler.py) and each line also reports how late its tick was.
+"""
+import argparse
+import datetime
+import json
+import sys
+import time
+
+from capture_engine import CaptureEngine, BASE_PATH, CONFIG_FILE_PATH, SPLIT_ORDER, load_config_file
+from capture_scheduler import CaptureScheduler
+from ocr_backends import EasyOcrBackend
+from frame_sources import SessionRecorder, open_frame_source
+
+
+def result_to_json(result):
+    """Drops the image from an engine result so it can be serialized."""
+    return {
+        'match_name': result['match_name'],
+        'offset': list(result['offset']),
+        'data': result['data'],
+        'validation': result['validation'][0],
+        'skipped': result.get('skipped', False),
+    }
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Run the Auto-Capture pipeline on stored screenshots.")
+    parser.add_argument('frames', nargs='+', help="PNG files, a PNG folder, a session .zip, or 'screen'.")
+    parser.add_argument('--split', default="NONE", choices=SPLIT_ORDER, help="Split method (default: NONE).")
+    parser.add_argument('--config', default=CONFIG_FILE_PATH, help="Path to config.json.")
+    parser.add_argument('--base-path', default=BASE_PATH, help="Folder containing pictures/, rois/ and model/.")
+    parser.add_argument('--upload', action='store_true', help="Send valid results to the Google Sheet URL in the config.")
+    parser.add_argument('--max-frames', type=int, default=0, help="Stop after this many frames (0 = until the source ends).")
+    parser.add_argument('--interval', type=float, default=0.0, help="Seconds from one frame start to the next, fixed cadence (default: as fast as possible).")
+    parser.add_argument('--record', help="Also write the grabbed frames to this session file (.zip).")
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    engine = CaptureEngine(load_config_file(args.config), base_path=args.base_path)
+    tabname_count, status_count = engine.load_all_sift_templates()
+    print(f"SIFT templates loaded ({tabname_count} tabnames, {status_count} statuses).", file=sys.stderr)
+    if EasyOcrBackend.name in engine.ocr_backends_in_use():
+        engine.create_ocr_reader()
+    else:
+        print("No ROI is read with EasyOCR; the model is not loaded.", file=sys.stderr)
+
+    source = open_frame_source(args.frames)
+    recorder = None
+    if args.record:
+        recorder = SessionRecorder(args.record)
+        engine.config["region_capture_enabled"] = False # Recordings keep whole frames
+    scheduler = CaptureScheduler(args.interval).start() if args.interval > 0 else None
+    frame_count = 0
+    try:
+        while not args.max_frames or frame_count < args.max_frames:
+            timestamp = None # Sheet rows: the scheduled tick time, so they keep the cadence
+            if scheduler is not None:
+                timestamp = datetime.datetime.fromtimestamp(scheduler.wait())
+            start = time.perf_counter()
+            cycle = engine.capture_and_process(source, args.split)
+            elapsed = time.perf_counter() - start
+            if cycle is None:
+                break
+            frame, results = cycle
+            frame_count += 1
+            if recorder is not None:
+                recorder.add(frame)
+            if args.upload:
+                engine.send_results(results, background=False, timestamp=timestamp)
+            line = {
+                'frame': source.label,
+                'seconds': round(elapsed, 4),
+                'splits': [result_to_json(r) for r in results],
+            }
+            if scheduler is not None:
+                line['late_ms'] = scheduler.stats()['late_ms']['last']
+            print(json.dumps(line, ensure_ascii=False))
+    finally:
+        source.close()
+        if recorder is not None:
+            recorder.close()
+        engine.close()
+    print(f"Cache stats: {json.dumps(engine.cache_stats())}", file=sys.stderr)
+    if scheduler is not None:
+        print(f"Scheduler stats: {json.dumps(scheduler.stats())}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
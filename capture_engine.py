@@ -0,0 +1,1145 @@
+"""
+Headless capture engine.
+
+Everything the Auto-Capture pipeline needs (split -> SIFT tab match -> ROI
+OCR/status match -> validation -> Google Sheet upload) lives here, with no
+Tkinter dependency. app_capture.py (GUI) and capture_cli.py (stored frames)
+both drive a CaptureEngine instance.
+"""
+import copy
+import datetime
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import cv2
+import requests # For sending data
+
+from sift_templates import SiftDiskCache, SiftTemplateIndex
+from ocr_cache import OcrResultCache
+from ocr_backends import GLYPH_MODEL_FILENAME, EasyOcrBackend, GlyphTemplateBackend
+from ocr_preprocess import PreprocessPlan
+from ocr_pool import OcrProcessPool
+from screen_capture import RegionFrame, merge_rects
+from frame_sources import cut_regions
+from change_detection import RoiResultMemo, SplitChangeGate, TabMatchMemo, change_thumbnail, content_digest, dhash
+
+# --- Base Path Logic ---
+def get_base_path():
+    """Gets the base path, whether running as .py or frozen .exe"""
+    if getattr(sys, 'frozen', False):
+        # We are running in a bundle (e.g., PyInstaller)
+        base_path = os.path.dirname(sys.executable)
+    else:
+        # We are running in a normal Python environment
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return base_path
+
+# --- Global Paths & Constants ---
+BASE_PATH = get_base_path()
+MODEL_STORAGE_DIR = os.path.join(BASE_PATH, 'model') # Path for EasyOCR models
+TABNAME_DIR = os.path.join(BASE_PATH, "pictures", "tabname")
+STATUS_TEMPLATE_DIR = os.path.join(BASE_PATH, "pictures", "status")
+ROI_DIR = os.path.join(BASE_PATH, "rois")
+CONFIG_FILE_PATH = os.path.join(BASE_PATH, "config.json")
+SIFT_CACHE_FILENAME = os.path.join("cache", "sift_templates.pkl")
+
+def ensure_data_dirs():
+    """Creates all folders the app reads from / writes to."""
+    os.makedirs(MODEL_STORAGE_DIR, exist_ok=True)
+    os.makedirs(TABNAME_DIR, exist_ok=True)
+    os.makedirs(STATUS_TEMPLATE_DIR, exist_ok=True)
+    os.makedirs(ROI_DIR, exist_ok=True)
+
+OCR_ALLOWLIST = '-.0123456789'
+# "detect": readtext() runs CRAFT text detection first; "recognize": the whole
+# ROI is one text line and goes straight to the recognizer (ROIs are tight boxes)
+OCR_MODES = ("detect", "recognize")
+STATUS_ROI_MARKER = "運転状況" # ROIs with this in their name use SIFT status matching, not OCR
+INCOMPLETE_VALUES = ["N/A", "Error", "Corrupt ROI"]
+
+# --- Config Defaults ---
+DEFAULT_CONFIG = {
+    "g_sheet_url": "",
+    "tabname_sift_threshold": 70,
+    "status_sift_threshold": 15,
+    "ocr_scale_factor": 4, # Fixed upscale factor; the upper limit in adaptive mode
+    "ocr_scale_mode": "fixed", # "fixed" or "adaptive" (see ocr_preprocess.py)
+    "ocr_target_glyph_height": 32, # Adaptive mode: text line height (px) to upscale to
+    "ocr_interpolation": "lanczos4", # Upscale interpolation: one of ocr_preprocess.OCR_INTERPOLATIONS
+    "ocr_preprocess_order": "upscale_first", # "upscale_first" or "upscale_last" (clean at native resolution)
+    "ocr_clahe_clip": 2.0,
+    "ocr_median_ksize": 3,
+    "ocr_opening_ksize": 2,
+    "ocr_dilate_ksize": 2,
+    "ocr_erode_ksize": 2,
+    "ocr_dilate_targets": ["乾溜空気弁A_開度_%", "乾溜空気弁B_開度_%", "乾溜空気弁C_開度_%"],
+    "ocr_erode_targets": ["燃焼炉_温度_℃"],
+    "sift_load_workers": 0, # 0 = auto (cpu_count + 4, max 32)
+    "split_workers": 4, # Splits of a frame processed concurrently (1 = one after another)
+    "pipeline_queue_size": 1, # Auto-Capture: frames waiting in front of each pipeline stage
+    "pipeline_overrun_policy": "coalesce", # Capture outruns processing: "drop", "coalesce" or "skip_next"
+    "tab_memo_enabled": True, # Reuse a split's last tab match while its header hash is unchanged
+    "tab_hash_size": 16, # dHash grid (16 -> 256 bits)
+    "tab_hash_max_distance": 12, # Max differing bits to count as "same screen"
+    "tab_memo_max_hits": 100, # Re-verify with SIFT after this many reuses (0 = never)
+    "change_gate_enabled": True, # Reuse a split's previous result when its pixels did not move
+    "change_gate_scale": 0.25, # Downsample factor of the thumbnail that is compared
+    "change_gate_pixel_threshold": 12, # Gray-level difference that counts as a changed pixel
+    "change_gate_max_changed_pixels": 0, # More changed thumbnail pixels than this -> reprocess
+    "change_gate_max_skips": 30, # Force a full run after this many reuses (0 = never)
+    "change_gate_upload_unchanged": False, # Also re-send reused (unchanged) results to the sheet
+    "roi_memo_enabled": True, # Reuse a ROI's OCR/status result while its pixels are identical
+    "ocr_cache_size": 512, # OCR results kept per preprocessed image (0 = disabled)
+    "ocr_cache_eviction": "lru", # "lru" or "fifo"
+    "ocr_batch_enabled": True, # OCR every ROI of a cycle in one readtext_batched() call
+    "ocr_batch_size": 16, # Recognizer batch size used for that call
+    "ocr_mode": "detect", # One of OCR_MODES
+    "ocr_process_pool_size": 0, # EasyOCR worker processes, one model each (0 = read in this process)
+    "ocr_torch_threads": 1, # torch threads per OCR worker process
+    "ocr_backend": "easyocr", # Default OCR backend: "easyocr" or "glyphs" (see ocr_backends.py)
+    "ocr_backend_by_roi": {}, # Per-ROI override, e.g. {"燃焼炉_温度_℃": "glyphs"}
+    "glyph_max_distance": 0.25, # Glyph backend: worst allowed per-glyph template distance
+    "region_capture_enabled": True, # Grab only split headers + ROI boxes while every tab is known
+    "region_capture_margin": 4, # Extra pixels grabbed around each ROI box
+}
+
+def default_config():
+    """Returns a fresh (deep) copy of DEFAULT_CONFIG."""
+    return copy.deepcopy(DEFAULT_CONFIG)
+
+def load_config_file(path=CONFIG_FILE_PATH):
+    """Reads config.json on top of the defaults. Missing file -> defaults."""
+    config = default_config()
+    if not os.path.exists(path):
+        return config
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for key, default_value in DEFAULT_CONFIG.items():
+        if key not in data:
+            continue
+        if isinstance(default_value, (list, dict)):
+            config[key] = data[key]
+        else:
+            config[key] = type(default_value)(data[key])
+    return config
+
+def save_config_file(config, path=CONFIG_FILE_PATH):
+    """Writes the config dict to config.json."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=4, ensure_ascii=False)
+
+# --- Split Functions ---
+def split_pattern_1(pil_image):
+    w, h = pil_image.size
+    split_x_1 = (w * 34) // 100; split_x_2 = (w * 68) // 100; split_x_3 = (w * 84) // 100
+    return [(0, 0, split_x_1, h), (split_x_1, 0, split_x_2 - split_x_1, h), (split_x_2, 0, split_x_3 - split_x_2, h), (split_x_3, 0, w - split_x_3, h)]
+def split_pattern_2(pil_image):
+    w, h = pil_image.size
+    split_x_1 = w // 4; split_x_2 = w // 2; split_x_3 = (w * 3) // 4
+    return [(0, 0, split_x_1, h), (split_x_1, 0, split_x_2 - split_x_1, h), (split_x_2, 0, split_x_3 - split_x_2, h), (split_x_3, 0, w - split_x_3, h)]
+def split_pattern_3(pil_image):
+    w, h = pil_image.size
+    split_x_1 = w // 2; split_x_2 = split_x_1 // 2
+    return [(0, 0, split_x_2, h), (split_x_2, 0, split_x_1 - split_x_2, h), (split_x_1, 0, w - split_x_1, h)]
+def split_pattern_4(pil_image):
+    w, h = pil_image.size
+    split_x_1 = w // 2
+    return [(0, 0, split_x_1, h), (split_x_1, 0, w - split_x_1, h)]
+# --- End Split Functions ---
+
+SPLIT_OPTIONS = {
+    "NONE": {'en': 'None (Full Image)', 'ja': 'なし (フルイメージ)', 'func': None},
+    "P1_34_34_16_16": {'en': 'Pattern 1 (34/34/16/16)', 'ja': 'パターン1 (34/34/16/16)', 'func': split_pattern_1},
+    "P2_25x4": {'en': 'Pattern 2 (25% x 4)', 'ja': 'パターン2 (25% x 4)', 'func': split_pattern_2},
+    "P3_25_25_50": {'en': 'Pattern 3 (25/25/50)', 'ja': 'パターン3 (25/25/50)', 'func': split_pattern_3},
+    "P4_50_50": {'en': 'Pattern 4 (50 / 50)', 'ja': 'パターン4 (50 / 50)', 'func': split_pattern_4}
+}
+SPLIT_ORDER = ["NONE", "P1_34_34_16_16", "P2_25x4", "P3_25_25_50", "P4_50_50"]
+
+def get_split_boxes(pil_image, method_key):
+    """Returns the (x, y, w, h) boxes for a split method ('NONE' = whole frame)."""
+    split_function = SPLIT_OPTIONS[method_key]['func']
+    if split_function is None:
+        w, h = pil_image.size
+        return [(0, 0, w, h)]
+    return split_function(pil_image)
+
+def pil_to_cv2_gray(pil_image):
+    return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2GRAY)
+
+def frame_arrays(image):
+    """
+    (rgb, gray) arrays of a frame (PIL image or RGB array): the only full-frame
+    conversions of a cycle. A RegionFrame gives (rgb, gray) RegionFrames; only
+    its patches are converted.
+    """
+    if isinstance(image, RegionFrame):
+        return image, image.map(lambda patch: cv2.cvtColor(patch, cv2.COLOR_RGB2GRAY), image.shape[:2])
+    rgb = np.asarray(image)
+    return rgb, cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+
+def split_views(rgb, gray, method_key):
+    """Yields (split_key, offset, rgb, gray) per split; the split images are slice views of the frame arrays."""
+    frame_h, frame_w = gray.shape[:2]
+    for (x, y, w, h) in get_split_boxes(SimpleNamespace(size=(frame_w, frame_h)), method_key):
+        if isinstance(gray, RegionFrame):
+            box = (x, y, x + w, y + h)
+            yield (method_key, x, y, w, h), (x, y), rgb.sub(box), gray.sub(box)
+        else:
+            yield (method_key, x, y, w, h), (x, y), rgb[y:y + h, x:x + w], gray[y:y + h, x:x + w]
+
+def split_thumbnail(split_gray, scale):
+    """Change-gate thumbnail of a split; for a RegionFrame the patch thumbnails, flattened (None if all are too small)."""
+    if not isinstance(split_gray, RegionFrame):
+        return change_thumbnail(split_gray, scale)
+    parts = [change_thumbnail(patch, scale).ravel() for _, _, patch in split_gray.patches
+             if min(patch.shape[:2]) * scale >= 1]
+    return np.concatenate(parts) if parts else None
+
+def split_array(split_image):
+    """Dense copy of a split image to draw on (a RegionFrame is black outside its patches)."""
+    return split_image.to_array() if isinstance(split_image, RegionFrame) else split_image.copy()
+
+def crop_view(array, box):
+    """
+    Slice view of array (or RegionFrame) for a PIL-style (x0, y0, x1, y1) box,
+    clipped to the array; None if empty (or, for a RegionFrame, not grabbed).
+    """
+    if isinstance(array, RegionFrame):
+        return array.crop(box)
+    x0, y0, x1, y1 = box
+    view = array[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)]
+    return view if view.size else None
+
+# --- Data Validation Logic ---
+def validate_data(data_results):
+    """
+    Checks if data is complete (no 'N/A') and valid (follows rules).
+    Returns a (code, color) pair; code is "", "pass", "incomplete" or "invalid".
+    """
+    if not data_results:
+        return "", "black"
+
+    for key, value in data_results.items():
+        if value in INCOMPLETE_VALUES:
+            return "incomplete", "red"
+
+    for key, value in data_results.items():
+        try:
+            num_val = float(value)
+            if ("℃" in key or "ppm" in key) and num_val < 0:
+                return "invalid", "orange"
+            elif ("%" in key) and not (0 <= num_val <= 100):
+                return "invalid", "orange"
+        except (ValueError, TypeError):
+            pass
+
+    return "pass", "green"
+
+def build_sheet_payload(tabname, data_results, timestamp=None):
+    """Formats one split's data the way the Google Sheet Web App expects it."""
+    if timestamp is None:
+        timestamp = datetime.datetime.now()
+    headers = ["Timestamp"] + list(data_results.keys())
+    values = [timestamp.strftime("%Y-%m-%d %H:%M:%S")] + list(data_results.values())
+    return {
+        "sheetName": tabname.replace(".png", ""),
+        "headers": headers,
+        "values": values
+    }
+
+def _print_status(text_key, content=""):
+    """Default status callback for headless use."""
+    print(f"[{text_key}] {content}" if content != "" else f"[{text_key}]")
+
+
+class CaptureEngine:
+    """
+    GUI-free capture pipeline. Holds the config dict, SIFT template caches and
+    the OCR reader; process_frame() turns one screenshot into split results.
+
+    status_callback(text_key, content) receives the same status keys the GUI
+    translates (e.g. 'status_error', 'status_data_sent').
+    """
+    def __init__(self, config=None, base_path=BASE_PATH, status_callback=None):
+        self.config = config if config is not None else default_config()
+        self.config_version = 0 # Bumped by set_config(); invalidates reused results
+        self.status_callback = status_callback or _print_status
+        self.model_dir = os.path.join(base_path, 'model')
+        self.tabname_dir = os.path.join(base_path, "pictures", "tabname")
+        self.status_dir = os.path.join(base_path, "pictures", "status")
+        self.roi_dir = os.path.join(base_path, "rois")
+
+        self._thread_local = threading.local() # One SIFT instance per thread
+        self._template_lock = threading.RLock() # Serializes cache swaps and incremental edits
+        self._template_load_lock = threading.Lock() # Serializes full loads
+        self._loading_templates = set() # Kinds ('tabname', 'status') a running full load will replace
+        self._template_edits = [] # (kind, edit, args) made during that load, see _replay_template_edits()
+        self._index_lock = threading.Lock() # Lazy index builds (splits may ask from several threads)
+        self._split_pool = None # ThreadPoolExecutor for the splits of a frame, see _map_splits()
+        self._split_pool_lock = threading.Lock() # Pipeline stages call _map_splits() concurrently
+        self._split_pool_size = 0
+        self.tabname_sift_cache = {}
+        self.status_sift_caches = {}
+        self.sift_disk_cache = SiftDiskCache(os.path.join(base_path, SIFT_CACHE_FILENAME), base_path)
+        self.tabname_index = None # SiftTemplateIndex, rebuilt only when templates change
+        self.status_indexes = {}
+        self.templates_version = 0 # Bumped whenever a template cache is swapped
+        self.tab_memo = TabMatchMemo()
+        self.known_tabs = {} # split_key -> (context, last tab match)
+        self.change_gate = SplitChangeGate()
+        self.roi_memo = RoiResultMemo()
+        self.last_frame_size = None # (w, h) of the last processed frame (for capture_regions)
+        self.frame_counts = {'full': 0, 'region': 0, 'region_rejected': 0}
+        self.ocr_cache = OcrResultCache(self.config["ocr_cache_size"], self.config["ocr_cache_eviction"])
+        self.preprocess_plan = PreprocessPlan(self.config) # Rebuilt by set_config()
+        self.ocr_state = "pending" # EasyOCR reader: pending -> loading -> ready | failed
+        self.ocr_error = None
+        self.ocr_backends = {
+            EasyOcrBackend.name: EasyOcrBackend(OCR_ALLOWLIST),
+            GlyphTemplateBackend.name: GlyphTemplateBackend(os.path.join(self.model_dir, GLYPH_MODEL_FILENAME)),
+        }
+
+    # --- Setup ---
+    def set_config(self, config):
+        self.config = config
+        self.config_version += 1
+        self.preprocess_plan = PreprocessPlan(config)
+        self.ocr_cache.configure(config["ocr_cache_size"], config["ocr_cache_eviction"])
+
+    @property
+    def ocr_reader(self):
+        """The EasyOCR reader (None until create_ocr_reader())."""
+        return self.ocr_backends[EasyOcrBackend.name].reader
+
+    @ocr_reader.setter
+    def ocr_reader(self, reader):
+        self.ocr_backends[EasyOcrBackend.name].reader = reader
+
+    def create_ocr_reader(self):
+        """
+        Loads the EasyOCR model (slow: imports torch). Imported lazily on purpose;
+        safe to run on a worker thread, progress is visible through ocr_state.
+        With ocr_process_pool_size > 0 the model is loaded by that many worker
+        processes instead (ocr_pool.py) and no reader lives in this process.
+        """
+        self.ocr_state = "loading"
+        self.ocr_error = None
+        backend = self.ocr_backends[EasyOcrBackend.name]
+        try:
+            pool_size = self.config["ocr_process_pool_size"]
+            if pool_size > 0:
+                backend.pool = OcrProcessPool(self.model_dir, OCR_ALLOWLIST, pool_size,
+                                              self.config["ocr_torch_threads"]).start()
+            else:
+                import easyocr
+                self.ocr_reader = easyocr.Reader(['en'], model_storage_directory=self.model_dir)
+        except Exception as e:
+            self.ocr_state = "failed"
+            self.ocr_error = e
+            raise
+        self.ocr_state = "ready"
+        return self.ocr_reader
+
+    def close(self):
+        """Stops the OCR worker processes and the split thread pool, if any."""
+        backend = self.ocr_backends[EasyOcrBackend.name]
+        if backend.pool is not None:
+            backend.pool.close()
+            backend.pool = None
+        with self._split_pool_lock:
+            if self._split_pool is not None:
+                self._split_pool.shutdown(wait=False)
+                self._split_pool = None
+
+    # --- SIFT Templates ---
+    def get_sift(self):
+        """SIFT detector for the calling thread."""
+        sift = getattr(self._thread_local, 'sift', None)
+        if sift is None:
+            sift = cv2.SIFT_create()
+            self._thread_local.sift = sift
+        return sift
+
+    def compute_sift_for_file(self, filepath):
+        """Decodes a template PNG and runs SIFT on it (no caching)."""
+        try:
+            img_bytes = np.fromfile(filepath, dtype=np.uint8)
+            img = cv2.imdecode(img_bytes, cv2.IMREAD_GRAYSCALE)
+            if img is None: return (None, None)
+            kp, des = self.get_sift().detectAndCompute(img, None)
+            if des is not None and len(kp) > 0:
+                return (kp, des)
+        except Exception as e:
+            print(f"Error loading SIFT from {filepath}: {e}")
+        return (None, None)
+
+    def load_sift_from_file(self, filepath):
+        """(kp, des) for a template, served from the on-disk cache when the file is unchanged."""
+        try:
+            return self.sift_disk_cache.get(filepath, self.compute_sift_for_file)
+        except Exception as e:
+            print(f"Error loading SIFT from {filepath}: {e}")
+            return (None, None)
+
+    def _list_template_files(self):
+        """Returns ([(filename, path)], {tabname_key: [(status_filename, path)]}, listing_ok)."""
+        tabname_files = []
+        status_files = {}
+        listing_ok = True
+        try:
+            for filename in os.listdir(self.tabname_dir):
+                if filename.endswith('.png'):
+                    tabname_files.append((filename, os.path.join(self.tabname_dir, filename)))
+        except Exception as e:
+            listing_ok = False
+            self.status_callback('status_error', f"Tabname SIFT load failed: {e}")
+        try:
+            for tabname_folder in os.listdir(self.status_dir):
+                sub_folder_path = os.path.join(self.status_dir, tabname_folder)
+                if os.path.isdir(sub_folder_path):
+                    status_files[tabname_folder + ".png"] = [
+                        (status_filename, os.path.join(sub_folder_path, status_filename))
+                        for status_filename in os.listdir(sub_folder_path) if status_filename.endswith('.png')
+                    ]
+        except Exception as e:
+            listing_ok = False
+            self.status_callback('status_error', f"Status SIFT load failed: {e}")
+        return tabname_files, status_files, listing_ok
+
+    def load_all_sift_templates(self, progress_callback=None, on_tabnames_ready=None):
+        """
+        Loads BOTH Tabname and Status templates on a thread pool (SIFT releases the GIL).
+        New caches are built on the side and swapped in atomically: Tabnames first
+        (then on_tabnames_ready() is called), Statuses after. progress_callback(done, total)
+        is called as templates finish. Returns (tabname_count, status_count).
+
+        _template_lock is only held for the swaps, so incremental edits (from the GUI
+        thread) never wait for the load. They apply to the current caches at once and
+        are replayed on top of the new caches when those are swapped in.
+        """
+        with self._template_load_lock:
+            with self._template_lock:
+                self._loading_templates = {'tabname', 'status'}
+                self._template_edits = []
+            try:
+                return self._load_all_sift_templates(progress_callback, on_tabnames_ready)
+            finally:
+                with self._template_lock:
+                    self._loading_templates = set()
+                    self._template_edits = []
+
+    def _load_all_sift_templates(self, progress_callback, on_tabnames_ready):
+        tabname_files, status_files, listing_ok = self._list_template_files()
+        total = len(tabname_files) + sum(len(files) for files in status_files.values())
+        done = 0
+        workers = self.config.get("sift_load_workers") or min(32, (os.cpu_count() or 1) + 4)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Everything is queued up front so workers stay busy; results are
+            # collected in listing order to keep template order deterministic.
+            tabname_futures = [(filename, pool.submit(self.load_sift_from_file, path)) for filename, path in tabname_files]
+            status_futures = {
+                tabname_key: [(filename, pool.submit(self.load_sift_from_file, path)) for filename, path in files]
+                for tabname_key, files in status_files.items()
+            }
+
+            new_tabname_cache = {}
+            for filename, future in tabname_futures:
+                kp, des = future.result()
+                if kp:
+                    new_tabname_cache[filename] = (kp, des)
+                done += 1
+                if progress_callback: progress_callback(done, total)
+            new_tabname_index = SiftTemplateIndex(new_tabname_cache)
+            with self._template_lock:
+                self.tabname_sift_cache, self.tabname_index = new_tabname_cache, new_tabname_index
+                self.templates_version += 1
+                self._replay_template_edits('tabname')
+            if on_tabnames_ready: on_tabnames_ready()
+
+            new_status_caches = {}
+            for tabname_key, futures in status_futures.items():
+                new_status_caches[tabname_key] = {}
+                for filename, future in futures:
+                    kp, des = future.result()
+                    if kp:
+                        new_status_caches[tabname_key][filename] = (kp, des)
+                    done += 1
+                    if progress_callback: progress_callback(done, total)
+
+        with self._template_lock:
+            self.status_sift_caches, self.status_indexes = new_status_caches, {}
+            self.templates_version += 1
+            self._replay_template_edits('status')
+            if listing_ok:
+                # Listed again: templates added or removed during the load are on disk by now
+                tabname_files, status_files, listing_ok = self._list_template_files()
+            if listing_ok:
+                self.sift_disk_cache.prune([path for _, path in tabname_files] +
+                                           [path for files in status_files.values() for _, path in files])
+            self.sift_disk_cache.save()
+            return self.template_counts()
+
+    def _note_template_edit(self, kind, edit, *args):
+        """Records an incremental edit made while a full load is replacing the `kind` caches."""
+        if kind in self._loading_templates:
+            self._template_edits.append((kind, edit, args))
+
+    def _replay_template_edits(self, kind):
+        """Re-applies the `kind` edits made during the load to the caches just swapped in (lock held)."""
+        self._loading_templates.discard(kind)
+        edits = [(edit, args) for edit_kind, edit, args in self._template_edits if edit_kind == kind]
+        self._template_edits = [entry for entry in self._template_edits if entry[0] != kind]
+        for edit, args in edits:
+            edit(*args)
+
+    def template_counts(self):
+        """(tabname_count, status_count) currently in the caches."""
+        return len(self.tabname_sift_cache), sum(len(c) for c in self.status_sift_caches.values())
+
+    def get_tabname_index(self):
+        index = self.tabname_index
+        if index is None:
+            with self._index_lock:
+                if self.tabname_index is None:
+                    self.tabname_index = SiftTemplateIndex(self.tabname_sift_cache)
+                index = self.tabname_index
+        return index
+
+    def get_status_index(self, tabname_match_key):
+        index = self.status_indexes.get(tabname_match_key)
+        if index is None:
+            with self._index_lock:
+                index = self.status_indexes.get(tabname_match_key)
+                if index is None:
+                    index = SiftTemplateIndex(self.status_sift_caches.get(tabname_match_key, {}))
+                    self.status_indexes[tabname_match_key] = index
+        return index
+
+    # --- Incremental Template Updates (touch only the edited entry) ---
+    # Caches are copied-on-write and swapped in with their rebuilt index, so a
+    # capture running on another thread always sees a consistent pair.
+    def _swap_tabname_cache(self, new_cache):
+        self.tabname_sift_cache, self.tabname_index = new_cache, SiftTemplateIndex(new_cache)
+        self.templates_version += 1
+
+    def _swap_status_cache(self, tabname_key, new_cache):
+        new_caches = dict(self.status_sift_caches)
+        new_indexes = dict(self.status_indexes)
+        if new_cache is None:
+            new_caches.pop(tabname_key, None)
+            new_indexes.pop(tabname_key, None)
+        else:
+            new_caches[tabname_key] = new_cache
+            new_indexes[tabname_key] = SiftTemplateIndex(new_cache)
+        self.status_sift_caches, self.status_indexes = new_caches, new_indexes
+        self.templates_version += 1
+
+    def add_tabname_template(self, filename):
+        """Describes one new/overwritten Tabname template. Returns True if it has usable keypoints."""
+        with self._template_lock:
+            self._note_template_edit('tabname', self.add_tabname_template, filename)
+            kp, des = self.load_sift_from_file(os.path.join(self.tabname_dir, filename))
+            new_cache = dict(self.tabname_sift_cache)
+            if kp:
+                new_cache[filename] = (kp, des)
+            else:
+                new_cache.pop(filename, None)
+            self._swap_tabname_cache(new_cache)
+            self.sift_disk_cache.save()
+            return bool(kp)
+
+    def remove_tabname_template(self, filename):
+        with self._template_lock:
+            self._note_template_edit('tabname', self.remove_tabname_template, filename)
+            new_cache = dict(self.tabname_sift_cache)
+            new_cache.pop(filename, None)
+            self._swap_tabname_cache(new_cache)
+            self.sift_disk_cache.discard(os.path.join(self.tabname_dir, filename))
+            self.sift_disk_cache.save()
+
+    def rename_tabname_template(self, old_filename, new_filename):
+        with self._template_lock:
+            self._note_template_edit('tabname', self.rename_tabname_template, old_filename, new_filename)
+            new_cache = dict(self.tabname_sift_cache)
+            if old_filename in new_cache:
+                new_cache[new_filename] = new_cache.pop(old_filename)
+            self._swap_tabname_cache(new_cache)
+            self.sift_disk_cache.rename(os.path.join(self.tabname_dir, old_filename), os.path.join(self.tabname_dir, new_filename))
+            self.sift_disk_cache.save()
+
+    def add_status_template(self, foldername, filename):
+        """Describes one new/overwritten status image in pictures/status/<foldername>/."""
+        tabname_key = foldername + ".png"
+        with self._template_lock:
+            self._note_template_edit('status', self.add_status_template, foldername, filename)
+            kp, des = self.load_sift_from_file(os.path.join(self.status_dir, foldername, filename))
+            new_cache = dict(self.status_sift_caches.get(tabname_key, {}))
+            if kp:
+                new_cache[filename] = (kp, des)
+            else:
+                new_cache.pop(filename, None)
+            self._swap_status_cache(tabname_key, new_cache)
+            self.sift_disk_cache.save()
+            return bool(kp)
+
+    def remove_status_template(self, foldername, filename):
+        tabname_key = foldername + ".png"
+        with self._template_lock:
+            self._note_template_edit('status', self.remove_status_template, foldername, filename)
+            new_cache = dict(self.status_sift_caches.get(tabname_key, {}))
+            new_cache.pop(filename, None)
+            self._swap_status_cache(tabname_key, new_cache)
+            self.sift_disk_cache.discard(os.path.join(self.status_dir, foldername, filename))
+            self.sift_disk_cache.save()
+
+    def rename_status_template(self, foldername, old_filename, new_filename):
+        tabname_key = foldername + ".png"
+        with self._template_lock:
+            self._note_template_edit('status', self.rename_status_template, foldername, old_filename, new_filename)
+            new_cache = dict(self.status_sift_caches.get(tabname_key, {}))
+            if old_filename in new_cache:
+                new_cache[new_filename] = new_cache.pop(old_filename)
+            self._swap_status_cache(tabname_key, new_cache)
+            folder_path = os.path.join(self.status_dir, foldername)
+            self.sift_disk_cache.rename(os.path.join(folder_path, old_filename), os.path.join(folder_path, new_filename))
+            self.sift_disk_cache.save()
+
+    def rename_status_folder(self, old_foldername, new_foldername):
+        old_key = old_foldername + ".png"
+        new_key = new_foldername + ".png"
+        with self._template_lock:
+            self._note_template_edit('status', self.rename_status_folder, old_foldername, new_foldername)
+            if old_key in self.status_sift_caches or new_key not in self.status_sift_caches: # Not replayed onto a load that already saw the new name
+                moved_cache = self.status_sift_caches.get(old_key, {})
+                self._swap_status_cache(old_key, None)
+                self._swap_status_cache(new_key, moved_cache)
+            self.sift_disk_cache.rename(os.path.join(self.status_dir, old_foldername), os.path.join(self.status_dir, new_foldername))
+            self.sift_disk_cache.save()
+
+    def remove_status_folder(self, foldername):
+        with self._template_lock:
+            self._note_template_edit('status', self.remove_status_folder, foldername)
+            self._swap_status_cache(foldername + ".png", None)
+            self.sift_disk_cache.discard(os.path.join(self.status_dir, foldername))
+            self.sift_disk_cache.save()
+
+    # --- SIFT Matching ---
+    def find_best_sift_match(self, image_to_check_pil, template_index, match_threshold):
+        return self.find_best_sift_match_gray(pil_to_cv2_gray(image_to_check_pil), template_index, match_threshold)
+
+    def find_best_sift_match_gray(self, img_crop_gray, template_index, match_threshold):
+        """Describes the crop once and scores it against every template of the index."""
+        if not len(template_index): return "None"
+        try:
+            kp_crop, des_crop = self.get_sift().detectAndCompute(img_crop_gray, None)
+            if des_crop is None or len(kp_crop) < match_threshold or len(kp_crop) < 2:
+                return "None"
+            return template_index.best_match(des_crop, match_threshold)
+        except Exception as e:
+            print(f"SIFT match error: {e}")
+            return "None"
+
+    def find_best_tabname_match(self, split_gray, split_key=None):
+        """
+        SIFT-matches the top half of a split (gray array) against the Tabname
+        templates. With a split_key, the result is memoized per split and
+        reused while the crop's dHash stays within tab_hash_max_distance bits.
+        """
+        config = self.config
+        image_to_check = crop_view(split_gray, (0, 0, split_gray.shape[1], split_gray.shape[0] // 2))
+        if image_to_check is None:
+            return "None"
+        template_index = self.get_tabname_index()
+        threshold = config["tabname_sift_threshold"]
+
+        if split_key is None:
+            return self.find_best_sift_match_gray(image_to_check, template_index, threshold)
+
+        context = (template_index, threshold)
+        match_name = None
+        if config["tab_memo_enabled"]:
+            phash = dhash(image_to_check, config["tab_hash_size"])
+            match_name = self.tab_memo.lookup(split_key, phash, context,
+                                              config["tab_hash_max_distance"], config["tab_memo_max_hits"])
+        if match_name is None:
+            match_name = self.find_best_sift_match_gray(image_to_check, template_index, threshold)
+            if config["tab_memo_enabled"]:
+                self.tab_memo.store(split_key, phash, context, match_name)
+        self.known_tabs[split_key] = (context, match_name) # For capture_regions(), memo or not
+        return match_name
+
+    def find_best_status_match(self, roi_gray, tabname_match_key):
+        if tabname_match_key not in self.status_sift_caches:
+            return "None"
+        return self.find_best_sift_match_gray(roi_gray, self.get_status_index(tabname_match_key), self.config["status_sift_threshold"])
+
+    # --- OCR ---
+    def preprocess_for_ocr(self, roi_image, roi_key, order=None):
+        """
+        Gray -> upscale -> CLAHE -> median -> conditional morphology -> Otsu -> invert -> opening,
+        run by the PreprocessPlan compiled for the current config (ocr_preprocess.py).
+        order overrides ocr_preprocess_order ("upscale_last" cleans at native resolution, see ocr_preprocess.py).
+        roi_image is a gray or RGB array (or PIL image); the pipeline passes gray
+        views of the frame, so no per-ROI color conversion happens.
+        Returns a dict of the intermediate images (for the OCR Debug tab) or None.
+        """
+        try:
+            roi = np.asarray(roi_image)
+            roi_gray = roi if roi.ndim == 2 else cv2.cvtColor(roi, cv2.COLOR_RGB2GRAY)
+            processing_steps = self.preprocess_plan.run(roi_gray, roi_key, order)
+            if processing_steps is not None:
+                processing_steps['raw'] = roi
+            return processing_steps
+        except Exception as e:
+            print(f"OCR Preprocessing error: {e}")
+            return None
+
+    def ocr_backend_name(self, roi_key=None):
+        """Backend that reads roi_key: ocr_backend_by_roi[roi_key], else ocr_backend."""
+        return self.config["ocr_backend_by_roi"].get(roi_key, self.config["ocr_backend"])
+
+    def ocr_backends_in_use(self):
+        """Names of the OCR backends that some OCR ROI of the ROI sets in rois/ is read with."""
+        names = set()
+        if not os.path.isdir(self.roi_dir):
+            return names
+        for filename in sorted(os.listdir(self.roi_dir)):
+            if not filename.endswith(".json"):
+                continue
+            rois = self.load_roi_set(filename[:-len(".json")]) or {}
+            names.update(self.ocr_backend_name(roi_key) for roi_key in rois if STATUS_ROI_MARKER not in roi_key)
+        return names
+
+    def recognize_text(self, final_img, params=None, roi_key=None):
+        """
+        Runs OCR on a preprocessed ('final') image. Returns "" if nothing was read.
+        Results are cached by image content + params (preprocess_for_ocr()['params']).
+        """
+        return self.recognize_texts([(final_img, params, self.ocr_backend_name(roi_key))])[0]
+
+    def recognize_texts(self, items):
+        """
+        Batched recognize_text(): items is a list of (final_img, params) or
+        (final_img, params, backend_name); the texts come back in the same order.
+        Cache misses are grouped per backend and each group goes to its backend
+        in one call (batched there when ocr_batch_enabled, see ocr_mode).
+        """
+        texts = [None] * len(items)
+        cache_keys = []
+        missing = {}
+        for i, item in enumerate(items):
+            final_img, params = item[0], item[1]
+            backend_name = item[2] if len(item) > 2 else self.config["ocr_backend"]
+            cache_key = (content_digest(final_img), params, backend_name, self.config["ocr_mode"], OCR_ALLOWLIST)
+            cache_keys.append(cache_key)
+            cached = self.ocr_cache.get(cache_key)
+            if cached is None:
+                missing.setdefault(backend_name, []).append(i)
+            else:
+                texts[i] = cached
+
+        for backend_name, indices in missing.items():
+            backend = self.ocr_backends.get(backend_name)
+            if backend is None:
+                raise ValueError(f"Unknown OCR backend: {backend_name}")
+            for i, text in zip(indices, backend.recognize([items[i][0] for i in indices], self.config)):
+                texts[i] = text
+                self.ocr_cache.put(cache_keys[i], text)
+        return texts
+
+    # --- ROI Extraction ---
+    def load_roi_set(self, tabname_match):
+        """Returns the ROI dict from rois/<tabname>.json, or None if missing/unreadable."""
+        roi_filename = tabname_match.replace(".png", "") + ".json"
+        roi_filepath = os.path.join(self.roi_dir, roi_filename)
+        if not os.path.exists(roi_filepath):
+            return None
+        try:
+            with open(roi_filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading ROI file {roi_filename}: {e}")
+            return None
+
+    def extract_data_from_rois(self, image, tabname_match, crop_offset):
+        """
+        SIFT for '運転状況', Upscaled OCR for ALL OTHERS. With roi_memo_enabled,
+        a ROI whose crop is pixel-identical to the last one reuses that result.
+        image: the split as a PIL image or RGB array.
+        """
+        ocr_jobs = []
+        data_results = self.collect_roi_data(frame_arrays(image)[1], tabname_match, crop_offset, ocr_jobs)
+        self.run_ocr_jobs(ocr_jobs)
+        return data_results
+
+    def collect_roi_data(self, split_gray, tabname_match, crop_offset, ocr_jobs, split_key=None):
+        """
+        First half of extract_data_from_rois(): status ROIs and memo hits are
+        filled in right away; every ROI that needs OCR gets a None placeholder
+        and a job appended to ocr_jobs, for run_ocr_jobs() to fill in later.
+        split_gray is the split's gray array; ROIs are slice views of it.
+        """
+        data_results = {}
+        crop_offset_x, crop_offset_y = crop_offset
+        rois_to_draw = self.load_roi_set(tabname_match)
+        if not rois_to_draw:
+            return {}
+        use_memo = self.config["roi_memo_enabled"]
+        context = (self.config_version, self.templates_version)
+
+        for roi_key, roi_value in rois_to_draw.items():
+            try:
+                # 1. The .json entry must be a list/tuple of 4 values
+                if not isinstance(roi_value, (list, tuple)) or len(roi_value) != 4:
+                    print(f"Skipping corrupted ROI '{roi_key}' for {tabname_match}: Expected 4 coordinates, got {roi_value}")
+                    data_results[roi_key] = "Corrupt ROI"
+                    continue
+
+                # 2. Valid -> unpack as usual
+                global_x, global_y, global_w, global_h = roi_value
+
+                local_x = global_x - crop_offset_x
+                local_y = global_y - crop_offset_y
+                roi_gray = crop_view(split_gray, (local_x, local_y, local_x + global_w, local_y + global_h))
+                if roi_gray is None: continue
+
+                if use_memo:
+                    memo_key = (tabname_match, roi_key)
+                    digest = content_digest(roi_gray)
+                    found, value = self.roi_memo.lookup(memo_key, digest, context)
+                    if found:
+                        data_results[roi_key] = value
+                        continue
+
+                if STATUS_ROI_MARKER in roi_key:
+                    status_match = self.find_best_status_match(roi_gray, tabname_match)
+                    data_results[roi_key] = status_match.replace(".png", "")
+                else:
+                    processing_steps = self.preprocess_for_ocr(roi_gray, roi_key)
+                    if processing_steps is None:
+                        data_results[roi_key] = "N/A"
+                        continue
+
+                    data_results[roi_key] = None
+                    ocr_jobs.append({
+                        'split': split_key,
+                        'roi_key': roi_key,
+                        'data': data_results,
+                        'final': processing_steps['final'],
+                        'params': processing_steps['params'],
+                        'memo': (memo_key, digest, context) if use_memo else None,
+                    })
+                    continue
+
+                if use_memo:
+                    self.roi_memo.store(memo_key, digest, context, data_results[roi_key])
+
+            except Exception as e:
+                print(f"Error processing ROI {roi_key}: {e}")
+                data_results[roi_key] = "Error"
+        return data_results
+
+    def run_ocr_jobs(self, ocr_jobs):
+        """
+        OCRs every job from collect_roi_data() and writes the texts back to
+        (split, roi_key). The jobs go to their backend in one call per backend;
+        if that call fails, the group is retried one ROI at a time so only the
+        ROIs that fail on their own report "Error".
+        """
+        groups = {}
+        for job in ocr_jobs:
+            groups.setdefault(self.ocr_backend_name(job['roi_key']), []).append(job)
+        for backend_name, jobs in groups.items():
+            items = [(job['final'], job['params'], backend_name) for job in jobs]
+            try:
+                texts = self.recognize_texts(items)
+            except Exception as e:
+                print(f"Error running OCR on {len(jobs)} ROIs ({backend_name}), retrying one by one: {e}")
+                texts = [self._recognize_one(item, job['roi_key']) for item, job in zip(items, jobs)]
+            for job, text in zip(jobs, texts):
+                if text is None:
+                    job['data'][job['roi_key']] = "Error"
+                    continue
+                value = text if text else "N/A"
+                job['data'][job['roi_key']] = value
+                if job['memo'] is not None:
+                    memo_key, digest, context = job['memo']
+                    self.roi_memo.store(memo_key, digest, context, value)
+
+    def _recognize_one(self, item, roi_key):
+        """recognize_texts() for a single item; None if it fails."""
+        try:
+            return self.recognize_texts([item])[0]
+        except Exception as e:
+            print(f"Error running OCR on ROI {roi_key}: {e}")
+            return None
+
+    # --- Pipeline ---
+    def process_split(self, crop, offset, split_key=None):
+        """
+        Tab match + ROI extraction + validation for one split (PIL image or RGB
+        array). With a split_key and the change gate enabled, a split whose
+        downsampled pixels did not move since the last run returns that run's
+        result with 'skipped': True.
+        """
+        ocr_jobs = []
+        split_rgb, split_gray = frame_arrays(crop)
+        pending = self._begin_split(split_rgb, split_gray, offset, split_key, ocr_jobs)
+        self.run_ocr_jobs(ocr_jobs)
+        return self._finish_split(pending)
+
+    def _begin_split(self, split_rgb, split_gray, offset, split_key, ocr_jobs):
+        """Gate + tab match + ROI collection. OCR is deferred to ocr_jobs; see _finish_split()."""
+        pending = self._identify_split(split_rgb, split_gray, offset, split_key)
+        self._collect_split(pending, split_gray, split_key, ocr_jobs)
+        return pending
+
+    def _identify_split(self, split_rgb, split_gray, offset, split_key):
+        """Change gate + tab match. Returns (result, gate_entry); result['data'] is filled by _collect_split()."""
+        config = self.config
+        thumbnail = None
+        context = (self.config_version, self.templates_version)
+        if split_key is not None and config["change_gate_enabled"]:
+            thumbnail = split_thumbnail(split_gray, config["change_gate_scale"])
+        if thumbnail is not None:
+            previous = self.change_gate.lookup(split_key, thumbnail, context,
+                                               config["change_gate_pixel_threshold"],
+                                               config["change_gate_max_changed_pixels"],
+                                               config["change_gate_max_skips"])
+            if previous is not None:
+                return (dict(previous, image=split_rgb, skipped=True), None)
+
+        result = {
+            'image': split_rgb, # RGB array view into the frame (RegionFrame for a region frame)
+            'match_name': self.find_best_tabname_match(split_gray, split_key),
+            'offset': offset,
+            'data': {},
+            'validation': None,
+            'skipped': False,
+        }
+        gate_entry = (split_key, thumbnail, context) if thumbnail is not None else None
+        return (result, gate_entry)
+
+    def _collect_split(self, pending, split_gray, split_key, ocr_jobs):
+        """Status matches, memo hits and OCR jobs (appended to ocr_jobs) of an identified split."""
+        result, _ = pending
+        if not result['skipped'] and result['match_name'] != "None":
+            result['data'] = self.collect_roi_data(split_gray, result['match_name'], result['offset'], ocr_jobs, split_key)
+
+    def _finish_split(self, pending):
+        """Validates a split once its OCR jobs ran and remembers it for the change gate."""
+        result, gate_entry = pending
+        if result['skipped']:
+            return result
+        result['validation'] = validate_data(result['data'])
+        if gate_entry is not None:
+            split_key, thumbnail, context = gate_entry
+            self.change_gate.store(split_key, thumbnail, context, {k: v for k, v in result.items() if k != 'image'})
+        return result
+
+    def process_frame(self, image, method_key="NONE", expected_tabs=None):
+        """
+        Runs the whole pipeline on one screenshot. Returns one result dict per split.
+        The frame is converted to an RGB and a gray array once; splits and ROIs
+        are slice views of those. The OCR ROIs of all splits are recognized
+        together in one batch.
+
+        expected_tabs ({split_key: tabname}, from capture_regions()) marks a
+        region-only frame: if any split no longer shows its expected tab the
+        frame lacks that tab's ROIs, so None is returned before any OCR runs
+        and the caller should grab and process a full frame instead.
+
+        The stages (identify_frame -> preprocess_frame -> run_ocr_jobs ->
+        finish_frame) may also be run one by one, see capture_pipeline.py.
+        """
+        identified = self.identify_frame(image, method_key, expected_tabs)
+        if identified is None:
+            return None
+        ocr_jobs = self.preprocess_frame(identified)
+        self.run_ocr_jobs(ocr_jobs)
+        return self.finish_frame(identified)
+
+    def identify_frame(self, image, method_key="NONE", expected_tabs=None):
+        """
+        First stage of process_frame(): frame arrays, change gate and tab match
+        of every split. Returns the identified splits for preprocess_frame(),
+        or None for a region frame that lost an expected tab.
+        """
+        rgb, gray = frame_arrays(image)
+        splits = list(split_views(rgb, gray, method_key))
+        pending = self._map_splits(lambda split: self._identify_split(split[2], split[3], split[1], split[0]), splits)
+        if expected_tabs is not None:
+            for (split_key, _, _, _), (result, _) in zip(splits, pending):
+                if result['match_name'] != expected_tabs.get(split_key):
+                    self.frame_counts['region_rejected'] += 1
+                    return None
+            self.frame_counts['region'] += 1
+        else:
+            self.last_frame_size = (gray.shape[1], gray.shape[0])
+            self.frame_counts['full'] += 1
+        return [(split_key, split_gray, p) for (split_key, _, _, split_gray), p in zip(splits, pending)]
+
+    def preprocess_frame(self, identified):
+        """Second stage: ROI collection and OCR preprocessing of every split. Returns the OCR jobs, in split order."""
+        def collect(split):
+            split_key, split_gray, pending = split
+            ocr_jobs = []
+            self._collect_split(pending, split_gray, split_key, ocr_jobs)
+            return ocr_jobs
+        return [job for jobs in self._map_splits(collect, identified) for job in jobs]
+
+    def finish_frame(self, identified):
+        """Last stage, after run_ocr_jobs(): validated results, one per split."""
+        return [self._finish_split(pending) for _, _, pending in identified]
+
+    def _map_splits(self, func, splits):
+        """
+        [func(split) for split in splits]. With split_workers > 1 the splits
+        run concurrently on a small thread pool (SIFT, FLANN and the OpenCV
+        preprocessing release the GIL), so a frame takes about as long as its
+        slowest split. The pool is created / resized and the work submitted
+        under a lock, so a resize never shuts down a pool that another caller
+        is still submitting to (already submitted work still runs).
+        """
+        workers = self.config["split_workers"]
+        if workers <= 1 or len(splits) <= 1:
+            return [func(split) for split in splits]
+        with self._split_pool_lock:
+            if self._split_pool is None or self._split_pool_size != workers:
+                if self._split_pool is not None:
+                    self._split_pool.shutdown(wait=False)
+                self._split_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="split")
+                self._split_pool_size = workers
+            futures = [self._split_pool.submit(func, split) for split in splits]
+        return [future.result() for future in futures]
+
+    def grab_frame(self, source, method_key="NONE"):
+        """
+        Grab half of capture_and_process(): (frame, expected_tabs, full_frame),
+        or None once the source is exhausted. expected_tabs is None for a full
+        frame. For a region frame, full_frame is the recorded frame it was cut
+        from (None for a live source), to fall back on without another read.
+        """
+        capture_plan = self.capture_regions(method_key)
+        if capture_plan is None:
+            frame = source.grab()
+            return (frame, None, frame) if frame is not None else None
+        rects, expected_tabs = capture_plan
+        full_frame = None
+        if source.is_live:
+            frame = source.grab_regions(rects, self.last_frame_size)
+        else:
+            full_frame = source.grab()
+            frame = cut_regions(full_frame, rects, self.last_frame_size) if full_frame is not None else None
+        return (frame, expected_tabs, full_frame) if frame is not None else None
+
+    def capture_and_process(self, source, method_key="NONE"):
+        """
+        One capture cycle from a frame source (frame_sources.py): a region
+        grab while capture_regions() allows it, else / on a tab change a full
+        grab. A recorded (not live) source is read one full frame per cycle,
+        the region frame is cut from it and reused for the fallback.
+        Returns (frame, results), or None once the source is exhausted.
+        """
+        grabbed = self.grab_frame(source, method_key)
+        if grabbed is None:
+            return None
+        frame, expected_tabs, full_frame = grabbed
+        results = self.process_frame(frame, method_key, expected_tabs)
+        if results is None: # A tab changed in the region frame
+            frame = full_frame if full_frame is not None else source.grab()
+            if frame is None:
+                return None
+            results = self.process_frame(frame, method_key)
+        return (frame, results)
+
+    def capture_regions(self, method_key="NONE"):
+        """
+        Screen rectangles the next cycle needs, as (rects, expected_tabs), or
+        None when a full grab is required (region capture off, no full frame
+        seen yet, or a split that was never identified). Per split: the header
+        (top half, what tab identification looks at) plus every ROI box of the
+        split's current tab, grown by region_capture_margin. A split showing no
+        tab only gets its header, so a tab appearing there is still noticed.
+        """
+        config = self.config
+        if not config["region_capture_enabled"] or self.last_frame_size is None:
+            return None
+        frame_w, frame_h = self.last_frame_size
+        margin = config["region_capture_margin"]
+        context = (self.get_tabname_index(), config["tabname_sift_threshold"])
+        rects = []
+        expected_tabs = {}
+        for (x, y, w, h) in get_split_boxes(SimpleNamespace(size=self.last_frame_size), method_key):
+            split_key = (method_key, x, y, w, h)
+            known = self.known_tabs.get(split_key)
+            if known is None or known[0] != context:
+                return None
+            tabname = known[1]
+            expected_tabs[split_key] = tabname
+            rects.append((x, y, w, h // 2))
+            rois = self.load_roi_set(tabname) if tabname != "None" else None
+            for roi_value in (rois or {}).values():
+                if not isinstance(roi_value, (list, tuple)) or len(roi_value) != 4:
+                    continue
+                gx, gy, gw, gh = roi_value
+                x0 = max(gx - margin, x, 0); y0 = max(gy - margin, y, 0)
+                x1 = min(gx + gw + margin, x + w, frame_w); y1 = min(gy + gh + margin, y + h, frame_h)
+                if x1 > x0 and y1 > y0:
+                    rects.append((x0, y0, x1 - x0, y1 - y0))
+        return (merge_rects(rects), expected_tabs)
+
+    def cache_stats(self):
+        """Hit/miss counters of the engine's reuse caches (for status bars / CLI reports)."""
+        return {
+            'tab_memo': {'hits': self.tab_memo.hits, 'misses': self.tab_memo.misses},
+            'change_gate': {'skipped': self.change_gate.skipped, 'processed': self.change_gate.processed},
+            'roi_memo': dict(self.roi_memo.totals(), per_roi=self.roi_memo.counters),
+            'ocr_cache': self.ocr_cache.stats(),
+            'ocr_scales': {str(roi_key): scale for (roi_key, _), scale in self.preprocess_plan.adaptive_scales.items()},
+            'frames': dict(self.frame_counts),
+        }
+
+    # --- Google Sheet Upload ---
+    def _send_data_worker(self, url, payload):
+        try:
+            self.status_callback('status_data_sending', "")
+            response = requests.post(url, json=payload, timeout=10)
+            response.raise_for_status()
+            self.status_callback('status_data_sent', payload.get("sheetName"))
+        except requests.RequestException as e:
+            self.status_callback('status_error', f"GSheet: {e}")
+
+    def send_data_to_google_sheet(self, tabname, data_results, background=True, timestamp=None):
+        """Formats data and posts it (on a daemon thread unless background=False). timestamp defaults to now."""
+        url = self.config["g_sheet_url"]
+        if not url:
+            return
+        try:
+            payload = build_sheet_payload(tabname, data_results, timestamp)
+        except Exception as e:
+            self.status_callback('status_error', f"GSheet formatting: {e}")
+            return
+        if background:
+            threading.Thread(target=self._send_data_worker, args=(url, payload), daemon=True).start()
+        else:
+            self._send_data_worker(url, payload)
+
+    def send_results(self, results, background=True, timestamp=None):
+        """
+        Uploads every split that matched a tab and passed validation (unchanged
+        splits are skipped by default). timestamp (datetime) is the row's
+        capture time, e.g. the scheduled tick; defaults to now.
+        """
+        for result in results:
+            if result.get('skipped') and not self.config["change_gate_upload_unchanged"]:
+                continue
+            if result['match_name'] != "None" and result['validation'][1] == "green":
+                self.send_data_to_google_sheet(result['match_name'], result['data'], background, timestamp)
@@ -0,0 +1,234 @@
+"""
+Staged Auto-Capture pipeline: grab -> identify -> preprocess -> OCR ->
+validate -> sink, one thread per stage with a bounded queue in front of each.
+
+tick() asks for one capture cycle and never blocks. Consecutive cycles only
+overlap stage by stage (frame N is OCR'd while frame N+1 is identified),
+never inside a stage, so the OCR reader and the sink are used by one thread
+at a time and results reach the sink in grab order.
+
+The queues give backpressure: a stage that falls behind blocks the stage
+before it. The grab stage itself never waits; when the queue after it is
+full, pipeline_overrun_policy decides what happens to the new frame:
+    "drop"      - it is discarded, the queued frames go on
+    "coalesce"  - it replaces the oldest queued frame, so the pipeline always
+                  works on the freshest screen
+    "skip_next" - it is discarded and the next tick is not grabbed either,
+                  giving the pipeline a whole interval to catch up
+A tick that arrives while the grab stage is still busy is counted as missed.
+
+stats() reports the depth of every stage queue, the last time spent per
+stage and those counters.
+"""
+import queue
+import threading
+import time
+
+OVERRUN_POLICIES = ("drop", "coalesce", "skip_next")
+STAGES = ("grab", "identify", "preprocess", "ocr", "validate", "sink")
+POLL_SECONDS = 0.2 # How often idle / blocked stages look for stop()
+
+
+class CapturePipeline:
+    """
+    Runs CaptureEngine stages on frames of a frame source.
+
+    sink(frame, results, tick_time) runs on the sink thread for every
+    processed frame (tick_time: the time.time() passed to tick());
+    on_exhausted() once when a finite source runs out (the pipeline stops);
+    on_error(exception) when a stage raises (that frame is dropped). The
+    callbacks run on the pipeline threads; stats() also keeps the last error.
+    grab_delay seconds are waited before every grab.
+    """
+    def __init__(self, engine, source, method_key="NONE", sink=None, on_exhausted=None, on_error=None,
+                 grab_delay=0):
+        config = engine.config
+        if config["pipeline_overrun_policy"] not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown pipeline_overrun_policy: {config['pipeline_overrun_policy']}")
+        self.engine = engine
+        self.source = source
+        self.method_key = method_key
+        self.sink = sink
+        self.on_exhausted = on_exhausted
+        self.on_error = on_error
+        self.grab_delay = grab_delay
+        self.overrun_policy = config["pipeline_overrun_policy"]
+        queue_size = max(1, config["pipeline_queue_size"])
+        # Queue in front of each stage; the grab stage's holds pending ticks
+        self.queues = {stage: queue.Queue(maxsize=1 if stage == "grab" else queue_size) for stage in STAGES}
+        self.counts = {'ticks': 0, 'missed': 0, 'skipped': 0, 'dropped': 0, 'coalesced': 0, 'processed': 0, 'errors': 0}
+        self.last_error = None
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0) # Last job per stage
+        self.threads = []
+        self._lock = threading.Lock()
+        self._source_lock = threading.Lock() # The grab stage and the region fallback both read the source
+        self._stop_event = threading.Event()
+        self._skip_next = False
+
+    def start(self):
+        for stage in STAGES:
+            thread = threading.Thread(target=self._run_stage, args=(stage,), name=f"pipeline-{stage}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self, wait=False):
+        """
+        Stops every stage after its current job; frames still queued are
+        discarded and never reach the sink. Returns once the OCR stage is
+        idle, so a pipeline started right after never shares the reader with
+        this one's last OCR call. wait=True waits for every stage.
+        """
+        self._stop_event.set()
+        for stage, thread in zip(STAGES, self.threads):
+            if (wait or stage == "ocr") and thread is not threading.current_thread():
+                thread.join()
+
+    def is_running(self):
+        return bool(self.threads) and not self._stop_event.is_set()
+
+    def tick(self, tick_time=None):
+        """Requests one capture cycle. Returns False when the tick was missed or skipped."""
+        if not self.is_running():
+            return False
+        self._count('ticks')
+        if self._skip_next:
+            self._skip_next = False
+            self._count('skipped')
+            return False
+        try:
+            self.queues['grab'].put_nowait(tick_time if tick_time is not None else time.time())
+        except queue.Full:
+            self._count('missed')
+            return False
+        return True
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts)
+        stats['last_error'] = self.last_error
+        stats['policy'] = self.overrun_policy
+        stats['queues'] = {stage: self.queues[stage].qsize() for stage in STAGES}
+        stats['stage_ms'] = {stage: round(seconds * 1000, 1) for stage, seconds in self.stage_seconds.items()}
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    # --- Stage threads ---
+    def _run_stage(self, stage):
+        handler = getattr(self, '_' + stage)
+        inbox = self.queues[stage]
+        index = STAGES.index(stage)
+        outbox = self.queues[STAGES[index + 1]] if index + 1 < len(STAGES) else None
+        while True:
+            job = self._get(inbox)
+            if job is None:
+                return
+            start = time.perf_counter()
+            try:
+                job = handler(job)
+            except Exception as e:
+                job = None
+                self.last_error = f"{stage}: {e}"
+                self._count('errors')
+                if self.on_error is not None:
+                    self.on_error(e)
+            self.stage_seconds[stage] = time.perf_counter() - start
+            if job is None or outbox is None:
+                continue
+            if stage == "grab":
+                self._offer(outbox, job)
+            else:
+                self._put(outbox, job)
+
+    def _get(self, inbox):
+        while not self._stop_event.is_set():
+            try:
+                return inbox.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                pass
+        return None
+
+    def _put(self, outbox, job):
+        """Blocking put (backpressure) that gives up on stop()."""
+        while not self._stop_event.is_set():
+            try:
+                outbox.put(job, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                pass
+
+    def _offer(self, outbox, job):
+        """Hands a grabbed frame on, applying the overrun policy when the pipeline is a full queue behind."""
+        try:
+            outbox.put_nowait(job)
+            return
+        except queue.Full:
+            pass
+        if self.overrun_policy == "coalesce":
+            try:
+                outbox.get_nowait()
+                self._count('coalesced')
+            except queue.Empty:
+                pass
+            outbox.put_nowait(job) # Only this thread puts into the queue after the grab stage
+            return
+        self._count('dropped')
+        if self.overrun_policy == "skip_next":
+            self._skip_next = True
+
+    def _exhausted(self):
+        if self._stop_event.is_set():
+            return
+        self.stop()
+        if self.on_exhausted is not None:
+            self.on_exhausted()
+
+    # --- Stages ---
+    def _grab(self, tick_time):
+        if self.grab_delay:
+            time.sleep(self.grab_delay)
+        with self._source_lock:
+            grabbed = self.engine.grab_frame(self.source, self.method_key)
+        if grabbed is None:
+            self._exhausted()
+            return None
+        frame, expected_tabs, full_frame = grabbed
+        return {'time': tick_time, 'frame': frame, 'expected_tabs': expected_tabs, 'full_frame': full_frame}
+
+    def _identify(self, job):
+        identified = self.engine.identify_frame(job['frame'], self.method_key, job['expected_tabs'])
+        if identified is None: # A tab changed in the region frame: fall back to a full frame
+            frame = job['full_frame']
+            if frame is None:
+                with self._source_lock:
+                    frame = self.source.grab()
+                if frame is None:
+                    self._exhausted()
+                    return None
+            job['frame'] = frame
+            identified = self.engine.identify_frame(frame, self.method_key)
+        job['identified'] = identified
+        return job
+
+    def _preprocess(self, job):
+        job['ocr_jobs'] = self.engine.preprocess_frame(job['identified'])
+        return job
+
+    def _ocr(self, job):
+        self.engine.run_ocr_jobs(job['ocr_jobs'])
+        return job
+
+    def _validate(self, job):
+        job['results'] = self.engine.finish_frame(job['identified'])
+        return job
+
+    def _sink(self, job):
+        if self._stop_event.is_set():
+            return None
+        if self.sink is not None:
+            self.sink(job['frame'], job['results'], job['time'])
+        self._count('processed')
+        return None
@@ -0,0 +1,104 @@
+"""
+Drift-free capture ticks on the monotonic clock.
+
+Tick n is due at start + n * interval (absolute deadlines), so the time a
+cycle takes, or a late wake-up, never pushes the following ticks back: the
+cadence stays fixed and only the individual tick is late. How late each
+tick fired is recorded. When a whole interval or more has passed since a
+deadline (the process was stalled or suspended), the deadlines in between
+are counted as missed and skipped instead of being fired in a burst.
+
+Intervals are float seconds; sub-second intervals are fine.
+
+Either drive it yourself (wait() blocks until the next tick, as
+capture_cli.py does) or let start_thread() call a callback on every tick
+from a daemon thread, as the GUI does.
+"""
+import threading
+import time
+
+
+class CaptureScheduler:
+    def __init__(self, interval, clock=time.monotonic):
+        if interval <= 0:
+            raise ValueError(f"Interval must be > 0 (got {interval})")
+        self.interval = interval
+        self.clock = clock
+        self.start_time = None
+        self.next_index = 0 # Index of the next deadline
+        self.counts = {'ticks': 0, 'missed': 0}
+        self.lateness = {'last': 0.0, 'max': 0.0, 'total': 0.0} # Seconds
+        self.thread = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def start(self, now=None):
+        """Sets tick 0 to now (the first tick is due at once)."""
+        self.start_time = self.clock() if now is None else now
+        self.next_index = 0
+        return self
+
+    def next_deadline(self):
+        return self.start_time + self.next_index * self.interval
+
+    def progress(self):
+        """Fraction (0..1) of the current interval that has passed."""
+        if self.start_time is None:
+            return 0.0
+        remaining = self.next_deadline() - self.clock()
+        return min(max(1.0 - remaining / self.interval, 0.0), 1.0)
+
+    def wait(self):
+        """
+        Sleeps until the next deadline and records the tick. Returns the
+        wall-clock (time.time()) time the tick was due, or None after stop().
+        """
+        delay = self.next_deadline() - self.clock()
+        if delay > 0 and self._stop_event.wait(delay):
+            return None
+        if self._stop_event.is_set():
+            return None
+        return self.fire()
+
+    def fire(self):
+        """Records the tick due at next_deadline() as fired now; returns its due wall-clock time."""
+        now = self.clock()
+        with self._lock:
+            behind = int((now - self.next_deadline()) // self.interval) # Whole intervals past the deadline
+            if behind > 0:
+                self.counts['missed'] += behind
+                self.next_index += behind
+            lateness = max(now - self.next_deadline(), 0.0)
+            self.next_index += 1
+            self.counts['ticks'] += 1
+            self.lateness['last'] = lateness
+            self.lateness['max'] = max(self.lateness['max'], lateness)
+            self.lateness['total'] += lateness
+        return time.time() - lateness
+
+    def stats(self):
+        with self._lock:
+            ticks = self.counts['ticks']
+            return {
+                'interval': self.interval,
+                'ticks': ticks,
+                'missed': self.counts['missed'],
+                'late_ms': {
+                    'last': round(self.lateness['last'] * 1000, 1),
+                    'mean': round(self.lateness['total'] / ticks * 1000, 1) if ticks else 0.0,
+                    'max': round(self.lateness['max'] * 1000, 1),
+                },
+            }
+
+    def start_thread(self, callback):
+        """start(), then callback(due_time) on every tick from a daemon thread until stop()."""
+        self.start()
+        def run():
+            while (due_time := self.wait()) is not None:
+                callback(due_time)
+        self.thread = threading.Thread(target=run, name="capture-scheduler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,154 @@
+"""
+Cheap change detection used to skip expensive work between capture cycles.
+
+- dhash() / hamming_distance(): perceptual difference hash of a gray image.
+- TabMatchMemo: per-split memo of the last SIFT tab match, reused while the
+  split's header hash stays within a small Hamming distance.
+- SplitChangeGate: per-split frame difference on a downsampled copy; an
+  unchanged split reuses its previous result instead of being reprocessed.
+- RoiResultMemo: per-ROI memo keyed by an exact content hash of the ROI crop,
+  so only ROIs whose pixels changed are OCR'd / SIFT-matched again.
+"""
+import hashlib
+import threading
+
+import numpy as np
+import cv2
+
+def dhash(gray, hash_size=16):
+    """Difference hash: hash_size x hash_size bits packed into a uint8 array."""
+    resized = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return np.packbits(resized[:, 1:] > resized[:, :-1])
+
+def change_thumbnail(rgb_image, scale):
+    """Downsampled (INTER_AREA) gray copy of an RGB image / PIL image, for frame differencing."""
+    small = cv2.resize(np.asarray(rgb_image), None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    return small
+
+def content_digest(image):
+    """Exact hash of an image's pixels (PIL image or array) including its shape."""
+    array = np.ascontiguousarray(np.asarray(image))
+    digest = hashlib.blake2b(array.data, digest_size=16)
+    digest.update(repr((array.shape, array.dtype.str)).encode())
+    return digest.digest()
+
+def hamming_distance(hash_a, hash_b):
+    if hash_a.shape != hash_b.shape:
+        return float('inf')
+    return int(np.unpackbits(np.bitwise_xor(hash_a, hash_b)).sum())
+
+
+class TabMatchMemo:
+    """
+    Remembers, per split, the header hash at the time SIFT last ran and the tab
+    it found. lookup() returns that tab while the current hash is within
+    max_distance bits of the stored one; the stored hash is never updated on a
+    hit, so slow drift still ends in a fresh SIFT run.
+
+    context is anything that invalidates the memo when it changes (e.g. the
+    template index and the SIFT threshold).
+    """
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock() # Splits may be processed on several threads
+
+    def lookup(self, split_key, phash, context, max_distance, max_hits=0):
+        with self._lock:
+            entry = self.entries.get(split_key)
+            if (entry is None or entry['context'] != context
+                    or (max_hits and entry['hits'] >= max_hits)
+                    or hamming_distance(entry['hash'], phash) > max_distance):
+                self.misses += 1
+                return None
+            entry['hits'] += 1
+            self.hits += 1
+            return entry['match']
+
+    def store(self, split_key, phash, context, match_name):
+        with self._lock:
+            self.entries[split_key] = {'hash': phash, 'context': context, 'match': match_name, 'hits': 0}
+
+    def clear(self):
+        self.entries.clear()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SplitChangeGate:
+    """
+    Keeps the last processed thumbnail + result per split. lookup() returns the
+    stored result when fewer than max_changed_pixels thumbnail pixels moved by
+    more than pixel_threshold gray levels (and the context is unchanged);
+    max_skips forces a real run after that many consecutive reuses (0 = never).
+    """
+    def __init__(self):
+        self.entries = {}
+        self.skipped = 0
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, split_key, thumbnail, context, pixel_threshold, max_changed_pixels, max_skips=0):
+        with self._lock:
+            entry = self.entries.get(split_key)
+            if (entry is None or entry['context'] != context
+                    or entry['thumbnail'].shape != thumbnail.shape
+                    or (max_skips and entry['skips'] >= max_skips)):
+                self.processed += 1
+                return None
+            changed = int(np.count_nonzero(cv2.absdiff(entry['thumbnail'], thumbnail) > pixel_threshold))
+            if changed > max_changed_pixels:
+                self.processed += 1
+                return None
+            entry['skips'] += 1
+            self.skipped += 1
+            return entry['result']
+
+    def store(self, split_key, thumbnail, context, result):
+        with self._lock:
+            self.entries[split_key] = {'thumbnail': thumbnail, 'context': context, 'result': result, 'skips': 0}
+
+    def clear(self):
+        self.entries.clear()
+
+
+class RoiResultMemo:
+    """
+    Last result per (tabname, roi_key), reused while the ROI crop's content
+    digest and the context are identical. Hits / misses are counted per roi_key.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def _count(self, roi_key, field):
+        counter = self.counters.setdefault(roi_key, {'hits': 0, 'misses': 0})
+        counter[field] += 1
+
+    def lookup(self, key, digest, context):
+        """Returns (found, value)."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry['digest'] != digest or entry['context'] != context:
+                self._count(key[-1], 'misses')
+                return (False, None)
+            self._count(key[-1], 'hits')
+            return (True, entry['value'])
+
+    def store(self, key, digest, context, value):
+        with self._lock:
+            self.entries[key] = {'digest': digest, 'context': context, 'value': value}
+
+    def clear(self):
+        self.entries.clear()
+
+    def totals(self):
+        hits = sum(c['hits'] for c in self.counters.values())
+        misses = sum(c['misses'] for c in self.counters.values())
+        return {'hits': hits, 'misses': misses}
@@ -0,0 +1,123 @@
+"""
+Fixed-size ring of frames in multiprocessing.shared_memory, for handing
+screenshots to worker processes without pickling them.
+
+One SharedMemory block holds a slot table followed by `slots` pixel areas
+sized for max_shape (height, width, channels). The capture side copies each
+frame into a free slot once (write()) and sends only the small (slot,
+sequence) handle to a worker (e.g. over a multiprocessing connection); the
+worker attaches to the same block by name, gets a zero-copy NumPy view
+(view()) and hands the slot back with release() when done.
+
+Slot-release protocol: a slot goes FREE -> WRITING -> READY on the writer
+side and READY -> FREE on the reader side, so every state field has exactly
+one writer at a time and no cross-process lock is needed. This requires a
+single writer process and at most one consumer per handle. The sequence
+number catches stale handles (a slot reused after its release).
+
+Before Python 3.13 an attaching process registers the block with the
+resource tracker too, so readers should be multiprocessing children of the
+creating process (they share its tracker, which then leaves the block to
+the creator's close()).
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+SLOT_FREE = 0
+SLOT_WRITING = 1
+SLOT_READY = 2
+SLOT_FIELDS = 5 # state, sequence, height, width, channels (int64 each)
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # Python 3.13+
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class FrameRing:
+    def __init__(self, slots, max_shape, name=None):
+        """Creates a new ring (name=None) or attaches to the ring `name` created with the same slots/max_shape."""
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = int(np.prod(self.max_shape))
+        table_bytes = slots * SLOT_FIELDS * 8
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=table_bytes + slots * self.slot_bytes)
+        else:
+            self.shm = _attach(name)
+        self.table = np.ndarray((slots, SLOT_FIELDS), dtype=np.int64, buffer=self.shm.buf)
+        self.pixels = np.ndarray((slots, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf, offset=table_bytes)
+        if self.owner:
+            self.table[:] = 0
+        self._next_slot = 0
+        self._sequence = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def attach_args(self):
+        """Arguments for FrameRing(*args) in another process."""
+        return (self.slots, self.max_shape, self.name)
+
+    def write(self, frame):
+        """
+        Copies frame (H x W x C uint8 array or RGB PIL image) into a free slot.
+        Returns the (slot, sequence) handle, or None when every slot is still
+        held by a reader (the caller drops or retries the frame).
+        """
+        array = np.asarray(frame, dtype=np.uint8)
+        if array.ndim == 2:
+            array = array[:, :, None]
+        if any(size > limit for size, limit in zip(array.shape, self.max_shape)):
+            raise ValueError(f"Frame {array.shape} exceeds the ring's max shape {self.max_shape}")
+        for i in range(self.slots):
+            slot = (self._next_slot + i) % self.slots
+            if self.table[slot, 0] == SLOT_FREE:
+                break
+        else:
+            return None
+        self._next_slot = (slot + 1) % self.slots
+        self._sequence += 1
+        self.table[slot, 0] = SLOT_WRITING
+        self._slot_view(slot, array.shape)[...] = array
+        self.table[slot, 1:] = (self._sequence,) + array.shape
+        self.table[slot, 0] = SLOT_READY
+        return (slot, self._sequence)
+
+    def view(self, handle):
+        """Zero-copy read-only H x W x C view of a READY slot (valid until release())."""
+        slot, sequence = handle
+        state, slot_sequence, height, width, channels = (int(v) for v in self.table[slot])
+        if state != SLOT_READY or slot_sequence != sequence:
+            raise ValueError(f"Stale frame handle {handle}")
+        view = self._slot_view(slot, (height, width, channels))
+        view.flags.writeable = False
+        return view
+
+    def release(self, handle):
+        slot, sequence = handle
+        if self.table[slot, 1] == sequence:
+            self.table[slot, 0] = SLOT_FREE
+
+    def free_slots(self):
+        return int(np.count_nonzero(self.table[:, 0] == SLOT_FREE))
+
+    def _slot_view(self, slot, shape):
+        return self.pixels[slot, :int(np.prod(shape))].reshape(shape)
+
+    def close(self):
+        """Detaches this process; the creating process also frees the block."""
+        self.table = None
+        self.pixels = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
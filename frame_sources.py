@@ -0,0 +1,183 @@
+"""
+Frame sources: where the capture pipeline gets its screenshots from.
+
+- ScreenFrameSource: the live virtual desktop (screen_capture.py).
+- ImageFilesFrameSource: PNG screenshots, from a folder (sorted by name) or
+  an explicit file list.
+- SessionFrameSource: a recorded session file written by SessionRecorder
+  (zip: session.json + one PNG per frame).
+
+All of them return RGB PIL images in frame coordinates (grab_regions():
+a RegionFrame, see screen_capture.py); grab() returns None
+once a finite source is exhausted. open_frame_source() turns a command-line
+spec ("screen", a folder, a .zip session, or PNG files) into a source.
+"""
+import glob
+import io
+import json
+import os
+import time
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+from screen_capture import RegionFrame, grab_full, grab_regions
+
+SESSION_VERSION = 1
+SESSION_INDEX = "session.json"
+
+def cut_regions(frame, rects, frame_size):
+    """RegionFrame of a frame_size frame holding only rects ((x, y, w, h)) of frame (views, no copies)."""
+    array = np.asarray(frame)
+    return RegionFrame((frame_size[1], frame_size[0], 3), [(x, y, array[y:y + h, x:x + w]) for (x, y, w, h) in rects])
+
+
+class FrameSource:
+    """
+    Interface. is_live sources may be grabbed forever; others end with None.
+    label describes the last grabbed frame (file name, session entry, time).
+    """
+    name = ""
+    is_live = False
+    label = ""
+
+    def grab(self):
+        """Next full frame (RGB PIL image), or None when the source is exhausted."""
+        raise NotImplementedError
+
+    def preview(self):
+        """A frame for the region editors, without advancing the source (None if it has no frames)."""
+        raise NotImplementedError
+
+    def grab_regions(self, rects, frame_size):
+        """Next frame's rects ((x, y, w, h)) as a RegionFrame; default: cut from a full frame."""
+        frame = self.grab()
+        if frame is None:
+            return None
+        return cut_regions(frame, rects, frame_size)
+
+    def close(self):
+        pass
+
+
+class ScreenFrameSource(FrameSource):
+    name = "screen"
+    is_live = True
+
+    def grab(self):
+        self.label = time.strftime('%Y-%m-%d %H:%M:%S')
+        return grab_full()
+
+    def preview(self):
+        return grab_full()
+
+    def grab_regions(self, rects, frame_size):
+        self.label = time.strftime('%Y-%m-%d %H:%M:%S')
+        return grab_regions(rects, frame_size)
+
+
+class ImageFilesFrameSource(FrameSource):
+    name = "images"
+
+    def __init__(self, paths, loop=False):
+        self.paths = list(paths)
+        self.loop = loop
+        self.position = 0
+
+    @classmethod
+    def from_folder(cls, folder, loop=False):
+        return cls(sorted(glob.glob(os.path.join(folder, "*.png"))), loop)
+
+    def grab(self):
+        if self.position >= len(self.paths):
+            if not self.loop or not self.paths:
+                return None
+            self.position = 0
+        path = self.paths[self.position]
+        self.position += 1
+        self.label = path
+        return self._load(path)
+
+    def preview(self):
+        if not self.paths:
+            return None
+        return self._load(self.paths[max(self.position - 1, 0)])
+
+    @staticmethod
+    def _load(path):
+        with Image.open(path) as image:
+            return image.convert('RGB')
+
+
+class SessionFrameSource(FrameSource):
+    name = "session"
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.archive = zipfile.ZipFile(path, 'r')
+        index = json.loads(self.archive.read(SESSION_INDEX).decode('utf-8'))
+        if index.get('version') != SESSION_VERSION:
+            raise ValueError(f"Unsupported session file version in {path}: {index.get('version')}")
+        self.frames = index['frames']
+        self.position = 0
+
+    def grab(self):
+        if self.position >= len(self.frames):
+            if not self.loop or not self.frames:
+                return None
+            self.position = 0
+        entry = self.frames[self.position]
+        self.position += 1
+        self.label = entry['file']
+        return self._load(entry)
+
+    def preview(self):
+        if not self.frames:
+            return None
+        return self._load(self.frames[max(self.position - 1, 0)])
+
+    def _load(self, entry):
+        with Image.open(io.BytesIO(self.archive.read(entry['file']))) as image:
+            return image.convert('RGB')
+
+    def close(self):
+        self.archive.close()
+
+
+class SessionRecorder:
+    """Writes frames into a session file readable by SessionFrameSource."""
+    def __init__(self, path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) # PNGs are compressed already
+        self.frames = []
+
+    def add(self, frame, timestamp=None):
+        name = f"frames/{len(self.frames):06d}.png"
+        buffer = io.BytesIO()
+        frame.save(buffer, format='PNG')
+        self.archive.writestr(name, buffer.getvalue())
+        self.frames.append({'file': name, 'timestamp': timestamp if timestamp is not None else time.time()})
+
+    def close(self):
+        self.archive.writestr(SESSION_INDEX, json.dumps({'version': SESSION_VERSION, 'frames': self.frames}))
+        self.archive.close()
+
+
+def open_frame_source(spec, loop=False):
+    """
+    "screen" -> live screen; a folder -> its PNGs; a .zip file -> recorded
+    session; any other file (or list of files) -> those images.
+    """
+    if isinstance(spec, (list, tuple)):
+        if len(spec) != 1:
+            return ImageFilesFrameSource(spec, loop)
+        spec = spec[0]
+    if spec == "screen":
+        return ScreenFrameSource()
+    if os.path.isdir(spec):
+        return ImageFilesFrameSource.from_folder(spec, loop)
+    if zipfile.is_zipfile(spec):
+        return SessionFrameSource(spec, loop)
+    return ImageFilesFrameSource([spec], loop)
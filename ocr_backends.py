@@ -0,0 +1,234 @@
+"""
+OCR backends behind CaptureEngine.recognize_texts().
+
+Every backend turns a list of preprocessed ('final', binarized) ROI images
+into a list of texts. Which one reads a ROI is chosen per ROI key in the
+config (ocr_backend_by_roi, falling back to ocr_backend).
+
+- EasyOcrBackend: the EasyOCR reader (torch), in "detect" or "recognize" mode.
+- GlyphTemplateBackend: fixed-font digit reader. Each binarized reading is cut
+  into glyphs by column projection and every glyph is matched against
+  templates learnt from labelled ROI crops (train_glyph_templates()). Pure
+  NumPy/OpenCV, no torch.
+"""
+import os
+
+import numpy as np
+import cv2
+
+GLYPH_WIDTH = 16
+GLYPH_HEIGHT = 24
+GLYPH_MODEL_FILENAME = "digit_glyphs.npz" # Stored in the model/ folder
+GLYPH_MIN_INK = 0.01 # Column runs with less ink than this * line_height^2 are noise
+GLYPH_ASPECT_WEIGHT = 0.5 # Weight of the width/height difference in the glyph distance
+GLYPH_MAX_SAMPLES_PER_CHAR = 40
+
+def foreground_mask(final_img):
+    """Boolean text mask of a binarized image; the minority colour is the text."""
+    mask = final_img > 127
+    if mask.mean() > 0.5:
+        mask = ~mask
+    return mask
+
+def segment_glyphs(final_img):
+    """
+    Splits a binarized single-line reading into glyphs, left to right.
+    Returns a list of (normalized GLYPH_HEIGHT x GLYPH_WIDTH float32 image,
+    aspect). Glyphs keep their position inside the full line height, so '.'
+    and '-' stay distinguishable after normalization.
+    """
+    mask = foreground_mask(final_img)
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return []
+    line = mask[rows[0]:rows[-1] + 1]
+    line_height = line.shape[0]
+    edges = np.diff(np.concatenate(([0], line.any(axis=0).astype(np.int8), [0])))
+    glyphs = []
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        glyph = line[:, start:end]
+        if glyph.sum() < GLYPH_MIN_INK * line_height * line_height:
+            continue
+        normalized = cv2.resize(glyph.astype(np.float32), (GLYPH_WIDTH, GLYPH_HEIGHT), interpolation=cv2.INTER_AREA)
+        glyphs.append((normalized, (end - start) / line_height))
+    return glyphs
+
+def train_glyph_templates(samples, allowlist):
+    """
+    samples: iterable of (final_img, text). A sample is used only if it splits
+    into exactly len(text) glyphs. Returns (model dict, used, skipped).
+    """
+    per_char = {}
+    used = skipped = 0
+    for final_img, text in samples:
+        glyphs = segment_glyphs(final_img)
+        if not text or len(glyphs) != len(text) or any(ch not in allowlist for ch in text):
+            skipped += 1
+            continue
+        used += 1
+        for ch, glyph in zip(text, glyphs):
+            bucket = per_char.setdefault(ch, [])
+            if len(bucket) < GLYPH_MAX_SAMPLES_PER_CHAR:
+                bucket.append(glyph)
+    labels = []
+    templates = []
+    aspects = []
+    for ch in sorted(per_char):
+        for normalized, aspect in per_char[ch]:
+            labels.append(ch)
+            templates.append(normalized.ravel())
+            aspects.append(aspect)
+    model = {
+        'labels': np.array(labels, dtype='<U1'),
+        'templates': np.array(templates, dtype=np.float32).reshape(-1, GLYPH_WIDTH * GLYPH_HEIGHT),
+        'aspects': np.array(aspects, dtype=np.float32),
+    }
+    return model, used, skipped
+
+def save_glyph_model(model, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, **model)
+    os.replace(tmp_path, path)
+
+
+class OcrBackend:
+    """Interface: recognize(images, config) -> list of texts (same order, "" = nothing read)."""
+    name = ""
+
+    def is_ready(self):
+        return True
+
+    def recognize(self, images, config):
+        raise NotImplementedError
+
+
+class EasyOcrBackend(OcrBackend):
+    """
+    EasyOCR reader. config["ocr_mode"]: "detect" runs readtext() (CRAFT + recognizer),
+    "recognize" feeds the whole ROI to the recognizer as one line. With
+    ocr_batch_enabled several images go to the reader in one call. With a
+    pool (ocr_pool.OcrProcessPool) the images are read by its worker
+    processes instead of the in-process reader.
+    """
+    name = "easyocr"
+
+    def __init__(self, allowlist):
+        self.allowlist = allowlist
+        self.reader = None # Set by CaptureEngine.create_ocr_reader()
+        self.pool = None # Or this, when ocr_process_pool_size > 0
+
+    def is_ready(self):
+        return self.reader is not None or (self.pool is not None and self.pool.is_ready())
+
+    def recognize(self, images, config):
+        if self.pool is not None:
+            return self.pool.recognize(images, config)
+        if self.reader is None:
+            raise RuntimeError("OCR reader not initialized")
+        batched = config["ocr_batch_enabled"] and len(images) > 1
+        if config["ocr_mode"] == "recognize":
+            if batched:
+                ocr_results = self._recognize_stacked(images, config["ocr_batch_size"])
+            else:
+                ocr_results = [self.reader.recognize(img, allowlist=self.allowlist, detail=0) for img in images]
+        elif batched:
+            ocr_results = self._readtext_batched(images, config["ocr_batch_size"])
+        else:
+            ocr_results = [self.reader.readtext(img, allowlist=self.allowlist, detail=0) for img in images]
+        return ["".join(ocr_result).strip() for ocr_result in ocr_results]
+
+    @staticmethod
+    def _pad(img, height, width):
+        background = 255 if np.mean(img) > 127 else 0
+        return cv2.copyMakeBorder(img, 0, height - img.shape[0], 0, width - img.shape[1],
+                                  cv2.BORDER_CONSTANT, value=background)
+
+    def _readtext_batched(self, images, batch_size):
+        """
+        readtext_batched() needs equally sized images: each binarized image is
+        padded (bottom/right, with its own background value) to the largest one
+        instead of being resized, so glyph shapes stay untouched.
+        """
+        height = max(img.shape[0] for img in images)
+        width = max(img.shape[1] for img in images)
+        padded = [self._pad(img, height, width) for img in images]
+        return self.reader.readtext_batched(padded, batch_size=batch_size, allowlist=self.allowlist, detail=0)
+
+    def _recognize_stacked(self, images, batch_size):
+        """
+        Recognition-only batch: the images are stacked vertically into one
+        canvas and each one is passed as its own horizontal box, so the
+        recognizer sees every ROI as a single line and no detection runs.
+        Results are mapped back through each box's top edge.
+        """
+        width = max(img.shape[1] for img in images)
+        boxes = []
+        top = 0
+        for img in images:
+            boxes.append([0, img.shape[1], top, top + img.shape[0]])
+            top += img.shape[0]
+        canvas = np.vstack([self._pad(img, img.shape[0], width) for img in images])
+        recognized = self.reader.recognize(canvas, horizontal_list=boxes, free_list=[], batch_size=batch_size,
+                                           allowlist=self.allowlist, detail=1)
+        texts_by_top = {}
+        for box, text, _confidence in recognized:
+            texts_by_top.setdefault(int(box[0][1]), []).append(text)
+        return [texts_by_top.get(box[2], []) for box in boxes]
+
+
+class GlyphTemplateBackend(OcrBackend):
+    """
+    Nearest-template digit reader (see segment_glyphs()). The model file is
+    (re)loaded lazily whenever its mtime changes. A reading with any glyph
+    farther than config["glyph_max_distance"] from every template returns ""
+    so it shows up as N/A instead of a wrong number.
+    """
+    name = "glyphs"
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.labels = None
+        self.templates = None
+        self.aspects = None
+        self.template_norms = None
+        self._loaded_mtime = None
+
+    def _ensure_loaded(self):
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            self.labels = None
+            self._loaded_mtime = None
+            return False
+        if mtime != self._loaded_mtime:
+            with np.load(self.model_path) as data:
+                self.labels = data['labels']
+                self.templates = data['templates']
+                self.aspects = data['aspects']
+            self.template_norms = np.einsum('ij,ij->i', self.templates, self.templates)
+            self._loaded_mtime = mtime
+        return self.labels is not None and len(self.labels) > 0
+
+    def is_ready(self):
+        return self._ensure_loaded()
+
+    def read(self, final_img, max_distance):
+        glyphs = segment_glyphs(final_img)
+        if not glyphs:
+            return ""
+        query = np.stack([g.ravel() for g, _ in glyphs])
+        query_aspects = np.array([a for _, a in glyphs], dtype=np.float32)
+        # Mean squared pixel difference to every template, via one matrix product
+        distances = (np.einsum('ij,ij->i', query, query)[:, None] + self.template_norms[None, :]
+                     - 2.0 * query @ self.templates.T) / query.shape[1]
+        distances += GLYPH_ASPECT_WEIGHT * np.abs(query_aspects[:, None] - self.aspects[None, :])
+        best = distances.argmin(axis=1)
+        if distances[np.arange(len(best)), best].max() > max_distance:
+            return ""
+        return "".join(self.labels[best])
+
+    def recognize(self, images, config):
+        if not self._ensure_loaded():
+            raise RuntimeError(f"Glyph OCR model not found: {self.model_path} (run train_glyphs.py)")
+        return [self.read(img, config["glyph_max_distance"]) for img in images]
@@ -0,0 +1,85 @@
+"""
+Bounded cache of OCR results keyed by the preprocessed ('final') image.
+
+Plant readings keep returning to values already seen, so the binarized
+image handed to the OCR reader repeats too. The key is the image's content
+digest plus the preprocessing parameters that produced it; the value is the
+recognized text. Shared by the live pipeline and the OCR Debug tab, so all
+access goes through one lock.
+"""
+import threading
+from collections import OrderedDict
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+
+class OcrResultCache:
+    """
+    max_entries <= 0 disables the cache. eviction "lru" refreshes an entry on
+    every hit; "fifo" drops entries strictly in insertion order.
+    """
+    def __init__(self, max_entries=512, eviction="lru"):
+        self.entries = OrderedDict()
+        self.max_entries = 0
+        self.eviction = "lru"
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.configure(max_entries, eviction)
+
+    def configure(self, max_entries, eviction="lru"):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown OCR cache eviction policy: {eviction}")
+        with self._lock:
+            self.max_entries = int(max_entries)
+            self.eviction = eviction
+            self._evict()
+
+    def _evict(self):
+        limit = max(self.max_entries, 0)
+        while len(self.entries) > limit:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """Returns the cached text or None."""
+        with self._lock:
+            if self.max_entries <= 0:
+                return None
+            text = self.entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            if self.eviction == "lru":
+                self.entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        with self._lock:
+            if self.max_entries <= 0:
+                return
+            self.entries[key] = text
+            if self.eviction == "lru":
+                self.entries.move_to_end(key)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+                'max_entries': self.max_entries,
+                'hit_rate': round(self.hit_rate(), 4),
+            }
@@ -0,0 +1,185 @@
+"""
+Optional multi-process EasyOCR pool (config ocr_process_pool_size > 0).
+
+Each worker is its own Python process that loads the EasyOCR reader once
+from the model folder, with torch limited to ocr_torch_threads threads, and
+then serves recognition requests: preprocessed ROI arrays arrive pickled over
+a multiprocessing connection and the texts go back the same way. A request
+is cut into one chunk per worker, so the ROIs of a cycle are recognized on
+several cores at once.
+
+Workers are started as plain subprocesses (`python ocr_pool.py`, or the
+frozen app with --ocr-worker) rather than multiprocessing.Process, because a
+spawned child re-runs the main script and app_capture.py builds its GUI at
+import time.
+"""
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+WORKER_FLAG = "--ocr-worker" # First argument of the frozen app when started as a worker
+AUTHKEY_ENV = "OCR_WORKER_AUTHKEY"
+WORKER_CONFIG_KEYS = ("ocr_mode", "ocr_batch_enabled", "ocr_batch_size") # What EasyOcrBackend.recognize() reads
+
+def worker_command(address):
+    host, port = address
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, WORKER_FLAG, f"{host}:{port}"]
+    return [sys.executable, os.path.abspath(__file__), f"{host}:{port}"]
+
+def worker_main(argv):
+    """Worker process: connect back, load the reader, answer (images, config) requests until None / EOF."""
+    host, port = argv[0].rsplit(":", 1)
+    conn = Client((host, int(port)), authkey=bytes.fromhex(os.environ[AUTHKEY_ENV]))
+    settings = conn.recv()
+    try:
+        import torch
+        torch.set_num_threads(settings['torch_threads'])
+        import easyocr
+        from ocr_backends import EasyOcrBackend
+        backend = EasyOcrBackend(settings['allowlist'])
+        backend.reader = easyocr.Reader(['en'], model_storage_directory=settings['model_dir'])
+    except Exception as e:
+        conn.send(('failed', f"{type(e).__name__}: {e}"))
+        return 1
+    conn.send(('ready', os.getpid()))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return 0
+        if request is None:
+            return 0
+        images, config = request
+        try:
+            conn.send(('ok', backend.recognize(images, config)))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+
+class OcrProcessPool:
+    """
+    Parent side. start() launches the workers and blocks until every one has
+    its reader loaded, for at most start_timeout seconds (raises RuntimeError
+    and kills the workers otherwise); recognize() has the
+    signature of OcrBackend.recognize(). One request at a time.
+    """
+    def __init__(self, model_dir, allowlist, workers, torch_threads=1, start_timeout=600):
+        self.model_dir = model_dir
+        self.allowlist = allowlist
+        self.workers = workers
+        self.torch_threads = torch_threads
+        self.start_timeout = start_timeout
+        self.processes = []
+        self.connections = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        authkey = secrets.token_bytes(32)
+        env = dict(os.environ, **{
+            AUTHKEY_ENV: authkey.hex(),
+            'OMP_NUM_THREADS': str(self.torch_threads),
+            'MKL_NUM_THREADS': str(self.torch_threads),
+        })
+        listener = Listener(('127.0.0.1', 0), authkey=authkey)
+        accepted = []
+        def accept_all():
+            try:
+                while len(accepted) < self.workers:
+                    accepted.append(listener.accept())
+            except OSError:
+                pass # Listener closed by start() after a failure
+        acceptor = threading.Thread(target=accept_all, name="ocr-pool-accept", daemon=True)
+        acceptor.start()
+        try:
+            for _ in range(self.workers):
+                self.processes.append(subprocess.Popen(
+                    worker_command(listener.address), env=env,
+                    creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)))
+            deadline = time.monotonic() + self.start_timeout
+            while acceptor.is_alive():
+                acceptor.join(0.2)
+                dead = [p for p in self.processes if p.poll() is not None]
+                if dead:
+                    raise RuntimeError(f"OCR worker exited during startup (code {dead[0].returncode})")
+                if time.monotonic() > deadline:
+                    raise RuntimeError("OCR workers did not connect in time")
+            self.connections = list(accepted)
+            settings = {'model_dir': self.model_dir, 'allowlist': self.allowlist, 'torch_threads': self.torch_threads}
+            for conn in self.connections:
+                conn.send(settings)
+            for conn in self.connections:
+                # The same deadline covers the model load; a hung worker must not block startup
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not conn.poll(remaining):
+                    raise RuntimeError("OCR workers did not load the reader in time")
+                try:
+                    status, detail = conn.recv()
+                except EOFError:
+                    raise RuntimeError("OCR worker exited while loading the reader")
+                if status != 'ready':
+                    raise RuntimeError(f"OCR worker failed to load the reader: {detail}")
+        except BaseException:
+            listener.close()
+            for process in self.processes:
+                if process.poll() is None:
+                    process.kill() # May be stuck loading the model; it would not read the stop message
+            self.connections = list(accepted)
+            self.close()
+            raise
+        listener.close()
+        return self
+
+    def is_ready(self):
+        return bool(self.connections)
+
+    def recognize(self, images, config):
+        if not images:
+            return []
+        worker_config = {key: config[key] for key in WORKER_CONFIG_KEYS}
+        with self._lock:
+            if not self.connections:
+                raise RuntimeError("OCR process pool is not running")
+            # Contiguous, near-equal chunks, one per worker (fewer if there are fewer images)
+            count = min(len(self.connections), len(images))
+            bounds = [len(images) * i // count for i in range(count + 1)]
+            try:
+                for conn, start, end in zip(self.connections, bounds, bounds[1:]):
+                    conn.send((images[start:end], worker_config))
+                replies = [conn.recv() for conn in self.connections[:count]] # Read every reply, even after an error
+            except (EOFError, OSError) as e:
+                self._close_locked()
+                raise RuntimeError(f"OCR worker process lost: {e}")
+        texts = []
+        for status, detail in replies:
+            if status != 'ok':
+                raise RuntimeError(f"OCR worker error: {detail}")
+            texts.extend(detail)
+        return texts
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        for conn in self.connections:
+            try:
+                conn.send(None)
+                conn.close()
+            except (OSError, ValueError):
+                pass
+        self.connections = []
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+
+
+if __name__ == '__main__':
+    sys.exit(worker_main(sys.argv[1:]))
@@ -0,0 +1,185 @@
+"""
+Compiled OCR preprocessing for CaptureEngine.preprocess_for_ocr().
+
+A PreprocessPlan is built from the config once per config version (in
+CaptureEngine.set_config()): the CLAHE settings, the morphology kernels and
+a per-ROI lookup of the conditional morphology step and cache params.
+run() then applies the chain to a gray ROI without any per-call setup.
+
+Upscaling is either "fixed" (ocr_scale_factor for every ROI) or "adaptive":
+the scale that brings the ROI's text line to ocr_target_glyph_height pixels,
+capped at ocr_scale_factor and never below 1. The adaptive scale is measured
+once per ROI (key + size) and kept for the plan's lifetime.
+
+ocr_preprocess_order picks where the upscale happens: "upscale_first" (the
+original chain) runs CLAHE ... opening on the upscaled ROI; "upscale_last"
+runs CLAHE, the median and Otsu at native resolution, so those gray steps
+touch scale^2 fewer pixels, and upscales the binarized result. The
+conditional morphology and the opening then run on the upscaled binary image
+with their configured kernels: thresholding commutes with erosion/dilation,
+so eroding the gray text there is dilating the inverted binary text here.
+The median kernel is divided by the scale but kept at 3 or more, so the
+native image is still denoised.
+"""
+import threading
+
+import numpy as np
+import cv2
+
+from ocr_backends import foreground_mask
+
+CLAHE_TILE_GRID = (8, 8)
+OCR_SCALE_MODES = ("fixed", "adaptive")
+OCR_PREPROCESS_ORDERS = ("upscale_first", "upscale_last")
+OCR_INTERPOLATIONS = {
+    "lanczos4": cv2.INTER_LANCZOS4,
+    "cubic": cv2.INTER_CUBIC,
+    "linear": cv2.INTER_LINEAR,
+    "area": cv2.INTER_AREA,
+    "nearest": cv2.INTER_NEAREST,
+}
+ADAPTIVE_SCALE_STEP = 0.25 # Adaptive scales are rounded to this
+
+def native_ksize(ksize, scale, odd=False):
+    """Kernel size for an image `scale` times smaller (at least 1; odd sizes stay odd for medianBlur)."""
+    size = max(1, int(round(ksize / scale)))
+    if odd and size % 2 == 0:
+        size -= 1
+    return size
+
+def native_median_ksize(ksize, scale):
+    """native_ksize() of a median kernel, but never below 3 unless ksize itself is (1 = no median)."""
+    return max(native_ksize(ksize, scale, odd=True), min(ksize, 3))
+
+def estimate_glyph_height(roi_gray):
+    """
+    Height in pixels of the text line of a gray ROI: the longest run of rows
+    holding text-coloured pixels after Otsu. Returns 0 for a blank ROI.
+    """
+    _, bw_img = cv2.threshold(roi_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    ink_rows = foreground_mask(bw_img).any(axis=1).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], ink_rows, [0])))
+    runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    return int(runs.max()) if runs.size else 0
+
+
+class PreprocessPlan:
+    def __init__(self, config):
+        self.scale_factor = config["ocr_scale_factor"]
+        self.adaptive = config["ocr_scale_mode"] == "adaptive"
+        self.target_glyph_height = config["ocr_target_glyph_height"]
+        self.interpolation = OCR_INTERPOLATIONS.get(config["ocr_interpolation"], cv2.INTER_LANCZOS4)
+        self.adaptive_scales = {} # (roi_key, roi shape) -> chosen scale
+        self.order = config["ocr_preprocess_order"]
+        self.clahe_clip = config["ocr_clahe_clip"]
+        self.median_ksize = config["ocr_median_ksize"]
+        self.opening_ksize = config["ocr_opening_ksize"]
+        self._kernels = {} # ksize -> square uint8 kernel
+
+        # Conditional morphology, swapped for the dark foreground: a DILATE target
+        # is thickened by eroding the gray image, an ERODE target thinned by dilating it.
+        # (gray operation, operation on the inverted binary image, ksize, params)
+        dilate_ksize = config["ocr_dilate_ksize"]
+        erode_ksize = config["ocr_erode_ksize"]
+        thicken = (cv2.erode, cv2.dilate, dilate_ksize, ("dilate", dilate_ksize))
+        thin = (cv2.dilate, cv2.erode, erode_ksize, ("erode", erode_ksize))
+        self.roi_morphology = {roi_key: thin for roi_key in config["ocr_erode_targets"]}
+        self.roi_morphology.update((roi_key, thicken) for roi_key in config["ocr_dilate_targets"]) # Dilate wins
+        for ksize in (self.opening_ksize, dilate_ksize, erode_ksize):
+            self.kernel(ksize)
+
+        # Everything that shapes the 'final' image except scale and order (part of the OCR cache key)
+        base_params = (config["ocr_interpolation"], self.clahe_clip, self.median_ksize)
+        self.default_params = base_params + (None, self.opening_ksize)
+        self.roi_params = {roi_key: base_params + (step[3], self.opening_ksize)
+                           for roi_key, step in self.roi_morphology.items()}
+        self._local = threading.local()
+
+    def kernel(self, ksize):
+        kernel = self._kernels.get(ksize)
+        if kernel is None:
+            kernel = self._kernels[ksize] = np.ones((ksize, ksize), np.uint8)
+        return kernel
+
+    def clahe(self):
+        """The calling thread's CLAHE object (apply() keeps internal buffers, so threads don't share one)."""
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=self.clahe_clip, tileGridSize=CLAHE_TILE_GRID)
+        return clahe
+
+    def params(self, roi_key, scale, order):
+        return (scale, order) + self.roi_params.get(roi_key, self.default_params)
+
+    def scale_for(self, roi_gray, roi_key):
+        """Upscale factor of a ROI; adaptive scales are cached per ROI key and size (not for roi_key None)."""
+        if not self.adaptive:
+            return self.scale_factor
+        cache_key = (roi_key, roi_gray.shape)
+        scale = self.adaptive_scales.get(cache_key) if roi_key is not None else None
+        if scale is None:
+            glyph_height = estimate_glyph_height(roi_gray)
+            scale = self.target_glyph_height / glyph_height if glyph_height else self.scale_factor
+            scale = round(scale / ADAPTIVE_SCALE_STEP) * ADAPTIVE_SCALE_STEP
+            scale = min(max(scale, 1.0), self.scale_factor)
+            if roi_key is not None:
+                self.adaptive_scales[cache_key] = scale
+        return scale
+
+    def run(self, roi_gray, roi_key, order=None):
+        """
+        Upscale -> CLAHE -> median -> conditional morphology -> Otsu -> invert -> opening,
+        or with order "upscale_last": CLAHE -> median -> Otsu -> invert at native
+        resolution -> upscale -> conditional morphology -> opening.
+        order defaults to the configured ocr_preprocess_order.
+        Returns the intermediate images + params (see preprocess_for_ocr()), or None.
+        """
+        order = order or self.order
+        scale = self.scale_for(roi_gray, roi_key)
+        width = int(roi_gray.shape[1] * scale)
+        height = int(roi_gray.shape[0] * scale)
+        if width == 0 or height == 0:
+            return None
+
+        if order == "upscale_last":
+            gray = roi_gray
+            contrast = self._denoise(roi_gray, native_median_ksize(self.median_ksize, scale))
+            final = self._binarize(contrast)
+            if scale != 1:
+                upscaled = cv2.resize(final, (width, height), interpolation=self.interpolation)
+                _, final = cv2.threshold(upscaled, 127, 255, cv2.THRESH_BINARY)
+            morphology = self.roi_morphology.get(roi_key)
+            if morphology is not None:
+                _, operation, ksize, _ = morphology
+                final = operation(final, self.kernel(ksize), iterations=1)
+        else:
+            if scale == 1:
+                gray = roi_gray
+            else:
+                gray = cv2.resize(roi_gray, (width, height), interpolation=self.interpolation)
+            contrast = self._denoise(gray, self.median_ksize)
+            morphology = self.roi_morphology.get(roi_key)
+            if morphology is not None:
+                operation, _, ksize, _ = morphology
+                contrast = operation(contrast, self.kernel(ksize), iterations=1)
+            final = self._binarize(contrast)
+        final = cv2.morphologyEx(final, cv2.MORPH_OPEN, self.kernel(self.opening_ksize), iterations=1)
+        return {
+            'gray': gray,
+            'contrast': contrast, # After CLAHE and median (+ the conditional morphology in upscale_first)
+            'final': final,
+            'params': self.params(roi_key, scale, order),
+        }
+
+    def _denoise(self, gray, median_ksize):
+        """CLAHE -> median."""
+        contrast = self.clahe().apply(gray)
+        if median_ksize > 1:
+            contrast = cv2.medianBlur(contrast, median_ksize)
+        return contrast
+
+    @staticmethod
+    def _binarize(contrast):
+        """Otsu -> invert (white text on black)."""
+        _, bw_img = cv2.threshold(contrast, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return cv2.bitwise_not(bw_img)
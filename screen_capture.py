@@ -0,0 +1,158 @@
+"""
+Screen grabbing for the capture loop.
+
+grab_full() copies the whole virtual desktop (all monitors). grab_regions()
+copies only the given rectangles and returns them as a RegionFrame: the
+grabbed patches with their frame positions, so every coordinate (split
+boxes, ROI boxes) stays valid without a desktop-sized canvas.
+
+Rectangles are in frame coordinates, i.e. relative to the virtual desktop's
+top-left corner (what ImageGrab.grab(all_screens=True) returns as (0, 0)).
+
+If the optional `mss` package is installed it is used for region grabs: it
+copies just the requested rectangles from the screen. Pillow's Windows
+grabber always copies the full desktop and crops afterwards, so without mss
+the regions are read from ONE grab of their bounding box (saves the copies /
+conversions of everything outside it, not the desktop copy itself).
+"""
+import sys
+
+import numpy as np
+from PIL import Image, ImageGrab
+
+def merge_rects(rects, gap=0):
+    """
+    Merges (x, y, w, h) rectangles that overlap or lie within `gap` pixels of
+    each other, until no two merged rectangles touch. Returns (x, y, w, h) tuples.
+    """
+    boxes = [[x, y, x + w, y + h] for (x, y, w, h) in rects if w > 0 and h > 0]
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        while boxes:
+            box = boxes.pop()
+            i = 0
+            while i < len(boxes):
+                other = boxes[i]
+                if (box[0] - gap <= other[2] and other[0] - gap <= box[2]
+                        and box[1] - gap <= other[3] and other[1] - gap <= box[3]):
+                    box = [min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3])]
+                    boxes.pop(i)
+                    merged = True
+                else:
+                    i += 1
+            result.append(box)
+        boxes = result
+    return [(x0, y0, x1 - x0, y1 - y0) for (x0, y0, x1, y1) in sorted(boxes, key=lambda b: (b[1], b[0]))]
+
+
+class RegionFrame:
+    """
+    A frame of which only some rectangles were grabbed. patches holds
+    (x, y, array) with each array's top-left corner at (x, y) of the frame;
+    shape is the shape the full frame array would have. Pixels outside the
+    patches are unknown (black in to_array()). sub() and crop() slice the
+    patches without copying, so a region cycle never allocates or converts
+    more than the grabbed pixels.
+    """
+    def __init__(self, shape, patches):
+        self.shape = tuple(shape)
+        self.patches = list(patches)
+
+    @property
+    def size(self):
+        """(w, h), like a PIL image."""
+        return (self.shape[1], self.shape[0])
+
+    def map(self, func, shape):
+        """RegionFrame of func(patch) for every patch (same height and width), e.g. a gray conversion."""
+        return RegionFrame(shape, [(x, y, func(patch)) for x, y, patch in self.patches])
+
+    def sub(self, box):
+        """The part inside box (x0, y0, x1, y1), as a RegionFrame in box coordinates."""
+        x0, y0, x1, y1 = box
+        patches = []
+        for x, y, patch in self.patches:
+            h, w = patch.shape[:2]
+            left, top = max(x, x0), max(y, y0)
+            right, bottom = min(x + w, x1), min(y + h, y1)
+            if right > left and bottom > top:
+                patches.append((left - x0, top - y0, patch[top - y:bottom - y, left - x:right - x]))
+        return RegionFrame((y1 - y0, x1 - x0) + self.shape[2:], patches)
+
+    def crop(self, box):
+        """View of box (x0, y0, x1, y1), clipped to the frame, if one patch holds all of it; else None."""
+        frame_h, frame_w = self.shape[:2]
+        x0, y0 = max(box[0], 0), max(box[1], 0)
+        x1, y1 = min(box[2], frame_w), min(box[3], frame_h)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        for x, y, patch in self.patches:
+            h, w = patch.shape[:2]
+            if x <= x0 and y <= y0 and x1 <= x + w and y1 <= y + h:
+                return patch[y0 - y:y1 - y, x0 - x:x1 - x]
+        return None
+
+    def to_array(self):
+        """Dense copy of the frame, black outside the patches (for display)."""
+        array = np.zeros(self.shape, np.uint8)
+        for x, y, patch in self.patches:
+            h, w = patch.shape[:2]
+            array[y:y + h, x:x + w] = patch
+        return array
+
+
+def _load_mss():
+    try:
+        import mss
+        return mss
+    except ImportError:
+        return None
+
+def virtual_screen_origin():
+    """Desktop coordinates of the frame's (0, 0) (negative when a monitor sits left of / above the primary)."""
+    mss = _load_mss()
+    if mss is not None:
+        with mss.mss() as sct:
+            monitor = sct.monitors[0]
+            return (monitor['left'], monitor['top'])
+    if sys.platform == "win32":
+        try:
+            from ctypes import windll
+            return (windll.user32.GetSystemMetrics(76), windll.user32.GetSystemMetrics(77)) # SM_X/YVIRTUALSCREEN
+        except Exception:
+            pass
+    return (0, 0)
+
+def grab_full():
+    return ImageGrab.grab(all_screens=True)
+
+def grab_regions(rects, frame_size, origin=None):
+    """
+    Grabs only `rects` ((x, y, w, h) in frame coordinates) and returns them
+    as a RegionFrame of a frame_size frame (RGB patches).
+    """
+    shape = (frame_size[1], frame_size[0], 3)
+    if not rects:
+        return RegionFrame(shape, [])
+    mss = _load_mss()
+    if mss is not None:
+        with mss.mss() as sct:
+            if origin is None:
+                monitor = sct.monitors[0] # The virtual desktop, from the session in use
+                origin = (monitor['left'], monitor['top'])
+            ox, oy = origin
+            patches = []
+            for (x, y, w, h) in rects:
+                shot = sct.grab({'left': x + ox, 'top': y + oy, 'width': w, 'height': h})
+                patches.append((x, y, np.asarray(Image.frombytes('RGB', shot.size, shot.bgra, 'raw', 'BGRX'))))
+        return RegionFrame(shape, patches)
+
+    ox, oy = origin if origin is not None else virtual_screen_origin()
+    left = min(x for x, _, _, _ in rects)
+    top = min(y for _, y, _, _ in rects)
+    right = max(x + w for x, _, w, _ in rects)
+    bottom = max(y + h for _, y, _, h in rects)
+    area = np.asarray(ImageGrab.grab(bbox=(left + ox, top + oy, right + ox, bottom + oy), all_screens=True))
+    return RegionFrame(shape, [(x, y, area[y - top:y - top + h, x - left:x - left + w]) for (x, y, w, h) in rects])
@@ -0,0 +1,245 @@
+"""
+SIFT template helpers: persistent on-disk keypoint/descriptor cache and
+FLANN indexes trained once per template set.
+
+Entries are keyed by the template's path (relative to the base folder) and
+validated by file size + mtime; when those differ the content hash decides
+whether SIFT really has to run again.
+"""
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+import cv2
+
+SIFT_CACHE_VERSION = 1
+FLANN_INDEX_KDTREE = 1
+KNN_NEIGHBORS = 8 # Neighbours fetched per query descriptor from the index over ALL templates
+
+def keypoints_to_array(keypoints):
+    """cv2.KeyPoint list -> (N, 7) float64 array (pt.x, pt.y, size, angle, response, octave, class_id)."""
+    return np.array([(k.pt[0], k.pt[1], k.size, k.angle, k.response, k.octave, k.class_id) for k in keypoints],
+                    dtype=np.float64).reshape(-1, 7)
+
+def array_to_keypoints(array):
+    return [cv2.KeyPoint(x=float(r[0]), y=float(r[1]), size=float(r[2]), angle=float(r[3]),
+                         response=float(r[4]), octave=int(r[5]), class_id=int(r[6])) for r in array]
+
+def _flann_matcher():
+    return cv2.FlannBasedMatcher(dict(algorithm=FLANN_INDEX_KDTREE, trees=5), dict(checks=50))
+
+def file_sha1(filepath):
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SiftDiskCache:
+    """
+    Pickled dict of {relative_path: entry}. get() returns (kp, des) for a
+    template, running compute(filepath) only when the file actually changed.
+    Safe to call from several loader threads (compute runs outside the lock).
+    """
+    def __init__(self, cache_path, base_path):
+        self.cache_path = cache_path
+        self.base_path = base_path
+        self.entries = {}
+        self.loaded = False
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        return (SIFT_CACHE_VERSION, cv2.__version__)
+
+    def _key(self, filepath):
+        return os.path.relpath(filepath, self.base_path).replace(os.sep, '/')
+
+    def load(self):
+        """Reads the cache file once. A missing, corrupt or outdated file means an empty cache."""
+        with self._lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            self.entries = {}
+            if not os.path.exists(self.cache_path):
+                return
+            try:
+                with open(self.cache_path, 'rb') as f:
+                    data = pickle.load(f)
+                if data.get('signature') == self._signature():
+                    self.entries = data['entries']
+            except Exception as e:
+                print(f"Ignoring unreadable SIFT cache {self.cache_path}: {e}")
+
+    def save(self):
+        """Writes the cache (atomically) if anything changed."""
+        with self._lock:
+            if not self.dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                tmp_path = self.cache_path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump({'signature': self._signature(), 'entries': self.entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.cache_path)
+                self.dirty = False
+            except Exception as e:
+                print(f"Could not save SIFT cache {self.cache_path}: {e}")
+
+    def get(self, filepath, compute):
+        """Returns (kp, des) for filepath; compute(filepath) -> (kp, des) is called on a miss."""
+        self.load()
+        key = self._key(filepath)
+        stat = os.stat(filepath)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                self.hits += 1
+                return self._unpack(entry)
+
+        digest = file_sha1(filepath)
+        if entry is not None and entry['sha1'] == digest:
+            # Touched / copied but same content -> just refresh the stat fields
+            with self._lock:
+                entry['size'] = stat.st_size
+                entry['mtime_ns'] = stat.st_mtime_ns
+                self.dirty = True
+                self.hits += 1
+            return self._unpack(entry)
+
+        kp, des = compute(filepath)
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha1': digest,
+                'kp': keypoints_to_array(kp) if kp else None,
+                'des': des,
+            }
+            self.dirty = True
+        return (kp, des)
+
+    def prune(self, keep_paths):
+        """Drops entries whose template no longer exists (keep_paths = files seen this load)."""
+        keep_keys = {self._key(p) for p in keep_paths}
+        with self._lock:
+            for key in list(self.entries):
+                if key not in keep_keys:
+                    del self.entries[key]
+                    self.dirty = True
+
+    def rename(self, old_path, new_path):
+        """Moves the entry for a renamed file (or every entry under a renamed folder)."""
+        self.load()
+        old_key = self._key(old_path)
+        new_key = self._key(new_path)
+        with self._lock:
+            for key in list(self.entries):
+                if key == old_key or key.startswith(old_key + '/'):
+                    self.entries[new_key + key[len(old_key):]] = self.entries.pop(key)
+                    self.dirty = True
+
+    def discard(self, path):
+        """Drops the entry for a deleted file (or every entry under a deleted folder)."""
+        self.load()
+        old_key = self._key(path)
+        with self._lock:
+            for key in list(self.entries):
+                if key == old_key or key.startswith(old_key + '/'):
+                    del self.entries[key]
+                    self.dirty = True
+
+    @staticmethod
+    def _unpack(entry):
+        if entry['kp'] is None:
+            return (None, None)
+        return (array_to_keypoints(entry['kp']), entry['des'])
+
+
+class SiftTemplateIndex:
+    """
+    FLANN indexes trained once per template set: one over every template's
+    descriptors and one per template. knnMatch() on the shared index tags
+    each neighbour with imgIdx, i.e. the template it came from.
+
+    Scores are the per-template Lowe ratio test of matching the query against
+    each template on its own (m.distance < ratio * n.distance with m, n the
+    template's two nearest descriptors). A query descriptor whose k shared
+    neighbours include two of a template is scored from them; for the other
+    (template, descriptor) pairs the template's own index is queried, so a
+    template never loses matches to its neighbours in the shared index.
+
+    The matchers are shared by every thread, and OpenCV does not document
+    knnMatch() as thread-safe, so queries are serialized by a lock (the
+    expensive detectAndCompute() before them still runs in parallel).
+    """
+    def __init__(self, template_cache, ratio=0.7, knn_neighbors=KNN_NEIGHBORS, matcher_factory=None):
+        """matcher_factory() returns a new untrained DescriptorMatcher (default: FLANN kd-tree)."""
+        self.ratio = ratio
+        self.names = []
+        descriptors = []
+        for name, (kp, des) in template_cache.items():
+            if des is None or kp is None or len(kp) < 2: continue
+            self.names.append(name)
+            descriptors.append(np.asarray(des, dtype=np.float32))
+        self.total_descriptors = sum(len(d) for d in descriptors)
+        self.k = min(knn_neighbors, self.total_descriptors)
+        make_matcher = matcher_factory or _flann_matcher
+        self.matcher = None
+        self.template_matchers = []
+        self._lock = threading.Lock()
+        if descriptors:
+            self.matcher = make_matcher()
+            self.matcher.add(descriptors)
+            self.matcher.train()
+            for des in descriptors:
+                matcher = make_matcher()
+                matcher.add([des])
+                matcher.train()
+                self.template_matchers.append(matcher)
+
+    def __len__(self):
+        return len(self.names)
+
+    def count_good_matches(self, des_query):
+        """Returns a list of good-match counts, one per template (same order as self.names)."""
+        counts = [0] * len(self.names)
+        if self.matcher is None or des_query is None or len(des_query) < 2:
+            return counts
+        des_query = np.asarray(des_query, dtype=np.float32)
+        resolved = [[] for _ in self.names] # Query rows scored from the shared index, per template
+        with self._lock:
+            rows = self.matcher.knnMatch(des_query, k=self.k)
+            for query_idx, row in enumerate(rows):
+                nearest = {}
+                for m in row:
+                    nearest.setdefault(m.imgIdx, []).append(m.distance)
+                for label, distances in nearest.items():
+                    if len(distances) >= 2:
+                        resolved[label].append(query_idx)
+                        if distances[0] < self.ratio * distances[1]:
+                            counts[label] += 1
+            for label, matcher in enumerate(self.template_matchers):
+                pending = np.setdiff1d(np.arange(len(des_query)), resolved[label], assume_unique=True)
+                if not len(pending): continue
+                for pair in matcher.knnMatch(des_query[pending], k=2):
+                    if len(pair) == 2 and pair[0].distance < self.ratio * pair[1].distance:
+                        counts[label] += 1
+        return counts
+
+    def best_match(self, des_query, match_threshold):
+        """Name of the template with the most good matches (> threshold), else "None"."""
+        best_match_name = "None"
+        max_good_matches = 0
+        for name, good in zip(self.names, self.count_good_matches(des_query)):
+            if good > match_threshold and good > max_good_matches:
+                max_good_matches = good
+                best_match_name = name
+        return best_match_name
@@ -0,0 +1,113 @@
+"""
+Startup phase timer for app_capture.py (--profile-startup).
+
+    app_capture.py --profile-startup [REPORT.json] [--profile-startup-exit]
+
+Phases are timed with perf_counter relative to the moment this module was
+imported (the first import in app_capture.py). Phases may run on worker
+threads (OCR model, SIFT templates); the report is written once every
+expected phase has finished, and with --profile-startup-exit the app then
+closes, so cold starts of the PyInstaller build can be tracked from a script.
+When profiling is off every call is a cheap no-op.
+"""
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_REPORT_PATH = "startup_profile.json"
+
+_T0 = time.perf_counter()
+
+
+class StartupProfiler:
+    def __init__(self, report_path=None, exit_when_done=False):
+        self.enabled = report_path is not None
+        self.report_path = report_path
+        self.exit_when_done = exit_when_done
+        self.phases = {}
+        self.expected = set()
+        self.written = False
+        self._open = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_argv(cls, argv):
+        """Reads (and removes) the profiling flags from argv."""
+        if "--profile-startup" not in argv:
+            return cls()
+        index = argv.index("--profile-startup")
+        report_path = DEFAULT_REPORT_PATH
+        if index + 1 < len(argv) and not argv[index + 1].startswith("--"):
+            report_path = argv.pop(index + 1)
+        argv.pop(index)
+        exit_when_done = "--profile-startup-exit" in argv
+        if exit_when_done:
+            argv.remove("--profile-startup-exit")
+        return cls(report_path, exit_when_done)
+
+    def expect(self, *names):
+        """Phases that must finish before the report is written."""
+        self.expected.update(names)
+
+    def skip(self, *names):
+        """Expected phases that will not run this time (no longer waited for)."""
+        with self._lock:
+            self.expected.difference_update(names)
+
+    def begin(self, name):
+        """Starts a phase; a phase that already finished is not timed again (e.g. a later Refresh)."""
+        if self.enabled and name not in self.phases:
+            self._open[name] = time.perf_counter()
+
+    def end(self, name, **details):
+        if not self.enabled or name not in self._open:
+            return
+        start = self._open.pop(name)
+        with self._lock:
+            self.phases[name] = {
+                'start_s': round(start - _T0, 4),
+                'seconds': round(time.perf_counter() - start, 4),
+                'thread': threading.current_thread().name,
+            }
+            if details:
+                self.phases[name].update(details)
+
+    @contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def done(self):
+        """True once every expected phase has been recorded."""
+        with self._lock:
+            return self.expected.issubset(self.phases)
+
+    def report(self):
+        with self._lock:
+            phases = dict(sorted(self.phases.items(), key=lambda item: item[1]['start_s']))
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'frozen': bool(getattr(sys, 'frozen', False)),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'elapsed_s': round(time.perf_counter() - _T0, 4),
+            'phases': phases,
+            'missing_phases': sorted(self.expected - set(phases)),
+        }
+
+    def write_report(self):
+        if not self.enabled or self.written:
+            return
+        self.written = True
+        report = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(self.report_path)), exist_ok=True)
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Startup profile written to {self.report_path} ({report['elapsed_s']} s).")
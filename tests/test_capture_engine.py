@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from capture_engine import CaptureEngine
+from ocr_backends import OcrBackend
+
+
+def write_template(path, seed):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    noise = np.random.default_rng(seed).integers(0, 256, (60, 160), dtype=np.uint8)
+    cv2.imwrite(path, cv2.GaussianBlur(cv2.resize(noise, None, fx=2, fy=2, interpolation=cv2.INTER_NEAREST), (3, 3), 0))
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = CaptureEngine(base_path=str(tmp_path), status_callback=lambda *args: None)
+    yield engine
+    engine.close()
+
+
+def test_template_edits_do_not_wait_for_a_full_load(engine):
+    write_template(os.path.join(engine.tabname_dir, "slow.png"), 1)
+    write_template(os.path.join(engine.status_dir, "slow", "ok.png"), 2)
+    release = threading.Event()
+    compute = engine.compute_sift_for_file
+    def slow_compute(filepath):
+        if filepath.endswith("slow.png"):
+            release.wait(10)
+        return compute(filepath)
+    engine.compute_sift_for_file = slow_compute
+    loader = threading.Thread(target=engine.load_all_sift_templates)
+    loader.start()
+    try:
+        # Made while the load is still decoding: applied at once and kept after the swap
+        write_template(os.path.join(engine.tabname_dir, "added.png"), 3)
+        edit = threading.Thread(target=engine.add_tabname_template, args=("added.png",))
+        edit.start()
+        edit.join(5)
+        assert not edit.is_alive()
+        assert "added.png" in engine.tabname_sift_cache
+        write_template(os.path.join(engine.status_dir, "slow", "new.png"), 4)
+        engine.add_status_template("slow", "new.png")
+    finally:
+        release.set()
+        loader.join(10)
+    assert sorted(engine.tabname_sift_cache) == ["added.png", "slow.png"]
+    assert sorted(engine.status_sift_caches["slow.png"]) == ["new.png", "ok.png"]
+    assert engine._template_edits == []
+
+
+class RecordingBackend(OcrBackend):
+    """Reads each image's first pixel as its text; a pixel of 13 makes the whole call fail."""
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def recognize(self, images, config):
+        self.calls.append(len(images))
+        if any(img[0, 0] == 13 for img in images):
+            raise RuntimeError("unreadable image")
+        return [str(img[0, 0]) if img[0, 0] else "" for img in images]
+
+
+def ocr_job(roi_key, value, data, memo=None):
+    return {'final': np.full((4, 8), value, np.uint8), 'params': ("test",), 'roi_key': roi_key, 'data': data,
+            'memo': memo}
+
+
+@pytest.fixture
+def ocr_engine(engine):
+    engine.ocr_backends.update((name, RecordingBackend(name)) for name in ("a", "b"))
+    engine.config["ocr_backend"] = "a"
+    engine.config["ocr_backend_by_roi"] = {"level": "b", "flow": "b"}
+    return engine
+
+
+def test_ocr_jobs_go_to_each_backend_in_one_call(ocr_engine):
+    data = {}
+    jobs = [ocr_job("temp", 1, data), ocr_job("level", 2, data), ocr_job("pressure", 0, data),
+            ocr_job("flow", 4, data, memo=(("Tab", "flow"), b"digest", "ctx"))]
+    ocr_engine.run_ocr_jobs(jobs)
+    assert data == {"temp": "1", "level": "2", "pressure": "N/A", "flow": "4"}
+    assert ocr_engine.ocr_backends["a"].calls == [2]
+    assert ocr_engine.ocr_backends["b"].calls == [2]
+    assert ocr_engine.roi_memo.lookup(("Tab", "flow"), b"digest", "ctx") == (True, "4")
+
+
+def test_failed_ocr_call_is_retried_per_roi(ocr_engine):
+    data = {}
+    ocr_engine.run_ocr_jobs([ocr_job("temp", 1, data), ocr_job("pressure", 13, data), ocr_job("speed", 3, data),
+                             ocr_job("level", 2, data)])
+    assert data == {"temp": "1", "pressure": "Error", "speed": "3", "level": "2"}
+    assert ocr_engine.ocr_backends["a"].calls == [3, 1, 1, 1]
+    assert ocr_engine.ocr_backends["b"].calls == [1]
+
+
+def test_map_splits_keeps_split_order_when_run_concurrently(engine):
+    engine.config["split_workers"] = 4
+    running = []
+    peak = [0]
+    lock = threading.Lock()
+    def work(split):
+        with lock:
+            running.append(split)
+            peak[0] = max(peak[0], len(running))
+        time.sleep(0.05 * (4 - split)) # Later splits finish first
+        with lock:
+            running.remove(split)
+        return split * 10
+    assert engine._map_splits(work, [0, 1, 2, 3]) == [0, 10, 20, 30]
+    assert peak[0] > 1
+    engine.config["split_workers"] = 2 # Resized pool
+    assert engine._map_splits(work, [3, 2, 1, 0]) == [30, 20, 10, 0]
+    assert engine._split_pool_size == 2
+
+
+def test_concurrent_splits_give_the_sequential_results(engine):
+    rng = np.random.default_rng(5)
+    noise = rng.integers(0, 256, (50, 200), dtype=np.uint8)
+    frame = cv2.cvtColor(cv2.GaussianBlur(cv2.resize(noise, (800, 200), interpolation=cv2.INTER_NEAREST),
+                                          (3, 3), 0), cv2.COLOR_GRAY2RGB)
+    os.makedirs(engine.tabname_dir)
+    for i in range(4): # Each split's header is its own tab
+        header = frame[:100, i * 200:(i + 1) * 200]
+        cv2.imwrite(os.path.join(engine.tabname_dir, f"tab{i}.png"), cv2.cvtColor(header, cv2.COLOR_RGB2BGR))
+    engine.load_all_sift_templates()
+    engine.config.update(change_gate_enabled=False, tab_memo_enabled=False, region_capture_enabled=False)
+    results = {}
+    for workers in (1, 4):
+        engine.config["split_workers"] = workers
+        results[workers] = [(r['match_name'], r['offset']) for r in engine.process_frame(frame, "P2_25x4")]
+    assert results[4] == results[1]
+    assert [name for name, _ in results[4]] == ["tab0.png", "tab1.png", "tab2.png", "tab3.png"]
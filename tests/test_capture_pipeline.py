@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+from capture_pipeline import CapturePipeline
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.005)
+
+
+class FakeEngine:
+    """Stage methods of CaptureEngine on integer 'frames'; identify_frame() can be held."""
+    def __init__(self, policy="drop", frames=None):
+        self.config = {"pipeline_overrun_policy": policy, "pipeline_queue_size": 1}
+        self.frames = frames
+        self.grabbed = 0
+        self.release_grab = threading.Event()
+        self.release_grab.set()
+        self.identify_started = threading.Event()
+        self.release_identify = threading.Event()
+        self.ocr_delay = 0
+        self.ocr_done = 0
+
+    def grab_frame(self, source, method_key):
+        if self.frames is not None and self.grabbed >= self.frames:
+            return None
+        self.release_grab.wait()
+        self.grabbed += 1
+        return (self.grabbed, None, self.grabbed)
+
+    def identify_frame(self, frame, method_key, expected_tabs=None):
+        self.identify_started.set()
+        self.release_identify.wait()
+        return frame
+
+    def preprocess_frame(self, identified):
+        return identified
+
+    def run_ocr_jobs(self, ocr_jobs):
+        time.sleep(self.ocr_delay)
+        self.ocr_done += 1
+
+    def finish_frame(self, identified):
+        return [identified]
+
+
+def start_pipeline(engine, **kwargs):
+    sunk = []
+    pipeline = CapturePipeline(engine, source=None, sink=lambda frame, results, tick_time: sunk.append(frame),
+                               **kwargs).start()
+    return pipeline, sunk
+
+
+def fill_identify_queue(engine, pipeline):
+    """Frame 1 held inside identify, frame 2 waiting in its queue, then a third tick."""
+    pipeline.tick()
+    assert engine.identify_started.wait(5)
+    pipeline.tick()
+    wait_until(lambda: pipeline.queues['identify'].qsize() == 1)
+    pipeline.tick()
+    wait_until(lambda: engine.grabbed == 3)
+
+
+@pytest.mark.parametrize("policy, expected_frames, counter", [
+    ("drop", [1, 2], 'dropped'),
+    ("coalesce", [1, 3], 'coalesced'),
+    ("skip_next", [1, 2], 'dropped'),
+])
+def test_overrun_policies(policy, expected_frames, counter):
+    engine = FakeEngine(policy)
+    pipeline, sunk = start_pipeline(engine)
+    try:
+        fill_identify_queue(engine, pipeline)
+        wait_until(lambda: pipeline.stats()[counter] == 1)
+        if policy == "skip_next":
+            assert pipeline.tick() is False # The tick after an overrun is not grabbed
+            assert pipeline.stats()['skipped'] == 1
+        engine.release_identify.set()
+        wait_until(lambda: len(sunk) == 2)
+        assert sunk == expected_frames
+        assert pipeline.stats()['processed'] == 2
+    finally:
+        engine.release_identify.set()
+        pipeline.stop(wait=True)
+
+
+def test_ticks_while_grab_is_busy_are_missed():
+    engine = FakeEngine()
+    engine.release_identify.set()
+    engine.release_grab.clear()
+    pipeline, _ = start_pipeline(engine)
+    try:
+        assert pipeline.tick() is True
+        wait_until(lambda: pipeline.queues['grab'].qsize() == 0) # The grab stage holds tick 1
+        assert pipeline.tick() is True # Pending in front of the grab stage
+        assert pipeline.tick() is False
+        assert pipeline.tick() is False
+        assert pipeline.stats()['missed'] == 2
+        engine.release_grab.set()
+        wait_until(lambda: engine.grabbed == 2) # Only the two accepted ticks are grabbed
+        assert pipeline.stats()['ticks'] == 4
+    finally:
+        engine.release_grab.set()
+        pipeline.stop(wait=True)
+
+
+def test_queue_depths_are_reported():
+    engine = FakeEngine()
+    pipeline, _ = start_pipeline(engine)
+    try:
+        fill_identify_queue(engine, pipeline)
+        stats = pipeline.stats()
+        assert stats['queues']['identify'] == 1
+        assert stats['queues']['ocr'] == 0
+        assert stats['policy'] == "drop"
+    finally:
+        engine.release_identify.set()
+        pipeline.stop(wait=True)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        CapturePipeline(FakeEngine("newest"), source=None)
+
+
+def test_exhausted_source_stops_the_pipeline():
+    engine = FakeEngine(frames=1)
+    engine.release_identify.set()
+    exhausted = threading.Event()
+    pipeline, sunk = start_pipeline(engine, on_exhausted=exhausted.set)
+    pipeline.tick()
+    wait_until(lambda: sunk == [1])
+    pipeline.tick()
+    assert exhausted.wait(5)
+    assert not pipeline.is_running()
+    assert pipeline.tick() is False
+    pipeline.stop(wait=True)
+
+
+def test_stop_waits_for_the_running_ocr_call():
+    engine = FakeEngine()
+    engine.release_identify.set()
+    engine.ocr_delay = 0.3
+    pipeline, sunk = start_pipeline(engine)
+    pipeline.tick()
+    wait_until(lambda: engine.grabbed == 1)
+    time.sleep(0.1) # Frame 1 is in the OCR stage now
+    pipeline.stop()
+    assert engine.ocr_done == 1
+    assert sunk == [] # A frame finished after stop() never reaches the sink
+    pipeline.stop(wait=True)
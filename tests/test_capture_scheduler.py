@@ -0,0 +1,65 @@
+import pytest
+
+from capture_scheduler import CaptureScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(interval=1.0):
+    clock = FakeClock()
+    return CaptureScheduler(interval, clock=clock).start(), clock
+
+
+def test_ticks_on_absolute_deadlines():
+    scheduler, clock = make_scheduler()
+    for n, late in enumerate([0.0, 0.3, 0.1, 0.9]):
+        clock.now = 100.0 + n + late
+        scheduler.fire()
+        assert scheduler.next_deadline() == 100.0 + n + 1 # A late tick never shifts the next one
+    stats = scheduler.stats()
+    assert stats['ticks'] == 4
+    assert stats['missed'] == 0
+    assert stats['late_ms']['last'] == pytest.approx(900.0, abs=0.1)
+    assert stats['late_ms']['max'] == pytest.approx(900.0, abs=0.1)
+    assert stats['late_ms']['mean'] == pytest.approx(325.0, abs=0.1)
+
+
+def test_deadlines_passed_by_whole_intervals_are_missed_not_burst():
+    scheduler, clock = make_scheduler()
+    scheduler.fire() # Tick 0 at 100.0
+    clock.now = 103.4 # Ticks 1 and 2 passed, tick 3 is 0.4 s late
+    scheduler.fire()
+    stats = scheduler.stats()
+    assert stats['ticks'] == 2
+    assert stats['missed'] == 2
+    assert stats['late_ms']['last'] == pytest.approx(400.0, abs=0.1)
+    assert scheduler.next_deadline() == 104.0
+
+
+def test_sub_second_interval_and_progress():
+    scheduler, clock = make_scheduler(0.25)
+    scheduler.fire()
+    assert scheduler.next_deadline() == 100.25
+    clock.now = 100.125
+    assert scheduler.progress() == pytest.approx(0.5)
+    clock.now = 101.0
+    assert scheduler.progress() == 1.0
+
+
+def test_wait_returns_due_wall_time_and_none_after_stop():
+    scheduler = CaptureScheduler(0.01).start()
+    assert scheduler.wait() is not None
+    scheduler.stop()
+    assert scheduler.wait() is None
+
+
+@pytest.mark.parametrize("interval", [0, -1])
+def test_rejects_non_positive_interval(interval):
+    with pytest.raises(ValueError):
+        CaptureScheduler(interval)
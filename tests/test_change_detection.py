@@ -0,0 +1,85 @@
+import numpy as np
+
+from change_detection import (RoiResultMemo, SplitChangeGate, TabMatchMemo, content_digest, dhash,
+                              hamming_distance)
+
+
+def gradient(width=64, height=32):
+    return np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+
+
+def test_dhash_is_stable_and_sensitive():
+    image = gradient()
+    assert hamming_distance(dhash(image), dhash(image.copy())) == 0
+    assert hamming_distance(dhash(image), dhash(image[:, ::-1])) > 0
+    assert hamming_distance(dhash(image), dhash(image, hash_size=8)) == float('inf')
+
+
+def test_content_digest_includes_shape():
+    data = np.zeros((4, 6), np.uint8)
+    assert content_digest(data) == content_digest(data.copy())
+    assert content_digest(data) != content_digest(data.reshape(6, 4))
+    changed = data.copy()
+    changed[0, 0] = 1
+    assert content_digest(data) != content_digest(changed)
+
+
+def test_tab_match_memo_reuses_match_within_distance():
+    memo = TabMatchMemo()
+    phash = dhash(gradient())
+    assert memo.lookup("P4_1", phash, "ctx", max_distance=2) is None
+    memo.store("P4_1", phash, "ctx", "Tab A")
+    near = phash.copy()
+    near[0] ^= 0b1
+    assert memo.lookup("P4_1", near, "ctx", max_distance=2) == "Tab A"
+    far = phash ^ 0xFF
+    assert memo.lookup("P4_1", far, "ctx", max_distance=2) is None
+    assert memo.lookup("P4_2", phash, "ctx", max_distance=2) is None
+    assert (memo.hits, memo.misses) == (1, 3)
+
+
+def test_tab_match_memo_context_and_max_hits():
+    memo = TabMatchMemo()
+    phash = dhash(gradient())
+    memo.store("NONE", phash, "ctx", "Tab A")
+    assert memo.lookup("NONE", phash, "other templates", max_distance=0) is None
+    assert memo.lookup("NONE", phash, "ctx", max_distance=0, max_hits=2) == "Tab A"
+    assert memo.lookup("NONE", phash, "ctx", max_distance=0, max_hits=2) == "Tab A"
+    assert memo.lookup("NONE", phash, "ctx", max_distance=0, max_hits=2) is None
+
+
+def test_split_change_gate_skips_unchanged_splits():
+    gate = SplitChangeGate()
+    thumb = gradient(16, 8)
+    assert gate.lookup("NONE", thumb, "ctx", 10, 2) is None
+    gate.store("NONE", thumb, "ctx", ["result"])
+    noisy = thumb.copy()
+    noisy[0, :5] += 5 # Below the pixel threshold
+    noisy[1, :2] = 255 # Two changed pixels are tolerated
+    assert gate.lookup("NONE", noisy, "ctx", 10, 2) == ["result"]
+    noisy[2, 8] = 0
+    assert gate.lookup("NONE", noisy, "ctx", 10, 2) is None
+    assert (gate.skipped, gate.processed) == (1, 2)
+
+
+def test_split_change_gate_forces_runs():
+    gate = SplitChangeGate()
+    thumb = gradient(16, 8)
+    gate.store("NONE", thumb, "ctx", "result")
+    assert gate.lookup("NONE", thumb, "new ctx", 10, 0) is None
+    assert gate.lookup("NONE", gradient(16, 9), "ctx", 10, 0) is None # Shape changed
+    assert gate.lookup("NONE", thumb, "ctx", 10, 0, max_skips=1) == "result"
+    assert gate.lookup("NONE", thumb, "ctx", 10, 0, max_skips=1) is None
+
+
+def test_roi_result_memo_keyed_by_digest_and_context():
+    memo = RoiResultMemo()
+    key = ("Tab A", "score")
+    assert memo.lookup(key, b"d1", "ctx") == (False, None)
+    memo.store(key, b"d1", "ctx", "123")
+    assert memo.lookup(key, b"d1", "ctx") == (True, "123")
+    assert memo.lookup(key, b"d2", "ctx") == (False, None)
+    assert memo.lookup(key, b"d1", "new ctx") == (False, None)
+    assert memo.lookup(("Tab B", "score"), b"d1", "ctx") == (False, None)
+    assert memo.counters["score"] == {'hits': 1, 'misses': 4}
+    assert memo.totals() == {'hits': 1, 'misses': 4}
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from frame_ring import FrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(2, (4, 6, 3))
+    yield ring
+    ring.close()
+
+
+def frame(value, shape=(4, 6, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+def test_write_and_view_round_trip(ring):
+    handle = ring.write(frame(7))
+    view = ring.view(handle)
+    assert view.shape == (4, 6, 3)
+    assert (view == 7).all()
+    assert not view.flags.writeable
+
+
+def test_smaller_and_gray_frames_keep_their_shape(ring):
+    assert ring.view(ring.write(frame(1, (2, 3, 3)))).shape == (2, 3, 3)
+    assert ring.view(ring.write(np.ones((4, 6), np.uint8))).shape == (4, 6, 1)
+
+
+def test_full_ring_returns_none_until_a_slot_is_released(ring):
+    first = ring.write(frame(1))
+    ring.write(frame(2))
+    assert ring.free_slots() == 0
+    assert ring.write(frame(3)) is None
+    ring.release(first)
+    assert ring.free_slots() == 1
+    assert ring.write(frame(3)) is not None
+
+
+def test_wraparound_reuses_slots_and_rejects_stale_handles(ring):
+    a = ring.write(frame(1))
+    b = ring.write(frame(2))
+    ring.release(a)
+    c = ring.write(frame(3))
+    assert c[0] == a[0] # Wrapped around to the released slot
+    assert c[1] > b[1]
+    with pytest.raises(ValueError):
+        ring.view(a)
+    ring.release(a) # A stale release leaves the new frame alone
+    assert (ring.view(c) == 3).all()
+    assert (ring.view(b) == 2).all()
+
+
+def test_frames_larger_than_max_shape_are_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.write(frame(0, (5, 6, 3)))
+    with pytest.raises(ValueError):
+        ring.write(frame(0, (4, 6, 4)))
+    assert ring.free_slots() == 2
@@ -0,0 +1,84 @@
+import json
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from frame_sources import (SESSION_INDEX, ImageFilesFrameSource, ScreenFrameSource, SessionFrameSource,
+                           SessionRecorder, open_frame_source)
+
+
+def make_frame(value):
+    array = np.zeros((6, 8, 3), np.uint8)
+    array[:, :, 0] = value
+    array[2, 3] = (1, 2, 3)
+    return Image.fromarray(array)
+
+
+def grab_all(source):
+    frames = []
+    while (frame := source.grab()) is not None:
+        frames.append(np.asarray(frame)[0, 0, 0])
+    return frames
+
+
+@pytest.fixture
+def folder(tmp_path):
+    for name, value in [("b.png", 20), ("a.png", 10), ("c.png", 30)]:
+        make_frame(value).save(tmp_path / name)
+    (tmp_path / "notes.txt").write_text("not a frame")
+    return tmp_path
+
+
+def test_folder_replays_pngs_in_name_order(folder):
+    source = open_frame_source(str(folder))
+    assert isinstance(source, ImageFilesFrameSource)
+    assert grab_all(source) == [10, 20, 30]
+    assert source.label.endswith("c.png")
+    assert np.asarray(source.preview())[0, 0, 0] == 30 # Last grabbed frame, source not advanced
+    assert source.grab() is None
+
+
+def test_looping_folder_starts_over(folder):
+    source = ImageFilesFrameSource.from_folder(str(folder), loop=True)
+    assert [np.asarray(source.grab())[0, 0, 0] for _ in range(4)] == [10, 20, 30, 10]
+
+
+def test_recorded_session_replays_frames_and_timestamps(tmp_path):
+    path = str(tmp_path / "session.zip")
+    recorder = SessionRecorder(path)
+    for i, value in enumerate([5, 6, 7]):
+        recorder.add(make_frame(value), timestamp=1000.0 + i)
+    recorder.close()
+    source = open_frame_source([path])
+    assert isinstance(source, SessionFrameSource)
+    assert [entry['timestamp'] for entry in source.frames] == [1000.0, 1001.0, 1002.0]
+    first = source.grab()
+    assert first.mode == "RGB"
+    assert np.asarray(first)[2, 3].tolist() == [1, 2, 3] # PNG frames are lossless
+    assert grab_all(source) == [6, 7]
+    source.close()
+
+
+def test_session_of_another_version_is_rejected(tmp_path):
+    path = str(tmp_path / "old.zip")
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(SESSION_INDEX, json.dumps({'version': 99, 'frames': []}))
+    with pytest.raises(ValueError):
+        SessionFrameSource(path)
+
+
+def test_regions_are_cut_from_replayed_frames(folder):
+    source = ImageFilesFrameSource.from_folder(str(folder))
+    regions = source.grab_regions([(0, 0, 4, 2), (3, 2, 2, 2)], (8, 6))
+    assert regions.shape == (6, 8, 3)
+    assert [(x, y, patch.shape[:2]) for x, y, patch in regions.patches] == [(0, 0, (2, 4)), (3, 2, (2, 2))]
+    assert regions.crop((3, 2, 4, 3)).tolist() == [[[1, 2, 3]]]
+
+
+def test_open_frame_source_specs(folder):
+    assert isinstance(open_frame_source("screen"), ScreenFrameSource)
+    files = open_frame_source([str(folder / "c.png"), str(folder / "a.png")])
+    assert grab_all(files) == [30, 10] # An explicit list keeps its order
+    assert grab_all(open_frame_source(str(folder / "b.png"))) == [20]
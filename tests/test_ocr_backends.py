@@ -0,0 +1,63 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from ocr_backends import GlyphTemplateBackend, save_glyph_model, segment_glyphs, train_glyph_templates
+
+CONFIG = {"glyph_max_distance": 0.25}
+
+
+def render(text, scale=1.0):
+    """Black digits on white, binarized like a 'final' OCR image."""
+    img = np.full((int(40 * scale), int((30 * len(text) + 20) * scale)), 255, np.uint8)
+    cv2.putText(img, text, (int(10 * scale), int(30 * scale)), cv2.FONT_HERSHEY_SIMPLEX, scale, 0,
+                max(1, int(2 * scale)), cv2.LINE_8)
+    return img
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    samples = [(render(text), text) for text in ["0123456789", "12.5", "-40.7", "386"]]
+    model, used, skipped = train_glyph_templates(samples + [(render("12"), "123")], "0123456789.-")
+    assert (used, skipped) == (4, 1) # The sample that doesn't split into len(text) glyphs is skipped
+    path = str(tmp_path / "model" / "digit_glyphs.npz")
+    save_glyph_model(model, path)
+    return path
+
+
+def test_segment_glyphs_splits_left_to_right():
+    glyphs = segment_glyphs(render("12.5"))
+    assert len(glyphs) == 4
+    assert glyphs[2][1] < glyphs[0][1] # '.' is narrower than '1'
+    assert segment_glyphs(np.full((10, 10), 255, np.uint8)) == []
+
+
+def test_reads_trained_digits(model_path):
+    backend = GlyphTemplateBackend(model_path)
+    assert backend.is_ready()
+    assert backend.recognize([render("905.1"), render("-27"), render("1.5", scale=1.5)], CONFIG) == ["905.1", "-27", "1.5"]
+
+
+def test_unknown_glyphs_read_as_empty(model_path):
+    backend = GlyphTemplateBackend(model_path)
+    assert backend.recognize([render("XW"), np.full((20, 40), 255, np.uint8)], CONFIG) == ["", ""]
+
+
+def test_missing_model_is_not_ready(tmp_path):
+    backend = GlyphTemplateBackend(str(tmp_path / "missing.npz"))
+    assert not backend.is_ready()
+    with pytest.raises(RuntimeError):
+        backend.recognize([render("1")], CONFIG)
+
+
+def test_model_is_reloaded_when_the_file_changes(model_path):
+    backend = GlyphTemplateBackend(model_path)
+    assert backend.recognize([render("7")], CONFIG) == ["7"]
+    model, _, _ = train_glyph_templates([(render("1"), "1")], "0123456789")
+    save_glyph_model(model, model_path)
+    stat = os.stat(model_path)
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert backend.recognize([render("1")], CONFIG) == ["1"]
+    assert list(backend.labels) == ["1"]
@@ -0,0 +1,55 @@
+import pytest
+
+from ocr_cache import OcrResultCache
+
+
+def fill(cache, *keys):
+    for key in keys:
+        cache.put(key, key.upper())
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = OcrResultCache(2, "lru")
+    fill(cache, "a", "b")
+    assert cache.get("a") == "A" # "a" is now newer than "b"
+    fill(cache, "c")
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b") is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_fifo_evicts_in_insertion_order_despite_hits():
+    cache = OcrResultCache(2, "fifo")
+    fill(cache, "a", "b")
+    assert cache.get("a") == "A"
+    fill(cache, "c")
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.get("a") is None
+
+
+def test_stats_count_hits_and_misses():
+    cache = OcrResultCache(4)
+    fill(cache, "a")
+    cache.get("a")
+    cache.get("a")
+    cache.get("z")
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (2, 1, 1)
+    assert stats['hit_rate'] == pytest.approx(2 / 3, abs=1e-4)
+
+
+def test_shrinking_evicts_and_zero_disables():
+    cache = OcrResultCache(3)
+    fill(cache, "a", "b", "c")
+    cache.configure(1, "fifo")
+    assert list(cache.entries) == ["c"]
+    cache.configure(0)
+    assert cache.entries == {}
+    fill(cache, "d")
+    assert cache.get("d") is None
+    assert cache.misses == 0 # A disabled cache counts nothing
+
+
+def test_unknown_eviction_policy_is_rejected():
+    with pytest.raises(ValueError):
+        OcrResultCache(2, "random")
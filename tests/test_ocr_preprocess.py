@@ -0,0 +1,140 @@
+import cv2
+import numpy as np
+import pytest
+
+from capture_engine import default_config
+from ocr_preprocess import PreprocessPlan, estimate_glyph_height
+
+DILATE_TARGET = "乾溜空気弁A_開度_%"
+ERODE_TARGET = "燃焼炉_温度_℃"
+
+
+def make_config(**overrides):
+    config = default_config()
+    config.update(overrides)
+    return config
+
+
+def text_roi(text="12.5", scale=0.6, thickness=1, seed=0):
+    """Dark digits on a light, slightly noisy background, like a plant display ROI."""
+    height = int(30 * scale) + 8
+    roi = np.full((height, int(22 * scale) * len(text) + 10), 210, np.uint8)
+    cv2.putText(roi, text, (4, height - 5), cv2.FONT_HERSHEY_SIMPLEX, scale, 40, thickness, cv2.LINE_AA)
+    noise = np.random.default_rng(seed).integers(-12, 13, roi.shape)
+    return np.clip(roi.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def original_chain(roi_gray, roi_key, config):
+    """The per-call chain the plan replaced (preprocess_for_ocr before PreprocessPlan)."""
+    scale = config["ocr_scale_factor"]
+    gray = cv2.resize(roi_gray, (int(roi_gray.shape[1] * scale), int(roi_gray.shape[0] * scale)),
+                      interpolation=cv2.INTER_LANCZOS4)
+    contrast = cv2.createCLAHE(clipLimit=config["ocr_clahe_clip"], tileGridSize=(8, 8)).apply(gray)
+    denoised = cv2.medianBlur(contrast, config["ocr_median_ksize"])
+    if roi_key in config["ocr_dilate_targets"]:
+        ksize = config["ocr_dilate_ksize"]
+        denoised = cv2.erode(denoised, np.ones((ksize, ksize), np.uint8), iterations=1)
+    elif roi_key in config["ocr_erode_targets"]:
+        ksize = config["ocr_erode_ksize"]
+        denoised = cv2.dilate(denoised, np.ones((ksize, ksize), np.uint8), iterations=1)
+    _, bw_img = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    final = cv2.bitwise_not(bw_img)
+    ksize = config["ocr_opening_ksize"]
+    return cv2.morphologyEx(final, cv2.MORPH_OPEN, np.ones((ksize, ksize), np.uint8), iterations=1)
+
+
+@pytest.mark.parametrize("roi_key", [None, "plain_roi", DILATE_TARGET, ERODE_TARGET])
+def test_upscale_first_matches_the_original_chain(roi_key):
+    config = make_config()
+    roi = text_roi()
+    steps = PreprocessPlan(config).run(roi, roi_key)
+    assert steps['final'].shape == (roi.shape[0] * 4, roi.shape[1] * 4)
+    assert np.array_equal(steps['final'], original_chain(roi, roi_key, config))
+
+
+def test_plan_compiles_kernels_and_per_roi_steps_once():
+    config = make_config(ocr_dilate_ksize=3, ocr_erode_targets=[ERODE_TARGET, DILATE_TARGET])
+    plan = PreprocessPlan(config)
+    assert plan.kernel(3) is plan.kernel(3)
+    assert set(plan._kernels) == {2, 3}
+    assert plan.roi_morphology[DILATE_TARGET][0] is cv2.erode # Dilate wins over erode
+    assert plan.roi_morphology[ERODE_TARGET][0] is cv2.dilate
+    assert "plain_roi" not in plan.roi_morphology
+
+
+def test_params_tell_differently_processed_images_apart():
+    plan = PreprocessPlan(make_config())
+    assert plan.params(DILATE_TARGET, 4, "upscale_first") != plan.params("plain_roi", 4, "upscale_first")
+    assert plan.params("plain_roi", 4, "upscale_first") != plan.params("plain_roi", 4, "upscale_last")
+    assert plan.params("plain_roi", 4, "upscale_first") != plan.params("plain_roi", 2, "upscale_first")
+    other_clip = PreprocessPlan(make_config(ocr_clahe_clip=3.0))
+    assert other_clip.params("plain_roi", 4, "upscale_first") != plan.params("plain_roi", 4, "upscale_first")
+
+
+def test_estimate_glyph_height():
+    roi = np.full((40, 60), 220, np.uint8)
+    roi[10:26, 5:50] = 30
+    assert estimate_glyph_height(roi) == 16
+    assert estimate_glyph_height(np.full((20, 20), 128, np.uint8)) == 0
+
+
+@pytest.mark.parametrize("glyph_height, expected_scale", [(8, 4.0), (13, 2.5), (16, 2.0), (64, 1.0), (0, 4.0)])
+def test_adaptive_scale_targets_the_glyph_height(glyph_height, expected_scale):
+    plan = PreprocessPlan(make_config(ocr_scale_mode="adaptive", ocr_target_glyph_height=32, ocr_scale_factor=4))
+    roi = np.full((80, 60), 220, np.uint8)
+    roi[4:4 + glyph_height, 5:50] = 30
+    assert plan.scale_for(roi, "roi") == expected_scale
+    steps = plan.run(roi, "roi")
+    assert steps['final'].shape == (int(80 * expected_scale), int(60 * expected_scale))
+    assert steps['params'][0] == expected_scale
+
+
+def test_adaptive_scale_is_kept_per_roi_and_size():
+    plan = PreprocessPlan(make_config(ocr_scale_mode="adaptive", ocr_target_glyph_height=32))
+    small_text = np.full((40, 60), 220, np.uint8)
+    small_text[10:18, 5:50] = 30
+    big_text = np.full((40, 60), 220, np.uint8)
+    big_text[4:36, 5:50] = 30
+    assert plan.scale_for(small_text, "roi") == 4.0
+    assert plan.scale_for(big_text, "roi") == 4.0 # Measured once per ROI key and size
+    assert plan.scale_for(big_text, "other_roi") == 1.0
+    assert plan.scale_for(big_text[:, :50], "roi") == 1.0
+    assert plan.scale_for(small_text, None) == 4.0 # roi_key None is measured every time
+    assert plan.scale_for(big_text, None) == 1.0
+
+
+def test_fixed_mode_ignores_the_glyph_height():
+    plan = PreprocessPlan(make_config(ocr_scale_factor=3))
+    assert plan.scale_for(text_roi(), "roi") == 3
+
+
+@pytest.mark.parametrize("order", ["upscale_first", "upscale_last"])
+def test_dilate_and_erode_targets_change_the_output(order):
+    plan = PreprocessPlan(make_config())
+    roi = text_roi(scale=1.0, thickness=2)
+    ink = {roi_key: np.count_nonzero(plan.run(roi, roi_key, order)['final'])
+           for roi_key in ("plain_roi", DILATE_TARGET, ERODE_TARGET)}
+    assert ink[DILATE_TARGET] > ink["plain_roi"] > ink[ERODE_TARGET]
+
+
+@pytest.mark.parametrize("text", ["12.5", "386", "-40.7"])
+@pytest.mark.parametrize("roi_key", ["plain_roi", DILATE_TARGET, ERODE_TARGET])
+def test_upscale_last_cleans_like_upscale_first(text, roi_key):
+    plan = PreprocessPlan(make_config())
+    roi = text_roi(text, scale=1.0, thickness=2)
+    first = plan.run(roi, roi_key, "upscale_first")['final'] > 0
+    last = plan.run(roi, roi_key, "upscale_last")
+    assert last['final'].shape == first.shape
+    assert last['contrast'].shape == roi.shape # The gray steps ran at native resolution
+    overlap = np.count_nonzero(first & (last['final'] > 0)) / np.count_nonzero(first | (last['final'] > 0))
+    assert overlap > 0.8
+
+
+def test_upscale_last_keeps_denoising_at_native_resolution():
+    plan = PreprocessPlan(make_config(ocr_median_ksize=3, ocr_scale_factor=4))
+    roi = np.full((20, 40), 200, np.uint8)
+    roi[5:15, 5:35] = 40
+    roi[2, 38] = 40 # Salt noise a 3x3 median removes
+    final = plan.run(roi, "plain_roi", "upscale_last")['final']
+    assert not final[8:12, 150:].any()
+    assert final[30:50, 30:130].all()
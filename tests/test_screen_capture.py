@@ -0,0 +1,50 @@
+import numpy as np
+
+from screen_capture import RegionFrame, merge_rects
+
+
+def test_merge_rects_overlapping_and_disjoint():
+    rects = [(0, 0, 10, 10), (5, 5, 10, 10), (50, 50, 5, 5)]
+    assert merge_rects(rects) == [(0, 0, 15, 15), (50, 50, 5, 5)]
+
+
+def test_merge_rects_gap():
+    rects = [(0, 0, 10, 10), (14, 0, 10, 10)]
+    assert merge_rects(rects) == [(0, 0, 10, 10), (14, 0, 10, 10)]
+    assert merge_rects(rects, gap=4) == [(0, 0, 24, 10)]
+
+
+def test_merge_rects_merges_transitively():
+    # c touches a only after a and b were merged
+    rects = [(0, 0, 10, 10), (8, 0, 10, 10), (0, 12, 20, 5), (16, 8, 4, 5)]
+    assert merge_rects(rects) == [(0, 0, 20, 17)]
+
+
+def test_merge_rects_drops_empty_rects():
+    assert merge_rects([(0, 0, 0, 10), (5, 5, 10, 0)]) == []
+    assert merge_rects([(3, 4, 0, 0), (1, 1, 2, 2)]) == [(1, 1, 2, 2)]
+
+
+def make_region_frame():
+    full = np.arange(20 * 30 * 3, dtype=np.uint32).reshape(20, 30, 3).astype(np.uint8)
+    patches = [(2, 3, full[3:8, 2:12]), (20, 10, full[10:18, 20:28])]
+    return full, RegionFrame(full.shape, patches)
+
+
+def test_region_frame_crop_and_sub():
+    full, frame = make_region_frame()
+    assert frame.size == (30, 20)
+    assert np.array_equal(frame.crop((4, 4, 10, 7)), full[4:7, 4:10])
+    assert frame.crop((0, 0, 10, 7)) is None # Partly outside every patch
+    sub = frame.sub((5, 5, 25, 15))
+    assert sub.shape == (10, 20, 3)
+    assert [(x, y, patch.shape[:2]) for x, y, patch in sub.patches] == [(0, 0, (3, 7)), (15, 5, (5, 5))]
+    assert np.array_equal(sub.crop((15, 5, 20, 10)), full[10:15, 20:25])
+
+
+def test_region_frame_to_array_is_black_outside_patches():
+    full, frame = make_region_frame()
+    dense = frame.to_array()
+    assert np.array_equal(dense[3:8, 2:12], full[3:8, 2:12])
+    assert np.array_equal(dense[10:18, 20:28], full[10:18, 20:28])
+    assert not dense[0:3].any()
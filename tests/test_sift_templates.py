@@ -0,0 +1,166 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import sift_templates
+from sift_templates import SiftDiskCache, SiftTemplateIndex
+
+
+class Compute:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, filepath):
+        self.calls += 1
+        return ([cv2.KeyPoint(1.0, 2.0, 3.0)], np.full((1, 128), self.calls, np.float32))
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "templates" / "tab.png"
+    path.parent.mkdir()
+    path.write_bytes(b"template pixels")
+    return str(path)
+
+
+def make_cache(tmp_path):
+    return SiftDiskCache(str(tmp_path / "cache" / "sift.pkl"), str(tmp_path / "templates"))
+
+
+def test_second_get_is_a_hit(tmp_path, template):
+    cache, compute = make_cache(tmp_path), Compute()
+    kp, des = cache.get(template, compute)
+    kp2, des2 = cache.get(template, compute)
+    assert compute.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert kp2[0].pt == kp[0].pt
+    assert np.array_equal(des2, des)
+
+
+def test_touched_file_with_same_content_falls_back_to_sha1(tmp_path, template):
+    cache, compute = make_cache(tmp_path), Compute()
+    cache.get(template, compute)
+    stat = os.stat(template)
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    cache.dirty = False
+    cache.get(template, compute)
+    assert compute.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.dirty # The refreshed mtime is saved
+    assert cache.entries["tab.png"]['mtime_ns'] == os.stat(template).st_mtime_ns
+
+
+def test_changed_content_is_recomputed(tmp_path, template):
+    cache, compute = make_cache(tmp_path), Compute()
+    cache.get(template, compute)
+    with open(template, 'ab') as f:
+        f.write(b" edited")
+    _, des = cache.get(template, compute)
+    assert compute.calls == 2
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert (des == 2).all()
+
+
+def test_saved_cache_is_reused(tmp_path, template):
+    cache, compute = make_cache(tmp_path), Compute()
+    cache.get(template, compute)
+    cache.save()
+    reloaded = make_cache(tmp_path)
+    _, des = reloaded.get(template, compute)
+    assert compute.calls == 1
+    assert reloaded.hits == 1
+    assert (des == 1).all()
+
+
+def test_outdated_cache_file_is_ignored(tmp_path, template, monkeypatch):
+    cache, compute = make_cache(tmp_path), Compute()
+    cache.get(template, compute)
+    cache.save()
+    monkeypatch.setattr(sift_templates, "SIFT_CACHE_VERSION", sift_templates.SIFT_CACHE_VERSION + 1)
+    reloaded = make_cache(tmp_path)
+    reloaded.load()
+    assert reloaded.entries == {}
+    reloaded.get(template, compute)
+    assert compute.calls == 2
+
+
+def test_unreadable_cache_file_means_empty_cache(tmp_path):
+    cache = make_cache(tmp_path)
+    os.makedirs(os.path.dirname(cache.cache_path))
+    with open(cache.cache_path, 'wb') as f:
+        f.write(b"not a pickle")
+    cache.load()
+    assert cache.entries == {}
+
+
+def test_template_without_keypoints(tmp_path, template):
+    cache = make_cache(tmp_path)
+    cache.get(template, lambda filepath: ([], None))
+    assert cache.get(template, Compute()) == (None, None)
+
+
+def test_rename_discard_and_prune(tmp_path, template):
+    cache, compute = make_cache(tmp_path), Compute()
+    cache.get(template, compute)
+    base = cache.base_path
+    cache.rename(template, os.path.join(base, "sub", "tab.png"))
+    assert list(cache.entries) == ["sub/tab.png"]
+    cache.discard(os.path.join(base, "sub"))
+    assert cache.entries == {}
+    cache.get(template, compute)
+    cache.prune([])
+    assert cache.entries == {}
+
+
+def make_templates():
+    """Two near-duplicate headers sharing most features, plus two unrelated ones, and a query of the first."""
+    rng = np.random.default_rng(3)
+    header = rng.random((200, 128), np.float32) * 100
+    def noisy(des):
+        return (des + rng.normal(0, 2, des.shape)).astype(np.float32)
+    templates = {
+        "tab_a.png": noisy(header),
+        "tab_a_variant.png": noisy(np.vstack([header[:150], rng.random((50, 128), np.float32) * 100])),
+        "tab_b.png": rng.random((180, 128), np.float32) * 100,
+        "tab_c.png": rng.random((220, 128), np.float32) * 100,
+    }
+    cache = {name: ([cv2.KeyPoint(0, 0, 1)] * len(des), des) for name, des in templates.items()}
+    return cache, noisy(header[20:190])
+
+
+def per_template_counts(cache, des_query, make_matcher, ratio=0.7):
+    counts = []
+    for _, des in cache.values():
+        pairs = make_matcher().knnMatch(des_query, des, k=2)
+        counts.append(sum(1 for m, n in pairs if m.distance < ratio * n.distance))
+    return counts
+
+
+def test_index_scores_like_matching_each_template_alone():
+    cache, des_query = make_templates()
+    index = SiftTemplateIndex(cache, matcher_factory=cv2.BFMatcher)
+    expected = per_template_counts(cache, des_query, cv2.BFMatcher)
+    assert index.count_good_matches(des_query) == expected
+    assert expected[0] > 100 and expected[1] > 100 # Shared features count for both near-duplicates
+
+
+def test_flann_index_stays_close_to_per_template_flann():
+    cache, des_query = make_templates()
+    index = SiftTemplateIndex(cache)
+    flann = lambda: cv2.FlannBasedMatcher(dict(algorithm=1, trees=5), dict(checks=50))
+    expected = per_template_counts(cache, des_query, flann)
+    counts = index.count_good_matches(des_query)
+    for got, want in zip(counts, expected):
+        assert abs(got - want) <= max(5, 0.1 * want)
+    assert index.best_match(des_query, 70) == "tab_a.png"
+
+
+def test_index_skips_templates_without_descriptors():
+    cache, des_query = make_templates()
+    cache["empty.png"] = ([], None)
+    index = SiftTemplateIndex(cache, matcher_factory=cv2.BFMatcher)
+    assert "empty.png" not in index.names
+    assert SiftTemplateIndex({}).count_good_matches(des_query) == []
+    assert index.best_match(des_query[:1], 0) == "None"
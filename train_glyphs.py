@@ -0,0 +1,103 @@
+"""
+Trains the digit glyph templates used by the "glyphs" OCR backend.
+
+Labelled readings come either from ROI crops or from whole screenshots:
+
+    python train_glyphs.py --crops samples/crops.json
+    python train_glyphs.py --split P2_25x4 --labels labels.json shots/*.png
+
+crops.json maps crop files (relative to the JSON file) to their text, either
+"12.5" or {"text": "12.5", "roi_key": "燃焼炉_温度_℃"} so the ROI's own
+preprocessing is used. labels.json is the bench_ocr.py format:
+{"<frame file name>": {"<roi_key>": "<text>"}}.
+
+Every crop goes through the same preprocess_for_ocr() as the live pipeline;
+the model is written to model/digit_glyphs.npz (or --output).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from PIL import Image
+
+from capture_engine import CaptureEngine, BASE_PATH, CONFIG_FILE_PATH, OCR_ALLOWLIST, SPLIT_ORDER, load_config_file
+from ocr_backends import GlyphTemplateBackend, save_glyph_model, train_glyph_templates
+from bench_ocr import collect_frame_jobs
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Train the glyph OCR backend from labelled readings.")
+    parser.add_argument('frames', nargs='*', help="Screenshot image files (PNG), used with --labels.")
+    parser.add_argument('--crops', help="JSON file mapping ROI crop files to their text.")
+    parser.add_argument('--labels', help="JSON file with the expected text per frame file name and ROI key.")
+    parser.add_argument('--split', default="NONE", choices=SPLIT_ORDER, help="Split method of the frames (default: NONE).")
+    parser.add_argument('--config', default=CONFIG_FILE_PATH, help="Path to config.json.")
+    parser.add_argument('--base-path', default=BASE_PATH, help="Folder containing pictures/, rois/ and model/.")
+    parser.add_argument('--output', help="Model file (default: the engine's glyph model path).")
+    return parser
+
+def crop_samples(engine, crops_path):
+    with open(crops_path, 'r', encoding='utf-8') as f:
+        crops = json.load(f)
+    folder = os.path.dirname(os.path.abspath(crops_path))
+    for filename, label in crops.items():
+        text, roi_key = (label, None) if isinstance(label, str) else (label['text'], label.get('roi_key'))
+        crop = Image.open(os.path.join(folder, filename)).convert('RGB')
+        processing_steps = engine.preprocess_for_ocr(crop, roi_key)
+        if processing_steps is not None:
+            yield processing_steps['final'], text
+
+def frame_samples(engine, labels_path, frames, method_key):
+    with open(labels_path, 'r', encoding='utf-8') as f:
+        labels = json.load(f)
+    for path in frames:
+        frame_labels = labels.get(os.path.basename(path), {})
+        if not frame_labels:
+            continue
+        for job in collect_frame_jobs(engine, Image.open(path).convert('RGB'), method_key):
+            if job['roi_key'] in frame_labels:
+                yield job['final'], frame_labels[job['roi_key']]
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if not args.crops and not args.labels:
+        parser.error("give --crops and/or --labels with frames")
+
+    config = load_config_file(args.config)
+    config.update({"change_gate_enabled": False, "roi_memo_enabled": False})
+    engine = CaptureEngine(config, base_path=args.base_path)
+    samples = []
+    if args.crops:
+        samples.extend(crop_samples(engine, args.crops))
+    if args.labels:
+        engine.load_all_sift_templates()
+        samples.extend(frame_samples(engine, args.labels, args.frames, args.split))
+
+    model, used, skipped = train_glyph_templates(samples, OCR_ALLOWLIST)
+    if used == 0:
+        print(f"No usable samples ({skipped} skipped: glyph count did not match the label).", file=sys.stderr)
+        return 1
+    output = args.output or engine.ocr_backends[GlyphTemplateBackend.name].model_path
+    save_glyph_model(model, output)
+
+    # Self-check on the training set (sanity + speed, not a held-out accuracy)
+    backend = GlyphTemplateBackend(output)
+    backend.is_ready()
+    start = time.perf_counter()
+    correct = sum(backend.read(final_img, config["glyph_max_distance"]) == text for final_img, text in samples)
+    elapsed = time.perf_counter() - start
+    chars = {ch: int((model['labels'] == ch).sum()) for ch in sorted(set(model['labels'].tolist()))}
+    print(json.dumps({
+        'output': output,
+        'samples_used': used,
+        'samples_skipped': skipped,
+        'templates_per_char': chars,
+        'training_accuracy': round(correct / len(samples), 4),
+        'ms_per_reading': round(elapsed / len(samples) * 1000, 4),
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())